@@ -4,12 +4,26 @@ from time import sleep
 import os
 from pathlib import Path
 
+from jeu_donnees import lire_jeu, ecrire_jeu, chemin_jeu
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 # DATA_PATH = BASE_DIR / "data" / "données.csv"
 
 
-# 1. Chargement des annonces brutes
-df = pd.read_csv(BASE_DIR / "DATA" / "df_analyseVF4.csv")
+# 1. Chargement des annonces brutes (Parquet typé, seulement les colonnes utiles)
+COLONNES = ["Ville", "Code_postal", "departement_code", "prix", "surface", "pieces", "type_bien"]
+if chemin_jeu("analyse").exists():
+    df = lire_jeu("analyse", COLONNES)
+    # Retour aux types du CSV, pour que les lignes ajoutées ressemblent aux
+    # anciennes : un float32 copié tel quel s'écrirait 110.4000015258789.
+    # Passer par le texte rend la valeur décimale d'origine (110.4).
+    for col in ["prix", "surface"]:
+        df[col] = pd.to_numeric(df[col].astype(str))
+    if (df["prix"].dropna() % 1 == 0).all():
+        df["prix"] = df["prix"].astype("Int64")      # 882000, pas 882000.0
+    df["pieces"] = df["pieces"].astype("float64")     # 4.0, comme avant
+else:
+    df = pd.read_csv(BASE_DIR / "DATA" / "df_analyseVF4.csv")
 
 # 2. Initialisation du géocodeur
 geolocator = Nominatim(user_agent="Student-SDA-2025")
@@ -114,4 +128,7 @@ for i, row in df_filtre.iterrows():
         index=False
     )
 
+# Parquet typé pour la carte (l'application le lit en priorité)
+ecrire_jeu(pd.read_csv(csv_sortie, dtype={"code_postal": str, "departement": str}), "carte")
+
 print("✅ annonces_carte.csv créé et enrichi avec cache géographique")
@@ -0,0 +1,186 @@
+# SRC/analyse_html.py
+# Moteurs d'analyse HTML interchangeables pour l'extraction des annonces.
+# Les scrapers n'ont besoin que de deux choses dans une page :
+#   - alts_images(html)     : l'ALT de chaque <img alt> (scraper_logicimmo)
+#   - cartes_annonces(html) : les champs de chaque carte "classified-card" (3-extract_du_html)
+# inutile donc de construire l'arbre BeautifulSoup complet d'une page de 1 Mo.
+#
+# Moteurs :
+#   "selectolax"  : moteur C lexbor (paquet selectolax), le plus rapide
+#   "strainer"    : BeautifulSoup limité par un SoupStrainer aux balises utiles
+#   "lxml"        : BeautifulSoup complet avec lxml (historique de 3-extract)
+#   "html.parser" : BeautifulSoup complet, parseur Python (historique du scraper)
+#   "auto"        : selectolax s'il est installé, sinon strainer
+# Le moteur par défaut se règle avec la variable d'environnement PARSEUR_HTML.
+#
+# cartes_annonces() lit d'abord les données structurées embarquées dans la
+# page (JSON-LD, JSON applicatif : SRC/donnees_structurees.py) et ne passe
+# par le moteur HTML que si la page n'en contient pas, ou si leur nombre
+# d'annonces ne correspond pas au nombre de cartes du DOM.
+
+import os
+import re
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer
+except ImportError:
+    BeautifulSoup = SoupStrainer = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    PARSEUR_BS4 = "lxml"
+except ImportError:
+    PARSEUR_BS4 = "html.parser"
+
+from donnees_structurees import cartes_structurees
+
+MOTEURS = ("selectolax", "strainer", "lxml", "html.parser")
+MOTEUR_PAR_DEFAUT = os.environ.get("PARSEUR_HTML", "auto")
+
+SELECTEUR_CARTES = "div[data-testid*='classified-card']"
+# Même sélection, sans construire d'arbre : sert à contrôler les données structurées
+RE_CARTE = re.compile(r"<div\b[^>]*\bdata-testid\s*=\s*[\"'][^\"']*classified-card", re.IGNORECASE)
+
+# À incrémenter dès que les champs extraits des cartes changent : les pages
+# déjà extraites par une version précédente seront re-parsées (SRC/manifeste.py)
+VERSION_CARTES = "cartes-3"
+
+# Un ALT qui contient l'un de ces mots décrit le bien, pas l'agence
+MOTS_DESCRIPTION = ["€", "m²", "pièce", "chambre", "Paris", "sur"]
+
+
+def choisir_moteur(moteur=None) -> str:
+    moteur = moteur or MOTEUR_PAR_DEFAUT
+    if moteur == "auto":
+        return "selectolax" if HTMLParser is not None else "strainer"
+    if moteur not in MOTEURS:
+        raise ValueError(f"Moteur HTML inconnu : {moteur} (choix : auto, {', '.join(MOTEURS)})")
+    if moteur == "selectolax" and HTMLParser is None:
+        raise ImportError("Le moteur selectolax demande le paquet selectolax (pip install selectolax)")
+    if moteur != "selectolax" and BeautifulSoup is None:
+        raise ImportError(f"Le moteur {moteur} demande le paquet beautifulsoup4")
+    return moteur
+
+
+def moteurs_disponibles() -> list:
+    dispo = []
+    for m in MOTEURS:
+        try:
+            choisir_moteur(m)
+            dispo.append(m)
+        except ImportError:
+            pass
+    return dispo
+
+
+def _est_carte(testid):
+    return testid and "classified-card" in testid
+
+
+def _soupe(html: str, moteur: str, strainer):
+    if moteur == "strainer":
+        return BeautifulSoup(html, PARSEUR_BS4, parse_only=strainer)
+    return BeautifulSoup(html, moteur)
+
+
+# ============================================================
+# 🖼️ ALT des images
+# ============================================================
+
+def alts_images(html: str, moteur=None) -> list:
+    """ALT de toutes les <img alt> de la page, dans l'ordre du document."""
+    moteur = choisir_moteur(moteur)
+    if moteur == "selectolax":
+        return [img.attributes.get("alt") or "" for img in HTMLParser(html).css("img[alt]")]
+    soup = _soupe(html, moteur, SoupStrainer("img", alt=True) if moteur == "strainer" else None)
+    return [img.get("alt", "") for img in soup.find_all("img", alt=True)]
+
+
+# ============================================================
+# 🃏 Cartes d'annonces
+# ============================================================
+
+def _ranger_caracteristiques(facts: list, champs: dict):
+    """Pièces / chambres / surface / étage à partir des textes des keyfacts."""
+    for f in facts:
+        if f == "·":
+            continue
+        if "pièce" in f:
+            champs["pieces"] = f.replace("pièces", "").replace("pièce", "").strip()
+        elif "chambre" in f:
+            champs["chambres"] = f.replace("chambres", "").replace("chambre", "").strip()
+        elif "m²" in f:
+            champs["surface"] = f.replace("m²", "").strip()
+        elif "Étage" in f:
+            champs["etage"] = f.replace("Étage", "").strip()
+
+
+def _agence(alts) -> str | None:
+    """Premier ALT non vide qui ne ressemble pas à une description : le nom de l'agence."""
+    for alt in alts:
+        alt = alt.strip()
+        if alt and not any(x in alt for x in MOTS_DESCRIPTION):
+            return alt
+    return None
+
+
+def _carte_bs4(ann) -> dict:
+    def texte(selecteur):
+        noeud = ann.select_one(selecteur)
+        return noeud.get_text(strip=True) if noeud else None
+
+    champs = {
+        "type_bien": texte("div.css-1e55dlz"),
+        "prix": texte('div[data-testid="cardmfe-price-testid"]'),
+        "pieces": None, "chambres": None, "surface": None, "etage": None,
+        "adresse": texte('div[data-testid="cardmfe-description-box-address"]'),
+        "description": texte("div.css-oorffy"),
+    }
+    keyfacts = ann.select_one('div[data-testid="cardmfe-keyfacts-testid"]')
+    if keyfacts:
+        _ranger_caracteristiques(
+            [x.get_text(strip=True) for x in keyfacts.find_all("div", class_="css-9u48bm")], champs)
+    champs["agence"] = _agence(img.get("alt", "") for img in ann.find_all("img"))
+    return champs
+
+
+def _carte_selectolax(ann) -> dict:
+    def texte(selecteur):
+        noeud = ann.css_first(selecteur)
+        return noeud.text(strip=True) if noeud else None
+
+    champs = {
+        "type_bien": texte("div.css-1e55dlz"),
+        "prix": texte('div[data-testid="cardmfe-price-testid"]'),
+        "pieces": None, "chambres": None, "surface": None, "etage": None,
+        "adresse": texte('div[data-testid="cardmfe-description-box-address"]'),
+        "description": texte("div.css-oorffy"),
+    }
+    keyfacts = ann.css_first('div[data-testid="cardmfe-keyfacts-testid"]')
+    if keyfacts:
+        _ranger_caracteristiques([x.text(strip=True) for x in keyfacts.css("div.css-9u48bm")], champs)
+    champs["agence"] = _agence(img.attributes.get("alt") or "" for img in ann.css("img"))
+    return champs
+
+
+def cartes_annonces(html: str, moteur=None, structurees=True) -> list:
+    """
+    Un dict par carte d'annonce : type_bien, prix, pieces, chambres, surface,
+    etage, adresse, description, agence (None si absent).
+    structurees=False : ignore les données embarquées et lit toujours le DOM.
+    """
+    moteur = choisir_moteur(moteur)
+    if structurees:
+        cartes = cartes_structurees(html, len(RE_CARTE.findall(html)))
+        if cartes is not None:
+            return cartes
+    if moteur == "selectolax":
+        return [_carte_selectolax(ann) for ann in HTMLParser(html).css(SELECTEUR_CARTES)]
+    strainer = SoupStrainer("div", {"data-testid": _est_carte}) if moteur == "strainer" else None
+    soup = _soupe(html, moteur, strainer)
+    return [_carte_bs4(ann) for ann in soup.find_all("div", {"data-testid": _est_carte})]
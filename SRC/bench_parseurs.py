@@ -0,0 +1,164 @@
+# SRC/bench_parseurs.py
+# Benchmark des moteurs d'analyse HTML (SRC/analyse_html.py) sur les pages
+# enregistrées : temps d'analyse et pic mémoire par page, pour les deux usages
+#   - alts  : ALT des images (scraper_logicimmo.extract_ads)
+#   - cartes: champs des cartes d'annonces (3-extract_du_html.py)
+# et vérification que chaque moteur donne le même résultat que le moteur
+# historique (html.parser pour les ALT, lxml pour les cartes). Les cartes sont
+# lues dans le DOM (structurees=False) : sinon les données JSON embarquées,
+# identiques pour tous, masqueraient les écarts entre moteurs.
+# Code de sortie 1 si un moteur diffère de la référence.
+#
+# Chaque moteur tourne dans son propre processus pour que le pic de mémoire
+# du processus (RSS) ne soit pas faussé par les autres.
+#
+# Usage :
+#   python SRC/bench_parseurs.py
+#   python SRC/bench_parseurs.py --usage cartes --moteurs selectolax strainer lxml
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows : pas de RSS max, seulement tracemalloc
+    resource = None
+
+from analyse_html import alts_images, cartes_annonces, moteurs_disponibles
+from snapshots import MagasinSnapshots
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SNAPSHOTS_DIR = BASE_DIR / "DATA" / "snapshots"
+STOCK_HTML_DIR = BASE_DIR / "DATA" / "stock_html"
+
+
+def cartes_dom(html: str, moteur=None) -> list:
+    return cartes_annonces(html, moteur, structurees=False)
+
+
+USAGES = {"alts": alts_images, "cartes": cartes_dom}
+REFERENCES = {"alts": "html.parser", "cartes": "lxml"}
+
+
+def charger_pages(limite=None) -> list:
+    """Pages du magasin de snapshots et de DATA/stock_html ; à défaut, pages du serveur de rejeu."""
+    pages = []
+    if (SNAPSHOTS_DIR / "index.csv").exists():
+        pages += [snap.html() for snap in MagasinSnapshots(SNAPSHOTS_DIR).iterer()]
+    if STOCK_HTML_DIR.exists():
+        for chemin in sorted(STOCK_HTML_DIR.glob("page_logic_immo_*.txt")):
+            pages.append(chemin.read_text(encoding="utf-8"))
+    if not pages:
+        from serveur_rejeu import Corpus
+        corpus = Corpus()
+        print("⚠️ Aucune page enregistrée : pages fabriquées par le serveur de rejeu", file=sys.stderr)
+        pages = [corpus.page(lieu, 1) for lieu in sorted(corpus.code_dep)[:50]]
+    return pages[:limite] if limite else pages
+
+
+def rss_max_mo() -> float | None:
+    if resource is None:
+        return None
+    kilo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kilo / 1024 if sys.platform != "darwin" else kilo / 1024 ** 2
+
+
+def mesurer(moteur: str, usage: str, limite=None, repetitions=3) -> dict:
+    """Mesures d'un moteur (appelé dans le sous-processus)."""
+    analyser = USAGES[usage]
+    pages = charger_pages(limite)
+    rss_depart = rss_max_mo()
+
+    # 1) Temps : meilleur de `repetitions` passages, page par page
+    temps = []
+    for html in pages:
+        meilleur = float("inf")
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            analyser(html, moteur)
+            meilleur = min(meilleur, time.perf_counter() - debut)
+        temps.append(meilleur)
+
+    # 2) Mémoire Python (tracemalloc ne voit pas les allocations internes des moteurs C)
+    pics, empreintes = [], []
+    for html in pages:
+        tracemalloc.start()
+        resultat = analyser(html, moteur)
+        pics.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        empreintes.append(hashlib.sha1(json.dumps(resultat, ensure_ascii=False).encode()).hexdigest())
+
+    rss_fin = rss_max_mo()
+    return {
+        "moteur": moteur,
+        "pages": len(pages),
+        "octets": sum(len(p.encode("utf-8")) for p in pages),
+        "ms_moyen": 1e3 * sum(temps) / len(temps) if temps else 0.0,
+        "ms_max": 1e3 * max(temps, default=0.0),
+        "pic_python_ko": sum(pics) / len(pics) / 1e3 if pics else 0.0,
+        "pic_rss_mo": (rss_fin - rss_depart) if rss_fin is not None else None,
+        "empreintes": empreintes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'analyse HTML.")
+    parser.add_argument("--usage", choices=list(USAGES), nargs="+", default=list(USAGES))
+    parser.add_argument("--moteurs", nargs="+", default=None, help="défaut : tous ceux installés")
+    parser.add_argument("--limite", type=int, default=None, help="nombre max de pages")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--interne", nargs=2, metavar=("MOTEUR", "USAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interne:
+        moteur, usage = args.interne
+        print(json.dumps(mesurer(moteur, usage, args.limite, args.repetitions)))
+        return 0
+
+    moteurs = args.moteurs or moteurs_disponibles()
+    ecarts = []
+    for usage in args.usage:
+        resultats = {}
+        for moteur in moteurs:
+            commande = [sys.executable, __file__, "--interne", moteur, usage,
+                        "--repetitions", str(args.repetitions)]
+            if args.limite:
+                commande += ["--limite", str(args.limite)]
+            sortie = subprocess.run(commande, capture_output=True, text=True)
+            if sortie.returncode != 0:
+                print(f"❌ {moteur} : {sortie.stderr.strip().splitlines()[-1:]}")
+                continue
+            resultats[moteur] = json.loads(sortie.stdout)
+
+        if not resultats:
+            continue
+        premier = next(iter(resultats.values()))
+        reference = resultats.get(REFERENCES[usage])
+        print(f"\n=== {usage} : {premier['pages']} pages, {premier['octets'] / 1e6:.1f} Mo ===")
+        print(f"{'moteur':12} {'ms/page':>8} {'ms max':>8} {'pic Python (Ko)':>16} {'pic RSS (Mo)':>13}  identique à {REFERENCES[usage]}")
+        for moteur, r in resultats.items():
+            rss = f"{r['pic_rss_mo']:.1f}" if r["pic_rss_mo"] is not None else "n/d"
+            if reference is None:
+                identique = "?"
+            else:
+                differences = sum(a != b for a, b in zip(r["empreintes"], reference["empreintes"]))
+                identique = "oui" if differences == 0 else f"non ({differences} pages)"
+                if differences:
+                    ecarts.append(f"{usage}/{moteur}")
+            print(f"{moteur:12} {r['ms_moyen']:>8.2f} {r['ms_max']:>8.2f} {r['pic_python_ko']:>16.0f} "
+                  f"{rss:>13}  {identique}")
+
+    if ecarts:
+        print(f"\n❌ Résultats différents de la référence : {', '.join(ecarts)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# SRC/blocage.py
+# Profils de blocage des requêtes pour les captures Playwright.
+# On ne garde que le DOM (page.content()) et les attributs des balises
+# (img[alt]…) : inutile de télécharger images, polices, vidéos ou traqueurs.
+# Bloquer une image n'enlève pas la balise <img> ni son alt du DOM.
+
+import os
+from urllib.parse import urlparse
+
+# nom -> (types de ressources bloqués, bloquer les scripts/requêtes tiers ?)
+PROFILS = {
+    "aucun": (set(), False),
+    "leger": ({"image", "media", "font"}, False),
+    "strict": ({"image", "media", "font", "beacon", "ping"}, True),
+}
+
+# Domaines tiers à laisser passer même en profil strict : anti-bot (sinon
+# captcha assuré) et bandeau cookies (nécessaire à 1-recup_url).
+DOMAINES_AUTORISES = ("logic-immo.com", "datadome.co", "captcha-delivery.com", "usercentrics.eu")
+
+# Site visé par les scrapers (serveur de rejeu local possible) : toujours
+# premier parti, comme l'hôte de chaque page chargée (voir ProfilBlocage).
+BASE_URL = os.environ.get("LOGICIMMO_BASE_URL", "https://www.logic-immo.com").rstrip("/")
+
+# Taille moyenne d'une ressource bloquée (octets) : une requête avortée n'a
+# pas de taille connue, l'économie est donc une estimation.
+TAILLES_ESTIMEES = {
+    "image": 60_000,
+    "media": 400_000,
+    "font": 40_000,
+    "script": 80_000,
+    "stylesheet": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+TAILLE_PAR_DEFAUT = 10_000
+
+
+def hote(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def est_autorise(url: str, premiers=()) -> bool:
+    """Domaine autorisé, ou hôte d'une page (`premiers`) : jamais tiers."""
+    h = hote(url)
+    return h in premiers or any(h == d or h.endswith("." + d) for d in DOMAINES_AUTORISES)
+
+
+class StatsPage:
+    """Compteurs d'une page, remis à zéro à chaque navigation."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bloquees = {}        # type de ressource -> nombre
+        self.octets_charges = 0   # d'après content-length des réponses reçues
+
+    @property
+    def octets_economises(self) -> int:
+        return sum(TAILLES_ESTIMEES.get(t, TAILLE_PAR_DEFAUT) * n for t, n in self.bloquees.items())
+
+    def rapport(self) -> str:
+        nb = sum(self.bloquees.values())
+        return (f"🚫 {nb} requêtes bloquées, ~{self.octets_economises / 1e3:.0f} Ko économisés, "
+                f"{self.octets_charges / 1e3:.0f} Ko chargés")
+
+
+class ProfilBlocage:
+    """
+    Usage (sync)  : stats = ProfilBlocage("leger").installer(page)
+    Usage (async) : stats = await ProfilBlocage("leger").installer_async(page)
+    puis stats.reset() avant chaque goto et stats.rapport() après.
+    """
+
+    def __init__(self, nom="leger"):
+        if nom not in PROFILS:
+            raise ValueError(f"Profil de blocage inconnu : {nom} (choix : {', '.join(PROFILS)})")
+        self.nom = nom
+        self.types_bloques, self.bloquer_tiers = PROFILS[nom]
+        # Hôtes premier parti : celui de BASE_URL, puis ceux des pages chargées
+        self.premiers = {hote(BASE_URL)}
+
+    def doit_bloquer(self, request) -> bool:
+        if request.resource_type == "document" and request.is_navigation_request() \
+                and request.frame.parent_frame is None:
+            # navigation de la page elle-même : son hôte devient premier parti
+            self.premiers.add(hote(request.url))
+            return False
+        if request.resource_type in self.types_bloques:
+            return True
+        return self.bloquer_tiers and not est_autorise(request.url, self.premiers)
+
+    def _compter_reponse(self, stats):
+        def on_response(response):
+            taille = response.headers.get("content-length")
+            if taille and taille.isdigit():
+                stats.octets_charges += int(taille)
+        return on_response
+
+    def _noter_blocage(self, stats, request):
+        t = request.resource_type
+        stats.bloquees[t] = stats.bloquees.get(t, 0) + 1
+
+    def installer(self, page) -> StatsPage:
+        stats = StatsPage()
+        page.on("response", self._compter_reponse(stats))
+        if not self.types_bloques and not self.bloquer_tiers:
+            return stats
+
+        def route(r):
+            if self.doit_bloquer(r.request):
+                self._noter_blocage(stats, r.request)
+                r.abort()
+            else:
+                r.continue_()
+
+        page.route("**/*", route)
+        return stats
+
+    async def installer_async(self, page) -> StatsPage:
+        stats = StatsPage()
+        page.on("response", self._compter_reponse(stats))
+        if not self.types_bloques and not self.bloquer_tiers:
+            return stats
+
+        async def route(r):
+            if self.doit_bloquer(r.request):
+                self._noter_blocage(stats, r.request)
+                await r.abort()
+            else:
+                await r.continue_()
+
+        await page.route("**/*", route)
+        return stats
@@ -0,0 +1,78 @@
+# SRC/client_http.py
+# Client HTTP "sans navigateur" pour les pages classified-search.
+# Une seule connexion keep-alive réutilisée (pool), HTTP/2 si le paquet `h2`
+# est installé, et compression gzip / brotli négociée avec le serveur.
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIBLE = True
+except ImportError:
+    HTTP2_DISPONIBLE = False
+
+try:
+    import brotli  # noqa: F401  (httpx décode "br" si ce paquet est présent)
+    ENCODAGES = "gzip, deflate, br"
+except ImportError:
+    ENCODAGES = "gzip, deflate"
+
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) "
+              "Gecko/20100101 Firefox/128.0")
+
+# Marqueur présent sur chaque carte d'annonce (data-testid="...classified-card...")
+MARQUEUR_ANNONCES = "classified-card"
+
+
+def has_listing_cards(html: str | None) -> bool:
+    """True si le HTML contient au moins une carte d'annonce."""
+    return bool(html) and MARQUEUR_ANNONCES in html
+
+
+class ClientHTTP:
+    """
+    Client partagé entre les workers (httpx.Client est thread-safe).
+    `octets_recus` compte les octets réellement transférés (compressés).
+    """
+
+    def __init__(self, max_connexions: int = 10, timeout: float = 20.0):
+        self._client = httpx.Client(
+            http2=HTTP2_DISPONIBLE,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "fr-FR,fr;q=0.9",
+                "Accept-Encoding": ENCODAGES,
+            },
+            limits=httpx.Limits(
+                max_connections=max_connexions,
+                max_keepalive_connections=max_connexions,
+            ),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self.octets_recus = 0
+
+    def get_html(self, url: str) -> str | None:
+        """Renvoie le HTML de `url`, ou None si la requête échoue (réseau, 4xx/5xx)."""
+        try:
+            r = self._client.get(url)
+        except httpx.HTTPError as exc:
+            print(f"      ⚠️ HTTP : échec sur {url} ({exc})")
+            return None
+
+        self.octets_recus += r.num_bytes_downloaded
+        if r.status_code != 200:
+            print(f"      ⚠️ HTTP {r.status_code} sur {url}")
+            return None
+        return r.text
+
+    def close(self):
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
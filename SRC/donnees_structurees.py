@@ -0,0 +1,261 @@
+# SRC/donnees_structurees.py
+# Voie rapide pour les cartes d'annonces : lire les données structurées que
+# la page embarque déjà (<script type="application/ld+json">, <script
+# type="application/json"> comme __NEXT_DATA__) au lieu de parcourir le DOM.
+#
+# - pas d'arbre HTML : une expression régulière isole les blocs <script>,
+#   un parseur JSON (orjson s'il est installé) les décode ;
+# - pas de dépendance aux classes CSS générées (css-1e55dlz, css-9u48bm…) ;
+# - l'agence vient du champ vendeur, pas d'une devinette sur les ALT d'images.
+#
+# Les champs sont remis au format des textes du DOM ("499 000 €", "65,5",
+# "Quartier, Ville (31000)") pour que 4-formatage_annonces.py n'y voie
+# aucune différence. Sans bloc exploitable, cartes_structurees() renvoie
+# None et analyse_html retombe sur les sélecteurs du DOM.
+#
+# Une page embarque aussi d'autres objets qui ont un prix et une surface
+# (annonces sponsorisées ou « similaires », historique de prix, mesure
+# d'audience) : un bloc n'est retenu que s'il a autant d'annonces que la page
+# a de cartes dans le DOM, ou, si le DOM n'en a aucune (page rendue côté
+# client), que si toutes ses annonces portent un type schema.org reconnu.
+
+import re
+import logging
+import html as html_lib
+
+try:
+    import orjson
+
+    def charger_json(texte: str):
+        return orjson.loads(texte)
+except ImportError:
+    import json
+
+    def charger_json(texte: str):
+        return json.loads(texte)
+
+RE_SCRIPT_JSON = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']application/(?:ld\+)?json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Types schema.org -> libellé affiché sur les cartes
+TYPES_SCHEMA = {
+    "apartment": "Appartement",
+    "house": "Maison",
+    "singlefamilyresidence": "Maison",
+    "residence": "Résidence",
+    "accommodation": "Bien",
+}
+
+# Types schema.org d'une annonce (ou de l'offre qui la porte)
+TYPES_RECONNUS = set(TYPES_SCHEMA) | {"offer"}
+
+log = logging.getLogger(__name__)
+
+# Noms de clés rencontrés selon la source (schema.org, JSON applicatif, français)
+CLES_TYPE = ("propertyType", "estateType", "realEstateType", "typeBien", "type_bien")
+CLES_PRIX = ("price", "prix", "priceValue", "amount")
+CLES_SURFACE = ("floorSize", "livingArea", "livingSpace", "surface", "area", "space")
+CLES_PIECES = ("numberOfRooms", "rooms", "nbRooms", "roomsQuantity", "pieces")
+CLES_CHAMBRES = ("numberOfBedrooms", "bedrooms", "nbBedrooms", "bedroomsQuantity", "chambres")
+CLES_ETAGE = ("floorLevel", "floor", "etage")
+CLES_AGENCE = ("offeredBy", "seller", "provider", "agency", "brand", "agence")
+CLES_CP = ("postalCode", "zipCode", "zipcode", "codePostal")
+CLES_VILLE = ("addressLocality", "city", "ville")
+CLES_QUARTIER = ("district", "neighborhood", "quartier", "streetAddress")
+
+
+def blocs_json(html: str) -> list:
+    """Contenu décodé de chaque <script> JSON de la page (les blocs invalides sont ignorés)."""
+    if "application/json" not in html and "application/ld+json" not in html:
+        return []
+    blocs = []
+    for texte in RE_SCRIPT_JSON.findall(html):
+        texte = texte.strip()
+        if texte.startswith("<!--"):
+            texte = texte[4:].rsplit("-->", 1)[0]
+        try:
+            blocs.append(charger_json(texte))
+        except ValueError:
+            continue
+    return blocs
+
+
+# ============================================================
+# 🔎 Repérage des annonces dans un bloc
+# ============================================================
+
+def _premiere(d: dict, cles):
+    for cle in cles:
+        valeur = d.get(cle)
+        if valeur not in (None, "", [], {}):
+            return valeur
+    return None
+
+
+def _nombre(valeur):
+    """12, "12", "65,5", {"value": 65} (QuantitativeValue) -> nombre, sinon None."""
+    if isinstance(valeur, dict):
+        valeur = _premiere(valeur, ("value", "valeur", "amount", "min"))
+    if isinstance(valeur, bool):
+        return None
+    if isinstance(valeur, (int, float)):
+        return valeur
+    if isinstance(valeur, str):
+        texte = re.sub(r"[\s€]", "", valeur).replace(",", ".")
+        try:
+            return float(texte)
+        except ValueError:
+            return None
+    return None
+
+
+def _prix(d: dict):
+    prix = _nombre(_premiere(d, CLES_PRIX))
+    if prix is None:
+        offres = d.get("offers")
+        if isinstance(offres, list) and offres:
+            offres = offres[0]
+        if isinstance(offres, dict):
+            prix = _nombre(_premiere(offres, CLES_PRIX))
+    return prix
+
+
+def _a_plat(d: dict) -> dict:
+    """Offer schema.org : les caractéristiques sont dans itemOffered."""
+    bien = d.get("itemOffered")
+    if isinstance(bien, dict):
+        types = [t for x in (bien.get("@type"), d.get("@type"))
+                 for t in (x if isinstance(x, list) else [x]) if t]
+        return {**bien, **d, "@type": types}
+    return d
+
+
+def est_annonce(d: dict) -> bool:
+    """Un prix et au moins une surface ou un nombre de pièces."""
+    d = _a_plat(d)
+    return _prix(d) is not None and (
+        _nombre(_premiere(d, CLES_SURFACE)) is not None or _nombre(_premiere(d, CLES_PIECES)) is not None
+    )
+
+
+def schema_reconnu(d: dict) -> bool:
+    """L'annonce (à plat) porte un @type schema.org d'annonce immobilière."""
+    types = d.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.lower() in TYPES_RECONNUS for t in types)
+
+
+def annonces_du_bloc(bloc) -> list:
+    """Objets annonces d'un bloc JSON, dans l'ordre du document (on ne descend pas dans une annonce)."""
+    trouvees = []
+    pile = [bloc]
+    while pile:
+        noeud = pile.pop()
+        if isinstance(noeud, dict):
+            if est_annonce(noeud):
+                trouvees.append(_a_plat(noeud))
+                continue
+            pile.extend(reversed(list(noeud.values())))
+        elif isinstance(noeud, list):
+            pile.extend(reversed(noeud))
+    return trouvees
+
+
+# ============================================================
+# 🃏 Annonce JSON -> champs d'une carte
+# ============================================================
+
+def _texte_nombre(n) -> str | None:
+    """65.5 -> "65,5", 60.0 -> "60" (comme sur les cartes)."""
+    if n is None:
+        return None
+    if float(n).is_integer():
+        return str(int(n))
+    return f"{n:g}".replace(".", ",")
+
+
+def _texte_prix(n) -> str | None:
+    if n is None:
+        return None
+    return f"{round(n):,}".replace(",", "\u202f") + "\xa0€"
+
+
+def _type_bien(d: dict) -> str | None:
+    libelle = _premiere(d, CLES_TYPE)
+    if not isinstance(libelle, str):
+        types = d.get("@type")
+        types = types if isinstance(types, list) else [types]
+        libelle = next((TYPES_SCHEMA[t.lower()] for t in types
+                        if isinstance(t, str) and t.lower() in TYPES_SCHEMA), None)
+    if not libelle:
+        return None
+    libelle = libelle.strip()
+    if "vendre" not in libelle:
+        libelle = f"{libelle[:1].upper()}{libelle[1:]} à vendre"
+    return libelle
+
+
+def _adresse(d: dict) -> str | None:
+    adresse = d.get("address") or d.get("adresse") or d.get("location")
+    if isinstance(adresse, str):
+        return adresse.strip() or None
+    source = adresse if isinstance(adresse, dict) else d
+    cp = _premiere(source, CLES_CP)
+    morceaux = [str(m).strip() for m in (_premiere(source, CLES_QUARTIER), _premiere(source, CLES_VILLE))
+                if isinstance(m, (str, int))]
+    texte = ", ".join(m for m in morceaux if m)
+    if cp:
+        texte = f"{texte} ({cp})" if texte else f"({cp})"
+    return texte or None
+
+
+def _agence(d: dict) -> str | None:
+    agence = _premiere(d, CLES_AGENCE)
+    if isinstance(agence, list) and agence:
+        agence = agence[0]
+    if isinstance(agence, dict):
+        agence = _premiere(agence, ("name", "nom", "legalName"))
+    return agence.strip() if isinstance(agence, str) and agence.strip() else None
+
+
+def _texte(valeur) -> str | None:
+    if isinstance(valeur, str):
+        valeur = " ".join(html_lib.unescape(valeur).split())
+        return valeur or None
+    if isinstance(valeur, (int, float)) and not isinstance(valeur, bool):
+        return str(valeur)
+    return None
+
+
+def carte(d: dict) -> dict:
+    return {
+        "type_bien": _type_bien(d),
+        "prix": _texte_prix(_prix(d)),
+        "pieces": _texte_nombre(_nombre(_premiere(d, CLES_PIECES))),
+        "chambres": _texte_nombre(_nombre(_premiere(d, CLES_CHAMBRES))),
+        "surface": _texte_nombre(_nombre(_premiere(d, CLES_SURFACE))),
+        "etage": _texte(_premiere(d, CLES_ETAGE)),
+        "adresse": _adresse(d),
+        "description": _texte(d.get("description")),
+        "agence": _agence(d),
+    }
+
+
+def cartes_structurees(html: str, nb_cartes_dom: int) -> list | None:
+    """
+    Cartes tirées des données embarquées, ou None si aucun bloc ne correspond
+    aux `nb_cartes_dom` cartes de la page (voir en tête de module). Une même
+    liste est souvent publiée deux fois (JSON-LD et état de l'application) :
+    parmi les blocs qui conviennent, on garde le plus grand.
+    """
+    candidats = sorted((a for a in map(annonces_du_bloc, blocs_json(html)) if a), key=len, reverse=True)
+    for annonces in candidats:
+        if len(annonces) == nb_cartes_dom or (
+                nb_cartes_dom == 0 and all(schema_reconnu(d) for d in annonces)):
+            return [carte(d) for d in annonces]
+    if candidats:
+        log.warning("données structurées ignorées : %s annonce(s) JSON pour %d carte(s) dans le DOM, "
+                    "lecture du DOM", "/".join(str(len(a)) for a in candidats), nb_cartes_dom)
+    return None
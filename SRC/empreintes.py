@@ -0,0 +1,81 @@
+# SRC/empreintes.py
+# Recrawl incrémental : on garde, pour chaque (lieu, page), l'empreinte de
+# l'ensemble des annonces affichées, et pour chaque lieu les annonces déjà vues.
+# Avec order=DateDesc, dès qu'une page est identique au dernier passage (ou ne
+# contient que des annonces connues), les pages suivantes le sont aussi :
+# on arrête la pagination du lieu.
+
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+NOUVELLE = "nouvelle"     # au moins une annonce jamais vue
+INCHANGEE = "inchangee"   # même ensemble d'annonces qu'au passage précédent
+DEJA_VUES = "deja_vues"   # ensemble différent, mais rien de nouveau
+
+RE_ALT_ANNONCE = re.compile(r'alt="([^"]*€[^"]*)"')
+
+
+def _h(texte: str, n=16) -> str:
+    return hashlib.sha1(texte.encode("utf-8")).hexdigest()[:n]
+
+
+def cle_annonce(ad: dict) -> str:
+    """Clé courte d'une annonce parsée (prix, surface, pièces, adresse, sous-type)."""
+    champs = [ad.get(c) or "" for c in ("prix", "surface", "pieces", "adresse", "sous_type")]
+    return _h("|".join(re.sub(r"\s+", "", str(c)) for c in champs))
+
+
+def cles_depuis_html(html: str) -> list:
+    """Clés des annonces d'une page brute : une par ALT d'image contenant un prix."""
+    return [_h(" ".join(alt.split())) for alt in RE_ALT_ANNONCE.findall(html)]
+
+
+class EmpreintesPages:
+
+    def __init__(self, chemin):
+        self.chemin = Path(chemin)
+        self._verrou = threading.Lock()
+        if self.chemin.exists():
+            with open(self.chemin, encoding="utf-8") as f:
+                donnees = json.load(f)
+        else:
+            donnees = {}
+        self._pages = donnees.get("pages", {})                            # lieu -> {page: empreinte}
+        self._vues = {k: set(v) for k, v in donnees.get("vues", {}).items()}  # lieu -> {clé}
+
+    def comparer(self, lieu: str, page: int, cles: list):
+        """
+        Compare une page au passage précédent et la mémorise.
+        Renvoie (verdict, clés nouvelles).
+        """
+        empreinte = _h("\n".join(sorted(set(cles))), 40)
+        with self._verrou:
+            pages = self._pages.setdefault(lieu, {})
+            vues = self._vues.setdefault(lieu, set())
+
+            nouvelles = [c for c in cles if c not in vues]
+            if pages.get(str(page)) == empreinte:
+                verdict = INCHANGEE
+            elif cles and not nouvelles:
+                verdict = DEJA_VUES
+            else:
+                verdict = NOUVELLE
+
+            pages[str(page)] = empreinte
+            vues.update(cles)
+        return verdict, nouvelles
+
+    def sauver(self):
+        with self._verrou:
+            donnees = {
+                "pages": self._pages,
+                "vues": {k: sorted(v) for k, v in self._vues.items()},
+            }
+            tmp = self.chemin.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(donnees, f)
+            os.replace(tmp, self.chemin)
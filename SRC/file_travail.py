@@ -0,0 +1,261 @@
+# SRC/file_travail.py
+# File de travail partagée dans un fichier SQLite, pour que plusieurs
+# processus (ou machines qui partagent le fichier) vident la même liste de
+# tâches sans se marcher dessus.
+#
+# Une tâche est "louée" (bail) pour `duree_bail` secondes. Si le worker meurt
+# sans la terminer, le bail expire et la tâche redevient disponible.
+# Un échec est retenté avec un délai croissant ; après `max_essais` échecs
+# la tâche passe en lettre morte ("morte") pour inspection manuelle.
+#
+# Usage :
+#   python SRC/file_travail.py remplir-departements DATA/departements.csv
+#   python SRC/file_travail.py remplir-villes DATA/2-liste_url.csv
+#   python SRC/file_travail.py etat
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+FILE_PATH = BASE_DIR / "DATA" / "file_travail.sqlite"
+
+# Types de tâches
+DEPARTEMENT = "departement"   # payload : {"nom": …, "url": …}
+VILLE = "ville"               # payload : {"code_postal": …, "url": …}
+
+# États
+EN_ATTENTE = "en_attente"
+LOUEE = "louee"
+FAITE = "faite"
+MORTE = "morte"
+
+# Attente maximale (s) entre deux sondages quand rien n'est louable tout de suite
+ATTENTE_SONDAGE = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS taches (
+    id           INTEGER PRIMARY KEY,
+    type         TEXT NOT NULL,
+    cle          TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    etat         TEXT NOT NULL DEFAULT 'en_attente',
+    essais       INTEGER NOT NULL DEFAULT 0,
+    dispo_a      REAL NOT NULL DEFAULT 0,
+    bail_jusqua  REAL,
+    worker       TEXT,
+    erreur       TEXT,
+    maj          REAL NOT NULL,
+    UNIQUE (type, cle)
+);
+CREATE INDEX IF NOT EXISTS taches_dispo ON taches (type, etat, dispo_a);
+"""
+
+
+def identifiant_worker() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class FileTravail:
+    """
+    - duree_bail : secondes avant qu'une tâche louée non terminée soit relouable
+    - max_essais : échecs avant la lettre morte
+    - delai_base : délai (s) avant le 1er nouvel essai, doublé à chaque échec
+    - check_same_thread : comme sqlite3.connect ; False pour une connexion
+      utilisée depuis plusieurs threads (l'appelant sérialise alors les appels)
+    """
+
+    def __init__(self, chemin=FILE_PATH, duree_bail=600, max_essais=5, delai_base=30,
+                 check_same_thread=True):
+        self.chemin = str(chemin)
+        self.duree_bail = duree_bail
+        self.max_essais = max_essais
+        self.delai_base = delai_base
+        self.worker = identifiant_worker()
+        Path(self.chemin).parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None : on gère les transactions nous-mêmes (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(self.chemin, timeout=60, isolation_level=None,
+                                   check_same_thread=check_same_thread)
+        self._db.execute("PRAGMA busy_timeout = 60000")
+        self._db.executescript(SCHEMA)
+
+    # ---- remplissage ----
+
+    def ajouter(self, type_tache: str, cle: str, payload: dict) -> bool:
+        """Ajoute une tâche (ignorée si la même (type, clé) existe déjà)."""
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO taches (type, cle, payload, maj) VALUES (?, ?, ?, ?)",
+            (type_tache, cle, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        return cur.rowcount == 1
+
+    # ---- consommation ----
+
+    def louer(self, type_tache: str):
+        """
+        Prend la prochaine tâche disponible (en attente et plus en délai, ou
+        dont le bail a expiré). Renvoie (id, cle, payload) ou None si rien à faire.
+        """
+        maintenant = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                """
+                SELECT id, cle, payload FROM taches
+                WHERE type = ?
+                  AND ((etat = ? AND dispo_a <= ?) OR (etat = ? AND bail_jusqua < ?))
+                ORDER BY id LIMIT 1
+                """,
+                (type_tache, EN_ATTENTE, maintenant, LOUEE, maintenant),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+            self._db.execute(
+                "UPDATE taches SET etat = ?, bail_jusqua = ?, worker = ?, maj = ? WHERE id = ?",
+                (LOUEE, maintenant + self.duree_bail, self.worker, maintenant, row[0]),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return row[0], row[1], json.loads(row[2])
+
+    def prolonger(self, id_tache: int):
+        """À appeler pendant une longue tâche pour ne pas perdre le bail."""
+        self._db.execute(
+            "UPDATE taches SET bail_jusqua = ? WHERE id = ? AND worker = ? AND etat = ?",
+            (time.time() + self.duree_bail, id_tache, self.worker, LOUEE),
+        )
+
+    def terminer(self, id_tache: int):
+        self._db.execute(
+            "UPDATE taches SET etat = ?, bail_jusqua = NULL, erreur = NULL, maj = ? WHERE id = ? AND worker = ?",
+            (FAITE, time.time(), id_tache, self.worker),
+        )
+
+    def echouer(self, id_tache: int, erreur: str):
+        """Échec : nouvel essai plus tard (délai exponentiel) ou lettre morte."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT essais FROM taches WHERE id = ?", (id_tache,)).fetchone()
+            essais = (row[0] if row else 0) + 1
+            if essais >= self.max_essais:
+                etat, dispo_a = MORTE, 0
+            else:
+                etat, dispo_a = EN_ATTENTE, time.time() + self.delai_base * 2 ** (essais - 1)
+            self._db.execute(
+                """
+                UPDATE taches SET etat = ?, essais = ?, dispo_a = ?, bail_jusqua = NULL,
+                                  erreur = ?, maj = ?
+                WHERE id = ? AND worker = ?
+                """,
+                (etat, essais, dispo_a, str(erreur)[:500], time.time(), id_tache, self.worker),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def prochaine_echeance(self, type_tache: str):
+        """
+        Instant où une tâche pourra de nouveau être louée : fin de délai d'une
+        tâche en attente, ou fin de bail d'une tâche louée (worker mort ?).
+        None si toutes les tâches sont faites ou mortes.
+        """
+        row = self._db.execute(
+            """
+            SELECT MIN(CASE WHEN etat = ? THEN dispo_a ELSE bail_jusqua END) FROM taches
+            WHERE type = ? AND etat IN (?, ?)
+            """,
+            (EN_ATTENTE, type_tache, EN_ATTENTE, LOUEE),
+        ).fetchone()
+        return row[0]
+
+    def taches(self, type_tache: str, attente_max=ATTENTE_SONDAGE):
+        """
+        Itère sur les tâches d'un type jusqu'à ce qu'il ne reste que des tâches
+        faites ou mortes :
+            for id_tache, cle, payload in file.taches(DEPARTEMENT): …
+        Tant qu'une tâche attend son nouvel essai ou est louée par un autre
+        worker (qui peut mourir), on attend en resondant la file toutes les
+        `attente_max` secondes au plus.
+        Le worker doit appeler terminer() ou echouer() pour chaque tâche.
+        """
+        while True:
+            tache = self.louer(type_tache)
+            if tache is not None:
+                yield tache
+                continue
+            echeance = self.prochaine_echeance(type_tache)
+            if echeance is None:
+                return
+            time.sleep(min(attente_max, max(echeance - time.time(), 0.1)))
+
+    # ---- suivi ----
+
+    def etat(self) -> dict:
+        """{(type, état): nombre de tâches}"""
+        rows = self._db.execute("SELECT type, etat, COUNT(*) FROM taches GROUP BY type, etat")
+        return {(t, e): n for t, e, n in rows}
+
+    def relancer_mortes(self, type_tache: str) -> int:
+        cur = self._db.execute(
+            "UPDATE taches SET etat = ?, essais = 0, dispo_a = 0, maj = ? WHERE type = ? AND etat = ?",
+            (EN_ATTENTE, time.time(), type_tache, MORTE),
+        )
+        return cur.rowcount
+
+    def close(self):
+        self._db.close()
+
+
+# ============================================================
+# 🛠️ Ligne de commande
+# ============================================================
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="File de travail SQLite partagée par les crawlers.")
+    parser.add_argument("--file", default=str(FILE_PATH), help="chemin du fichier SQLite")
+    sub = parser.add_subparsers(dest="commande", required=True)
+    p_dep = sub.add_parser("remplir-departements", help="une tâche par ligne de departements.csv")
+    p_dep.add_argument("csv", nargs="?", default=str(BASE_DIR / "DATA" / "departements.csv"))
+    p_vil = sub.add_parser("remplir-villes", help="une tâche par URL de 2-liste_url.csv")
+    p_vil.add_argument("csv", nargs="?", default=str(BASE_DIR / "DATA" / "2-liste_url.csv"))
+    sub.add_parser("etat", help="nombre de tâches par type et par état")
+    p_rel = sub.add_parser("relancer-mortes", help="remet en attente les tâches en lettre morte")
+    p_rel.add_argument("type", choices=[DEPARTEMENT, VILLE])
+    args = parser.parse_args()
+
+    file = FileTravail(args.file)
+
+    if args.commande == "remplir-departements":
+        df = pd.read_csv(args.csv)
+        n = sum(file.ajouter(DEPARTEMENT, row["url"], {"nom": row["nom"], "url": row["url"]})
+                for _, row in df.iterrows())
+        print(f"{n} tâches département ajoutées")
+    elif args.commande == "remplir-villes":
+        df = pd.read_csv(args.csv, dtype=str)
+        df = df[df.iloc[:, 1].str.startswith("http", na=False)]
+        n = sum(file.ajouter(VILLE, row.iloc[1], {"code_postal": row.iloc[0], "url": row.iloc[1]})
+                for _, row in df.iterrows())
+        print(f"{n} tâches ville ajoutées")
+    elif args.commande == "relancer-mortes":
+        print(f"{file.relancer_mortes(args.type)} tâches relancées")
+    else:
+        for (t, e), n in sorted(file.etat().items()):
+            print(f"{t:12} {e:12} {n}")
+
+    file.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
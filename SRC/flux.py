@@ -0,0 +1,147 @@
+# SRC/flux.py
+# Outils du mode flux : traiter un gros CSV morceau par morceau
+# (pd.read_csv(chunksize=…)) avec une mémoire bornée, quel que soit le
+# nombre de lignes.
+#
+#   EnsembleCles  clés int64 déjà vues (dédoublonnage) : 8 octets par clé,
+#                 contre ~70 pour un set Python d'entiers
+#   TriParSeaux   tri final (ex. par département) sans tout garder en mémoire :
+#                 les morceaux sont rangés sur disque par valeur de la première
+#                 colonne du tri, puis chaque seau est trié seul
+#   ecrire_csv    ajout d'un morceau à un CSV (en-tête au premier morceau)
+#
+# Vérification (EnsembleCles contre un set Python, morceaux tout en doublons compris) :
+#   python SRC/flux.py
+
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TAILLE_MORCEAU = 200_000
+
+
+class EnsembleCles:
+    """
+    Ensemble de clés int64, rangées dans des tableaux numpy triés de tailles
+    croissantes (fusionnés deux à deux comme un compteur binaire) :
+    ajout en O(log n) amorti, appartenance par dichotomie dans chaque niveau.
+    """
+
+    def __init__(self):
+        self._niveaux = []
+
+    def __len__(self):
+        return sum(len(n) for n in self._niveaux)
+
+    def contient(self, cles) -> np.ndarray:
+        cles = np.asarray(cles, dtype=np.int64)
+        vues = np.zeros(len(cles), dtype=bool)
+        for niveau in self._niveaux:
+            pos = np.searchsorted(niveau, cles)
+            pos[pos == len(niveau)] = 0
+            vues |= niveau[pos] == cles
+        return vues
+
+    def ajouter(self, cles):
+        nouveau = np.unique(np.asarray(cles, dtype=np.int64))
+        if len(nouveau) == 0:
+            return   # un niveau vide casserait contient()
+        while self._niveaux and len(self._niveaux[-1]) <= len(nouveau):
+            nouveau = np.union1d(self._niveaux.pop(), nouveau)
+        self._niveaux.append(nouveau)
+
+    def nouvelles(self, cles: pd.Series) -> pd.Series:
+        """
+        Masque des lignes à garder : première apparition de leur clé, dans le
+        morceau comme dans tout ce qui précède. Les clés gardées sont ajoutées.
+        """
+        valeurs = cles.to_numpy(dtype=np.int64)
+        garder = ~cles.duplicated().to_numpy() & ~self.contient(valeurs)
+        self.ajouter(valeurs[garder])
+        return pd.Series(garder, index=cles.index)
+
+
+class TriParSeaux:
+    """
+    Équivalent de df.sort_values(par, ascending=...) pour des données qui
+    arrivent par morceaux. Chaque morceau est découpé selon la première colonne
+    du tri et rangé en pickle (types conservés) dans un dossier temporaire ;
+    trier() rend ensuite les seaux dans l'ordre de cette colonne (NaN en
+    dernier), chacun trié par toutes les colonnes. Le tri étant stable, les
+    égalités gardent l'ordre d'arrivée, comme dans le tri complet.
+    Mémoire : le plus gros seau (ex. le plus gros département).
+    """
+
+    def __init__(self, par: list, ascending: list, dossier=None):
+        self.par = par
+        self.ascending = ascending
+        self._dossier = Path(tempfile.mkdtemp(prefix="seaux_", dir=dossier))
+        self._seaux = {}   # valeur de tête (None = NaN) -> fichiers du seau
+        self._nb_fichiers = 0
+
+    def ranger(self, df: pd.DataFrame):
+        for valeur, morceau in df.groupby(self.par[0], dropna=False, sort=False):
+            valeur = None if pd.isna(valeur) else valeur
+            chemin = self._dossier / f"{self._nb_fichiers}.pkl"
+            morceau.to_pickle(chemin)
+            self._seaux.setdefault(valeur, []).append(chemin)
+            self._nb_fichiers += 1
+
+    def trier(self):
+        """Morceaux triés, seau par seau, dans l'ordre global du tri."""
+        valeurs = sorted((v for v in self._seaux if v is not None), reverse=not self.ascending[0])
+        if None in self._seaux:
+            valeurs.append(None)
+        for valeur in valeurs:
+            seau = pd.concat([pd.read_pickle(f) for f in self._seaux[valeur]])
+            yield seau.sort_values(by=self.par, ascending=self.ascending, kind="stable")
+
+    def close(self):
+        shutil.rmtree(self._dossier, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def ecrire_csv(df: pd.DataFrame, chemin, premier: bool):
+    """Premier morceau : crée le fichier avec l'en-tête ; les suivants s'ajoutent."""
+    df.to_csv(chemin, mode="w" if premier else "a", header=premier, index=False, encoding="utf-8")
+
+
+# ============================================================
+# ✅ Vérification
+# ============================================================
+
+def verifier(nb_morceaux=200, graine=0) -> int:
+    """
+    Compare EnsembleCles.nouvelles à un set Python sur des morceaux aléatoires,
+    dont des morceaux faits uniquement de clés déjà vues (données re-collectées).
+    Renvoie le nombre de morceaux en désaccord.
+    """
+    rng = np.random.default_rng(graine)
+    cles, vues, ecarts = EnsembleCles(), set(), 0
+    for i in range(nb_morceaux):
+        if i % 3 == 2 and vues:
+            morceau = rng.choice(np.fromiter(vues, dtype=np.int64), size=50)   # tout en doublons
+        else:
+            morceau = rng.integers(0, 5_000, size=50)
+        attendu = []
+        for c in morceau.tolist():
+            attendu.append(c not in vues)
+            vues.add(c)
+        ecarts += cles.nouvelles(pd.Series(morceau)).tolist() != attendu
+    return ecarts + (len(cles) != len(vues))
+
+
+if __name__ == "__main__":
+    ecarts = verifier()
+    print("✅ EnsembleCles conforme" if not ecarts else f"❌ {ecarts} écarts")
+    sys.exit(1 if ecarts else 0)
@@ -1,128 +1,318 @@
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from nettoyage import clean_price_series, clean_surface_series, cle_annonce
+from jeu_donnees import ecrire_jeu, EcrivainJeu
+from index_annonces import IndexAnnonces
+from flux import EnsembleCles, TAILLE_MORCEAU
+from rapprochement import blocs, quasi_doublons
+
+# Façons de lancer la fusion (chemins par défaut : DATA/, d'où qu'on lance) :
+#   python SRC/fusion.py [--csv-1 … --csv-2 … --sortie …]
+#       fusion complète de CSV_1 + CSV_2 -> OUTPUT_CSV (comme toujours)
+#   python SRC/fusion.py --lot DATA/annonce_2026-10-18.csv [--lot …]
+#       fusion incrémentale : chaque lot est nettoyé puis fusionné par clé
+#       stable dans DATA/fusion (SRC/index_annonces.py), en O(taille du lot).
+#       OUTPUT_CSV n'est pas touché : --exporter le réécrit depuis tout le jeu
+#       fusionné (coût proportionnel à l'historique, à faire une fois après les lots)
+#   python SRC/fusion.py --flux [--taille-morceau 200000]
+#       fusion complète en mode flux : CSV_1 puis CSV_2 lus par morceaux,
+#       mémoire bornée quelle que soit la taille des fichiers (SRC/flux.py)
+# En fusion complète (normale ou flux), les annonces de CSV_2 qui sont un
+# quasi-doublon d'une annonce de CSV_1 (même bien, prix / surface / adresse
+# un peu différents) sont retirées : SRC/rapprochement.py (--sans-rapprochement pour l'éviter).
+# En fusion incrémentale, c'est chaque lot qui est rapproché des lots déjà
+# fusionnés : --lot annonce2.csv --lot annonce.csv donne le même jeu que la fusion complète.
+
 # ============================================================
-# 📂 FICHIERS (à adapter)
+# 📂 FICHIERS (à adapter, ou --csv-1 / --csv-2 / --sortie)
 # ============================================================
-CSV_1 = "annonce2.csv"  
-CSV_2 = "annonce.csv"   
-OUTPUT_CSV = "annonceclean.csv"
+DATA_DIR = Path(__file__).resolve().parents[1] / "DATA"
+CSV_1 = DATA_DIR / "annonce2.csv"
+CSV_2 = DATA_DIR / "annonce.csv"
+OUTPUT_CSV = DATA_DIR / "annonceclean.csv"
+
+cols = [
+    "prix", "surface", "pieces", "adresse",
+    "type_bien", "sous_type",
+    "departement_nom", "departement_code"
+]
+
 
 # ============================================================
-# 🧼 Fonctions utilitaires
+# 2) Harmonisation colonnes
 # ============================================================
-def clean_price_series(s: pd.Series) -> pd.Series:
-    """
-    Nettoie une série de prix au format FR (espaces, espaces fines) et convertit en numérique.
-    Renvoie une série float avec NaN si conversion impossible.
-    """
-    s = s.astype(str)
-    # retire espaces fines insécables + espaces classiques
-    s = s.str.replace("\u202f", "", regex=False).str.replace(" ", "", regex=False)
-    return pd.to_numeric(s, errors="coerce")
+def harmoniser(df: pd.DataFrame, nom: str) -> pd.DataFrame:
+    if "sous_type" not in df.columns:
+        # on garde l'info la plus proche possible : sous_type = type_bien
+        df["sous_type"] = df.get("type_bien")
 
+    # On ne garde que les colonnes attendues (si une manque: erreur explicite)
+    missing = [c for c in cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {nom}: {missing}")
+    return df[cols].copy()
 
-def clean_surface_series(s: pd.Series) -> pd.Series:
-    """
-    Nettoie une série de surfaces (virgule -> point) et convertit en numérique.
-    Renvoie une série float avec NaN si conversion impossible.
-    """
-    s = s.astype(str).str.replace(",", ".", regex=False)
-    return pd.to_numeric(s, errors="coerce")
 
+def nettoyer(df: pd.DataFrame, verbeux=True) -> pd.DataFrame:
+    # ============================================================
+    # 4) Suppression des viagers (bouquet) AVANT conversion
+    # ============================================================
+    df["prix"] = df["prix"].astype(str)
+    mask_viager = df["prix"].str.contains("bouquet", case=False, na=False)
+    df = df[~mask_viager].copy()
+    if verbeux:
+        print("Lignes viager détectées (bouquet) :", int(mask_viager.sum()))
+        print("Après suppression viagers :", df.shape)
 
-# ============================================================
-# 1) Chargement
-# ============================================================
-df1 = pd.read_csv(CSV_1)
-df2 = pd.read_csv(CSV_2)
+    # ============================================================
+    # 5) Conversion / nettoyage prix, surface, pièces (SAFE)
+    # ============================================================
+    df["prix"] = clean_price_series(df["prix"])
+    df["surface"] = clean_surface_series(df["surface"])
+    df["pieces"] = pd.to_numeric(df["pieces"], errors="coerce")
 
-print("CSV 1 :", df1.shape)
-print("CSV 2 :", df2.shape)
+    # On enlève les lignes non exploitables pour prix/surface
+    df = df.dropna(subset=["prix", "surface"]).copy()
 
-# ============================================================
-# 2) Harmonisation colonnes
-# ============================================================
-if "sous_type" not in df1.columns:
-    # on garde l'info la plus proche possible : sous_type = type_bien
-    df1["sous_type"] = df1.get("type_bien")
+    # ============================================================
+    # 6) Filtre "validité" (évite valeurs impossibles / erreurs)
+    # ============================================================
+    df = df[
+        (df["prix"] > 20000) &
+        (df["surface"] > 10) &
+        (df["surface"] < 500)
+    ].copy()
 
-# Si df2 n'a pas sous_type (au cas où), on le crée aussi
-if "sous_type" not in df2.columns:
-    df2["sous_type"] = df2.get("type_bien")
+    if verbeux:
+        print("Après filtres validité :", df.shape)
+    return df
 
-cols = [
-    "prix", "surface", "pieces", "adresse",
-    "type_bien", "sous_type",
-    "departement_nom", "departement_code"
-]
 
-# On ne garde que les colonnes attendues (si une manque: erreur explicite)
-missing_1 = [c for c in cols if c not in df1.columns]
-missing_2 = [c for c in cols if c not in df2.columns]
-if missing_1:
-    raise ValueError(f"Colonnes manquantes dans CSV_1: {missing_1}")
-if missing_2:
-    raise ValueError(f"Colonnes manquantes dans CSV_2: {missing_2}")
+def retirer_quasi_doublons(df: pd.DataFrame, source: pd.Series) -> pd.DataFrame:
+    # ============================================================
+    # 7 bis) Quasi-doublons entre les deux sources
+    # ============================================================
+    doublons = quasi_doublons(blocs(df[source == 1]), df[source == 2])
+    print(f"Quasi-doublons entre sources supprimés : {int(doublons.sum())}")
+    return df.drop(index=doublons[doublons].index)
 
-df1 = df1[cols].copy()
-df2 = df2[cols].copy()
 
-# ============================================================
-# 3) Fusion
-# ============================================================
-df = pd.concat([df1, df2], ignore_index=True)
-print("Après fusion :", df.shape)
+def sauvegarder(df: pd.DataFrame, sortie=OUTPUT_CSV):
+    # ============================================================
+    # 9) Sauvegarde
+    # ============================================================
+    # Parquet typé (référence pour la suite) + export csv
+    ecrire_jeu(df, "annonces", Path(sortie).with_suffix(".parquet"), export_csv=sortie)
+    print("\n✅ CSV final créé →", sortie, "(+ .parquet)")
+    print("Taille finale :", df.shape)
 
-# ============================================================
-# 4) Suppression des viagers (bouquet) AVANT conversion
-# ============================================================
-df["prix"] = df["prix"].astype(str)
-mask_viager = df["prix"].str.contains("bouquet", case=False, na=False)
-print("Lignes viager détectées (bouquet) :", int(mask_viager.sum()))
-df = df[~mask_viager].copy()
-print("Après suppression viagers :", df.shape)
 
 # ============================================================
-# 5) Conversion / nettoyage prix, surface, pièces (SAFE)
+# 🧱 Fusion complète
 # ============================================================
-df["prix"] = clean_price_series(df["prix"])
-df["surface"] = clean_surface_series(df["surface"])
-df["pieces"] = pd.to_numeric(df["pieces"], errors="coerce")
+def fusion_complete(csv_1=CSV_1, csv_2=CSV_2, sortie=OUTPUT_CSV, rapprochement=True):
+    # 1) Chargement
+    df1 = pd.read_csv(csv_1)
+    df2 = pd.read_csv(csv_2)
 
-# On enlève les lignes non exploitables pour prix/surface
-df = df.dropna(subset=["prix", "surface"]).copy()
+    print("CSV 1 :", df1.shape)
+    print("CSV 2 :", df2.shape)
 
-# ============================================================
-# 6) Filtre "validité" (évite valeurs impossibles / erreurs)
-# ============================================================
-df = df[
-    (df["prix"] > 20000) &
-    (df["surface"] > 10) &
-    (df["surface"] < 500)
-].copy()
+    df1 = harmoniser(df1, "CSV_1")
+    df2 = harmoniser(df2, "CSV_2")
 
-print("Après filtres validité :", df.shape)
+    # 3) Fusion
+    df = pd.concat([df1, df2], ignore_index=True)
+    source = pd.Series(np.repeat([1, 2], [len(df1), len(df2)]), index=df.index)
+    print("Après fusion :", df.shape)
+
+    df = nettoyer(df)
+
+    # 7) Suppression des doublons
+    avant = len(df)
+    df = df.drop_duplicates()
+    apres = len(df)
+    print(f"Doublons supprimés : {avant - apres}")
+    print("Après déduplication :", df.shape)
+
+    if rapprochement:
+        df = retirer_quasi_doublons(df, source.loc[df.index])
+        print("Après rapprochement :", df.shape)
+
+    # 8) Calcul prix/m² (optionnel mais utile)
+    df["prix_m2"] = df["prix"] / df["surface"]
+
+    # (Optionnel) Filtre métier sur prix/m² — à activer si tu veux
+    # df = df[(df["prix_m2"] > 800) & (df["prix_m2"] < 18000)].copy()
+
+    sauvegarder(df, sortie)
 
-# ============================================================
-# 7) Suppression des doublons
-# ============================================================
-avant = len(df)
-df = df.drop_duplicates()
-apres = len(df)
-print(f"Doublons supprimés : {avant - apres}")
-print("Après déduplication :", df.shape)
 
 # ============================================================
-# 8) Calcul prix/m² (optionnel mais utile)
+# 🌊 Fusion complète en mode flux
 # ============================================================
-df["prix_m2"] = df["prix"] / df["surface"]
+# Types fixés à la lecture : sans eux, read_csv devine le type de chaque
+# morceau séparément (departement_code "01" lu 1, pieces int ou float…)
+TYPES_LECTURE = {"prix": str, "surface": str, "pieces": "float64", "adresse": str,
+                 "type_bien": str, "sous_type": str, "departement_nom": str, "departement_code": str}
+
+
+# Conversion de chaque colonne numérique dans nettoyer()
+CONVERSIONS = {
+    "prix": clean_price_series,
+    "surface": clean_surface_series,
+    "pieces": lambda s: pd.to_numeric(s, errors="coerce"),
+}
+
+
+def types_numeriques(chemins, taille):
+    """
+    Types des colonnes numériques décidés une fois pour tous les fichiers,
+    comme la fusion complète : la conversion de toute la colonne (viagers
+    exclus) donne int64 si toutes les valeurs sont entières, float64 sinon.
+    Premier passage qui ne lit que ces colonnes.
+    """
+    entiers = dict.fromkeys(CONVERSIONS, True)
+    for chemin in chemins:
+        for morceau in pd.read_csv(chemin, usecols=list(CONVERSIONS), dtype=str, chunksize=taille):
+            morceau = morceau[~morceau["prix"].str.contains("bouquet", case=False, na=False)]
+            for colonne, convertir in CONVERSIONS.items():
+                entiers[colonne] &= convertir(morceau[colonne]).dtype.kind in "iu"
+    return {c: "int64" if e else "float64" for c, e in entiers.items()}
+
+
+def morceaux_nettoyes(chemin, nom, taille, types):
+    """
+    Un CSV lu par morceaux de `taille` lignes, chaque morceau harmonisé et
+    nettoyé, colonnes numériques converties aux `types` de types_numeriques().
+    """
+    for morceau in pd.read_csv(chemin, dtype=TYPES_LECTURE, chunksize=taille):
+        df = nettoyer(harmoniser(morceau, nom), verbeux=False)
+        yield df.astype(types)
+
+
+def fusion_flux(taille=TAILLE_MORCEAU, csv_1=CSV_1, csv_2=CSV_2, sortie=OUTPUT_CSV, rapprochement=True):
+    # La mémoire ne dépend que de `taille` et du nombre d'annonces distinctes
+    # (8 octets par clé dans EnsembleCles), jamais de la taille des fichiers.
+    # Doublons : même clé d'annonce (nettoyage.cle_annonce), comme la fusion incrémentale.
+    # Quasi-doublons : les blocs de CSV_1 (quelques colonnes compactes par
+    # annonce) sont gardés pour y chercher chaque morceau de CSV_2.
+    vues = EnsembleCles()
+    reference = []
+    lues = doublons = quasi = 0
+    types = types_numeriques((csv_1, csv_2), taille)
+    with EcrivainJeu("annonces", Path(sortie).with_suffix(".parquet"), export_csv=sortie) as ecrivain:
+        for chemin, nom in ((csv_1, "CSV_1"), (csv_2, "CSV_2")):
+            if nom == "CSV_2" and rapprochement:
+                reference = pd.concat(reference) if reference else blocs(pd.DataFrame(columns=cols))
+            for df in morceaux_nettoyes(chemin, nom, taille, types):
+                if df.empty:
+                    continue
+                lues += len(df)
+                garder = vues.nouvelles(cle_annonce(df))
+                doublons += int((~garder).sum())
+                df = df[garder].copy()
+                if rapprochement and nom == "CSV_1":
+                    reference.append(blocs(df))
+                elif rapprochement:
+                    en_double = quasi_doublons(reference, df)
+                    quasi += int(en_double.sum())
+                    df = df[~en_double].copy()
+                df["prix_m2"] = df["prix"] / df["surface"]
+                ecrivain.ecrire(df)
+            print(f"{nom} lu ({lues} lignes valides jusqu'ici)")
+
+    print(f"Doublons supprimés : {doublons}")
+    if rapprochement:
+        print(f"Quasi-doublons entre sources supprimés : {quasi}")
+    print("\n✅ CSV final créé →", sortie, "(+ .parquet)")
+    print("Taille finale :", (ecrivain.lignes, len(cols) + 1))
 
-# (Optionnel) Filtre métier sur prix/m² — à activer si tu veux
-# df = df[(df["prix_m2"] > 800) & (df["prix_m2"] < 18000)].copy()
 
 # ============================================================
-# 9) Sauvegarde
+# ➕ Fusion incrémentale par lots
 # ============================================================
-df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
-print("\n✅ CSV final créé →", OUTPUT_CSV)
-print("Taille finale :", df.shape)
+def nom_lot(chemin: Path) -> str:
+    """annonce.csv -> "annonce-<hash du contenu>" : le même fichier n'est fusionné qu'une fois."""
+    h = hashlib.sha1()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return f"{chemin.stem}-{h.hexdigest()[:10]}"
+
+
+def fusion_incrementale(chemins, exporter=False, sortie=OUTPUT_CSV, rapprochement=True):
+    index = IndexAnnonces()
+    reference = None
+    try:
+        for chemin in map(Path, chemins):
+            lot = nom_lot(chemin)
+            if index.deja_fusionne(lot):
+                print(f"⏭️ {chemin.name} déjà fusionné ({lot})")
+                continue
+
+            df = harmoniser(pd.read_csv(chemin, dtype={"departement_code": str}), chemin.name)
+            print(f"{chemin.name} :", df.shape)
+            df = nettoyer(df)
+            df["prix_m2"] = df["prix"] / df["surface"]
+            df["cle"] = cle_annonce(df)
+
+            if rapprochement:
+                # blocs des lots déjà fusionnés (quelques colonnes, lus une fois par run)
+                if reference is None:
+                    reference = blocs(index.lire(colonnes=["prix", "surface", "pieces", "adresse", "type_bien"]))
+                # une annonce déjà connue (même clé) reste comptée comme revue
+                inconnues = ~df["cle"].isin(index.cles_connues(df["cle"]))
+                en_double = quasi_doublons(reference, df[inconnues]).reindex(df.index, fill_value=False)
+                print(f"Quasi-doublons des lots précédents supprimés : {int(en_double.sum())}")
+                df = df[~en_double]
+                reference = pd.concat([reference, blocs(df[inconnues[~en_double]])])
+
+            resultat = index.fusionner(df, lot, source=chemin)
+            print(f"➕ {lot} : {resultat['nouvelles']} nouvelles annonces, "
+                  f"{resultat['deja_vues']} déjà connues")
+
+        etat = index.etat()
+        print(f"Jeu fusionné : {etat['annonces']} annonces, {etat['lots']} lots")
+        if exporter:
+            sauvegarder(index.lire().drop(columns="cle"), sortie)
+    finally:
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusion et nettoyage des annonces collectées.")
+    parser.add_argument("--lot", action="append", default=[],
+                        help="CSV de collecte à fusionner incrémentalement (répétable)")
+    parser.add_argument("--exporter", action="store_true",
+                        help="après les lots, réécrire OUTPUT_CSV depuis tout le jeu fusionné")
+    parser.add_argument("--flux", action="store_true",
+                        help="fusion complète par morceaux, à mémoire bornée")
+    parser.add_argument("--taille-morceau", type=int, default=TAILLE_MORCEAU,
+                        help=f"lignes par morceau en mode flux (défaut : {TAILLE_MORCEAU})")
+    parser.add_argument("--sans-rapprochement", action="store_true",
+                        help="garder les quasi-doublons entre CSV_1 et CSV_2 (ou entre lots)")
+    parser.add_argument("--csv-1", default=str(CSV_1), help="premier CSV de la fusion complète")
+    parser.add_argument("--csv-2", default=str(CSV_2), help="second CSV de la fusion complète")
+    parser.add_argument("--sortie", default=str(OUTPUT_CSV), help="CSV nettoyé (le .parquet est écrit à côté)")
+    args = parser.parse_args()
+
+    if args.lot:
+        fusion_incrementale(args.lot, exporter=args.exporter, sortie=args.sortie,
+                            rapprochement=not args.sans_rapprochement)
+    elif args.flux:
+        fusion_flux(args.taille_morceau, args.csv_1, args.csv_2, args.sortie,
+                    rapprochement=not args.sans_rapprochement)
+    else:
+        fusion_complete(args.csv_1, args.csv_2, args.sortie, rapprochement=not args.sans_rapprochement)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# SRC/index_annonces.py
+# Jeu fusionné incrémental : chaque lot d'annonces (un CSV de collecte) est
+# fusionné en O(taille du lot), sans relire ni redédoublonner l'historique.
+#
+#   DATA/fusion/
+#   ├── index.sqlite         clé -> lot d'origine, première / dernière vue, nb de vues
+#   └── lots/<lot>.parquet   annonces vues pour la première fois dans ce lot
+#
+# La clé d'une annonce (nettoyage.cle_annonce) est un hash de ses champs
+# normalisés. Fusionner un lot = upsert sur cette clé :
+#   - clé inconnue : l'annonce est ajoutée au fichier du lot ;
+#   - clé connue   : seules la date de dernière vue et le nombre de vues
+#                    changent (les champs font partie de la clé, ils sont identiques).
+# Le jeu complet est la suite des fichiers de lots, dans l'ordre d'arrivée :
+# c'est exactement ce que donnerait drop_duplicates(keep="first") sur tout
+# l'historique concaténé.
+#
+# Usage :
+#   python SRC/index_annonces.py etat
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+INDEX_DIR = BASE_DIR / "DATA" / "fusion"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS annonces (
+    cle           INTEGER PRIMARY KEY,
+    lot           TEXT NOT NULL,
+    premiere_vue  TEXT NOT NULL,
+    derniere_vue  TEXT NOT NULL,
+    vues          INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS lots (
+    lot         TEXT PRIMARY KEY,
+    source      TEXT,
+    horodatage  TEXT NOT NULL,
+    lignes      INTEGER NOT NULL,
+    nouvelles   INTEGER NOT NULL
+);
+"""
+
+
+class IndexAnnonces:
+
+    def __init__(self, dossier=INDEX_DIR):
+        self.dossier = Path(dossier)
+        (self.dossier / "lots").mkdir(parents=True, exist_ok=True)
+        # isolation_level=None : on gère les transactions nous-mêmes (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(str(self.dossier / "index.sqlite"), timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA busy_timeout = 60000")
+        self._db.executescript(SCHEMA)
+
+    def chemin_lot(self, lot: str) -> Path:
+        return self.dossier / "lots" / f"{lot}.parquet"
+
+    # ---- écriture ----
+
+    def deja_fusionne(self, lot: str) -> bool:
+        return self._db.execute("SELECT 1 FROM lots WHERE lot = ?", (lot,)).fetchone() is not None
+
+    def cles_connues(self, cles) -> set:
+        """Parmi `cles`, celles déjà dans l'index (une recherche par clé, pas de parcours)."""
+        connues = set()
+        cles = [int(c) for c in cles]
+        for i in range(0, len(cles), 900):   # limite de paramètres SQLite
+            paquet = cles[i:i + 900]
+            requete = f"SELECT cle FROM annonces WHERE cle IN ({','.join('?' * len(paquet))})"
+            connues.update(c for (c,) in self._db.execute(requete, paquet))
+        return connues
+
+    def fusionner(self, df: pd.DataFrame, lot: str, source=None) -> dict:
+        """
+        Upsert d'un lot déjà nettoyé qui porte une colonne "cle".
+        Un lot déjà fusionné (même nom) est ignoré : relancer est sans effet.
+        """
+        if self.deja_fusionne(lot):
+            return {"lot": lot, "lignes": len(df), "nouvelles": 0, "deja_vues": 0, "ignore": True}
+
+        df = df.drop_duplicates(subset="cle")
+        connues = self.cles_connues(df["cle"])
+        nouvelles = df[~df["cle"].isin(connues)]
+
+        # 1) les lignes nouvelles sur disque (fichier temporaire puis os.replace)…
+        chemin = self.chemin_lot(lot)
+        tmp = chemin.with_name(f"{chemin.name}.{os.getpid()}.tmp")
+        nouvelles.to_parquet(tmp, index=False)
+        os.replace(tmp, chemin)
+
+        # 2) …puis l'index, en une transaction : un crash entre les deux laisse
+        #    un fichier de lot orphelin, réécrit à l'identique à la relance
+        maintenant = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                """
+                INSERT INTO annonces (cle, lot, premiere_vue, derniere_vue) VALUES (?, ?, ?, ?)
+                ON CONFLICT (cle) DO UPDATE SET derniere_vue = excluded.derniere_vue, vues = vues + 1
+                """,
+                ((int(c), lot, maintenant, maintenant) for c in df["cle"]),
+            )
+            self._db.execute(
+                "INSERT INTO lots (lot, source, horodatage, lignes, nouvelles) VALUES (?, ?, ?, ?, ?)",
+                (lot, str(source) if source else None, maintenant, len(df), len(nouvelles)),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return {"lot": lot, "lignes": len(df), "nouvelles": len(nouvelles),
+                "deja_vues": len(df) - len(nouvelles), "ignore": False}
+
+    # ---- lecture ----
+
+    def lots(self) -> list:
+        return [dict(zip(("lot", "source", "horodatage", "lignes", "nouvelles"), r)) for r in
+                self._db.execute("SELECT lot, source, horodatage, lignes, nouvelles FROM lots ORDER BY rowid")]
+
+    def lire(self, colonnes=None) -> pd.DataFrame:
+        """Toutes les annonces fusionnées, dans l'ordre d'arrivée des lots."""
+        morceaux = [pd.read_parquet(self.chemin_lot(l["lot"]), columns=colonnes) for l in self.lots()]
+        if not morceaux:
+            return pd.DataFrame(columns=colonnes)
+        return pd.concat(morceaux, ignore_index=True)
+
+    def etat(self) -> dict:
+        nb, revues = self._db.execute("SELECT COUNT(*), COALESCE(SUM(vues > 1), 0) FROM annonces").fetchone()
+        return {"annonces": nb, "revues": revues, "lots": len(self.lots())}
+
+    def close(self):
+        self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index du jeu fusionné incrémental.")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    sous.add_parser("etat", help="annonces, lots et annonces revues")
+    parser.add_argument("--dossier", default=str(INDEX_DIR))
+    args = parser.parse_args()
+
+    index = IndexAnnonces(args.dossier)
+    etat = index.etat()
+    print(f"{etat['annonces']} annonces ({etat['revues']} revues dans plusieurs lots), {etat['lots']} lots")
+    for l in index.lots():
+        print(f"  {l['horodatage']}  {l['lot']:40} {l['lignes']:>8} lignes  {l['nouvelles']:>8} nouvelles")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# SRC/jeu_donnees.py
+# Jeu de données Parquet typé : la sortie de référence du pipeline.
+# Les CSV restent produits à côté, comme export (lecture humaine, Excel…).
+#
+#   DATA/annonceclean.parquet   fusion.py
+#   DATA/df_analyseVF4.parquet  nettoyage.py (+ departement_code normalisé, region)
+#   DATA/annonces_carte.parquet 5-prep_cood_geo.py
+#
+# Par rapport au CSV :
+#   - colonnes texte répétitives (type, département, région, ville…) en
+#     catégories : stockées une fois par valeur distincte ;
+#   - nombres en float32 / Int8 / Int16 : pas de re-parsing du texte à la lecture ;
+#   - lecture par colonnes : lire_jeu(nom, colonnes=[...]) ne décode que celles-là.
+# EcrivainJeu écrit le même fichier morceau par morceau (mode flux de fusion.py).
+#
+# La version du schéma est écrite dans les métadonnées du fichier ; un
+# lecteur refuse un fichier d'une autre version plutôt que de mal le lire.
+#
+# Usage :
+#   python SRC/jeu_donnees.py convertir            CSV existants -> Parquet
+#   python SRC/jeu_donnees.py exporter analyse     Parquet -> CSV
+#   python SRC/jeu_donnees.py info
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from nettoyage import normaliser_code_departement, DEPT_TO_REGION
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "DATA"
+
+VERSION_SCHEMA = "1"
+CLE_VERSION = b"version_schema"
+CLE_JEU = b"jeu"
+
+# nom du jeu -> fichier (sans extension)
+FICHIERS = {
+    "annonces": "annonceclean",
+    "analyse": "df_analyseVF4",
+    "carte": "annonces_carte",
+}
+
+SCHEMAS = {
+    "annonces": {
+        "prix": "float32",
+        "surface": "float32",
+        "pieces": "Int16",
+        "adresse": "string",
+        "type_bien": "category",
+        "sous_type": "category",
+        "departement_nom": "category",
+        "departement_code": "category",
+        "prix_m2": "float32",
+    },
+    "analyse": {
+        "type_bien": "category",
+        "sous_type": "category",
+        "Ville": "category",
+        "Arrondissement": "Int8",
+        "Code_postal": "category",
+        "departement_nom": "category",
+        "departement_code": "category",
+        "region": "category",
+        "prix": "float32",
+        "surface": "float32",
+        "prix_m2": "float32",
+        "pieces": "Int16",
+    },
+    "carte": {
+        "latitude": "float64",
+        "longitude": "float64",
+        "prix": "float32",
+        "surface": "float32",
+        "pieces": "Int16",
+        "type_bien": "category",
+        "code_postal": "category",
+        "departement": "category",
+        "ville": "category",
+    },
+}
+
+
+def chemin_jeu(nom: str, extension=".parquet") -> Path:
+    return DATA_DIR / f"{FICHIERS[nom]}{extension}"
+
+
+def typer(df: pd.DataFrame, nom: str) -> pd.DataFrame:
+    """Applique le schéma du jeu aux colonnes présentes (les autres restent telles quelles)."""
+    df = df.copy()
+    if nom == "analyse" and "departement_code" in df.columns:
+        df["departement_code"] = normaliser_code_departement(df["departement_code"])
+        df["region"] = df["departement_code"].map(DEPT_TO_REGION)
+    for colonne, dtype in SCHEMAS[nom].items():
+        if colonne not in df.columns:
+            continue
+        if dtype in ("category", "string"):
+            # codes postaux / départements lus comme nombres par read_csv : texte
+            valeurs = df[colonne].astype("string")
+            df[colonne] = valeurs.astype("category") if dtype == "category" else valeurs
+        else:
+            df[colonne] = pd.to_numeric(df[colonne], errors="coerce").astype(dtype)
+    return df
+
+
+def ecrire_jeu(df: pd.DataFrame, nom: str, chemin=None, export_csv=None):
+    """
+    Écrit le jeu typé en Parquet (fichier temporaire puis os.replace).
+    export_csv : chemin du CSV à écrire en plus, à partir des données non typées.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    chemin = Path(chemin or chemin_jeu(nom))
+    table = pa.Table.from_pandas(typer(df, nom), preserve_index=False)
+    metadonnees = dict(table.schema.metadata or {})
+    metadonnees.update({CLE_VERSION: VERSION_SCHEMA.encode(), CLE_JEU: nom.encode()})
+    table = table.replace_schema_metadata(metadonnees)
+
+    tmp = chemin.with_name(f"{chemin.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, chemin)
+
+    if export_csv is not None:
+        df.to_csv(export_csv, index=False, encoding="utf-8")
+    return chemin
+
+
+class EcrivainJeu:
+    """
+    Même fichier que ecrire_jeu, écrit morceau par morceau (mode flux) :
+    chaque ecrire(df) ajoute un groupe de lignes Parquet (et des lignes au
+    CSV d'export) ; fermer() publie le fichier (os.replace).
+    """
+
+    def __init__(self, nom: str, chemin=None, export_csv=None):
+        self.nom = nom
+        self.chemin = Path(chemin or chemin_jeu(nom))
+        self.export_csv = export_csv
+        self._tmp = self.chemin.with_name(f"{self.chemin.name}.{os.getpid()}.tmp")
+        self._ecrivain = None
+        self._schema = None
+        self.lignes = 0
+
+    def _schema_fixe(self, table):
+        # Les index des catégories (int8, int16…) dépendent du nombre de valeurs
+        # du morceau : on les fixe en int32 pour que tous les morceaux concordent
+        import pyarrow as pa
+
+        champs = [pa.field(c.name, pa.dictionary(pa.int32(), c.type.value_type))
+                  if pa.types.is_dictionary(c.type) else c for c in table.schema]
+        metadonnees = dict(table.schema.metadata or {})
+        metadonnees.update({CLE_VERSION: VERSION_SCHEMA.encode(), CLE_JEU: self.nom.encode()})
+        return pa.schema(champs, metadata=metadonnees)
+
+    def ecrire(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(typer(df, self.nom), preserve_index=False)
+        if self._ecrivain is None:
+            self._schema = self._schema_fixe(table)
+            self._ecrivain = pq.ParquetWriter(self._tmp, self._schema, compression="zstd")
+        self._ecrivain.write_table(table.cast(self._schema))
+
+        if self.export_csv is not None:
+            df.to_csv(self.export_csv, mode="w" if self.lignes == 0 else "a",
+                      header=self.lignes == 0, index=False, encoding="utf-8")
+        self.lignes += len(df)
+
+    def fermer(self):
+        if self._ecrivain is None:
+            return None
+        self._ecrivain.close()
+        os.replace(self._tmp, self.chemin)
+        return self.chemin
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.fermer()
+        else:
+            if self._ecrivain is not None:
+                self._ecrivain.close()
+            self._tmp.unlink(missing_ok=True)
+        return False
+
+
+def version_jeu(chemin) -> str | None:
+    import pyarrow.parquet as pq
+
+    metadonnees = pq.read_schema(chemin).metadata or {}
+    version = metadonnees.get(CLE_VERSION)
+    return version.decode() if version else None
+
+
+def lire_jeu(nom: str, colonnes=None, chemin=None) -> pd.DataFrame:
+    """Lit le jeu Parquet ; `colonnes` limite la lecture à ces colonnes."""
+    chemin = Path(chemin or chemin_jeu(nom))
+    version = version_jeu(chemin)
+    if version != VERSION_SCHEMA:
+        raise ValueError(f"{chemin.name} : schéma version {version}, attendu {VERSION_SCHEMA} "
+                         f"(régénérer avec : python SRC/jeu_donnees.py convertir {nom})")
+    return pd.read_parquet(chemin, columns=colonnes)
+
+
+# ============================================================
+# 🛠️ Ligne de commande
+# ============================================================
+
+def convertir(nom: str):
+    source = chemin_jeu(nom, ".csv")
+    if not source.exists():
+        print(f"⚠️ {source.name} absent, {nom} ignoré")
+        return
+    # textes (codes postaux, départements) lus comme texte : pas de zéro initial perdu
+    textes = {c: str for c, t in SCHEMAS[nom].items() if t in ("category", "string")}
+    chemin = ecrire_jeu(pd.read_csv(source, dtype=textes), nom)
+    print(f"✅ {source.name} ({source.stat().st_size / 1e6:.2f} Mo) -> "
+          f"{chemin.name} ({chemin.stat().st_size / 1e6:.2f} Mo)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jeu de données Parquet du pipeline.")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("convertir", help="CSV existants -> Parquet")
+    p.add_argument("noms", nargs="*", help=f"parmi {', '.join(FICHIERS)} (défaut : tous)")
+    p = sous.add_parser("exporter", help="Parquet -> CSV")
+    p.add_argument("nom", choices=list(FICHIERS))
+    p.add_argument("--sortie", default=None)
+    sous.add_parser("info", help="version, lignes et taille de chaque jeu")
+    args = parser.parse_args()
+
+    if args.commande == "convertir":
+        inconnus = set(args.noms) - set(FICHIERS)
+        if inconnus:
+            parser.error(f"jeu inconnu : {', '.join(sorted(inconnus))}")
+        for nom in args.noms or FICHIERS:
+            convertir(nom)
+    elif args.commande == "exporter":
+        sortie = args.sortie or chemin_jeu(args.nom, ".csv")
+        lire_jeu(args.nom).to_csv(sortie, index=False, encoding="utf-8")
+        print(f"✅ {sortie}")
+    else:
+        import pyarrow.parquet as pq
+        for nom in FICHIERS:
+            chemin = chemin_jeu(nom)
+            if chemin.exists():
+                print(f"{nom:9} {chemin.name:28} v{version_jeu(chemin)} "
+                      f"{pq.ParquetFile(chemin).metadata.num_rows:>9} lignes "
+                      f"{chemin.stat().st_size / 1e6:>7.2f} Mo")
+            else:
+                print(f"{nom:9} {chemin.name:28} absent")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
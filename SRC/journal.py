@@ -0,0 +1,94 @@
+# SRC/journal.py
+# Journal de crawl en ajout seul (une ligne par page traitée).
+# Il permet de reprendre un run interrompu exactement à la page suivante,
+# sans jamais retélécharger une page déjà réussie.
+
+import os
+import csv
+import time
+import threading
+
+COLONNES_JOURNAL = ["departement_code", "page", "statut", "nb_annonces", "octets", "horodatage", "pret_s"]
+
+# Statuts possibles d'une page
+OK = "ok"          # page lue, annonces écrites
+VIDE = "vide"      # page sans annonce -> fin de pagination du département
+ERREUR = "erreur"  # exception pendant la page (elle sera retentée)
+INCHANGEE = "inchangee"  # page identique au run précédent -> fin du département (mode incrémental)
+NOUVEAU_RUN = "nouveau_run"  # marqueur : nouveau passage sur tous les départements (mode incrémental)
+
+
+class JournalCrawl:
+    """
+    - `octets` : taille du fichier de sortie du département juste après
+      l'écriture de la page. À la reprise, le fichier est tronqué à cette
+      taille, ce qui efface une page à moitié écrite lors d'un crash.
+    - nouveau_run() : les pages sont à refaire, mais les fichiers de sortie
+      gardent leur contenu (les pages suivantes s'y ajoutent).
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        self._etat = {}  # dep_code -> {"derniere_ok": int, "termine": bool, "octets": int}
+        self._charger()
+
+    def _charger(self):
+        if not os.path.exists(self.chemin):
+            return
+        with open(self.chemin, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self._appliquer(row["departement_code"], int(row["page"]), row["statut"], int(row["octets"] or 0))
+
+    def _appliquer(self, dep_code, page, statut, octets):
+        if statut == NOUVEAU_RUN:
+            for etat in self._etat.values():
+                etat["derniere_ok"], etat["termine"] = 0, False
+            return
+        etat = self._etat.setdefault(dep_code, {"derniere_ok": 0, "termine": False, "octets": 0})
+        if statut == OK:
+            etat["derniere_ok"] = max(etat["derniere_ok"], page)
+            etat["octets"] = octets
+        elif statut in (VIDE, INCHANGEE):
+            etat["termine"] = True
+            etat["octets"] = octets
+
+    def noter(self, dep_code, page, statut, nb_annonces=0, octets=0, pret_s=None):
+        """
+        Ajoute une ligne au journal et la force sur le disque.
+        `pret_s` : secondes entre la requête et la page prête (None si inconnu).
+        """
+        with self._verrou:
+            nouveau = not os.path.exists(self.chemin)
+            with open(self.chemin, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if nouveau:
+                    writer.writerow(COLONNES_JOURNAL)
+                writer.writerow([dep_code, page, statut, nb_annonces, octets,
+                                 time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                 "" if pret_s is None else round(pret_s, 2)])
+                f.flush()
+                os.fsync(f.fileno())
+            self._appliquer(dep_code, page, statut, octets)
+
+    def prochaine_page(self, dep_code, max_pages):
+        """Numéro de la prochaine page à traiter, ou None si le département est fini."""
+        etat = self._etat.get(dep_code)
+        if etat is None:
+            return 1
+        if etat["termine"] or etat["derniere_ok"] >= max_pages:
+            return None
+        return etat["derniere_ok"] + 1
+
+    def run_termine(self, dep_codes, max_pages) -> bool:
+        """True si tous ces départements sont finis dans le run courant."""
+        return all(self.prochaine_page(d, max_pages) is None for d in dep_codes)
+
+    def nouveau_run(self):
+        """Recommence tous les départements à la page 1, sans toucher à leurs sorties."""
+        self.noter("*", 0, NOUVEAU_RUN)
+
+    def octets_valides(self, dep_code):
+        """Taille du fichier de sortie du département au dernier point sûr."""
+        etat = self._etat.get(dep_code)
+        return etat["octets"] if etat else 0
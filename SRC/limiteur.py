@@ -0,0 +1,60 @@
+# SRC/limiteur.py
+# Limiteur de débit partagé par tous les scrapers.
+# Remplace les pauses "humaines" propres à chaque navigateur par une limite
+# globale par hôte : quel que soit le nombre de workers, le site ne reçoit
+# jamais plus de `debit` requêtes par seconde.
+
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+
+
+def hote_de(url: str) -> str:
+    """Renvoie l'hôte d'une URL (ex: 'www.logic-immo.com')."""
+    return urlparse(url).netloc.lower()
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons (token bucket) par hôte, utilisable depuis plusieurs threads.
+
+    - debit  : nombre de requêtes autorisées par seconde et par hôte
+    - rafale : nombre de requêtes pouvant partir d'un coup (taille du seau)
+    """
+
+    def __init__(self, debit: float, rafale: int = 1):
+        if debit <= 0:
+            raise ValueError("Le débit doit être strictement positif.")
+        self.debit = debit
+        self.rafale = max(1, rafale)
+        self._seaux = {}  # hote -> (jetons, dernier_remplissage)
+        self._verrou = threading.Lock()
+
+    def _reserver(self, hote: str) -> float:
+        """Réserve un jeton et renvoie le temps d'attente nécessaire (s)."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            jetons, dernier = self._seaux.get(hote, (float(self.rafale), maintenant))
+            jetons = min(self.rafale, jetons + (maintenant - dernier) * self.debit)
+            jetons -= 1
+            self._seaux[hote] = (jetons, maintenant)
+            # Jetons négatifs = dette à rembourser avant de partir
+            return max(0.0, -jetons / self.debit)
+
+    def attendre(self, url: str) -> float:
+        """Bloque jusqu'à ce qu'une requête vers l'hôte de `url` soit permise."""
+        attente = self._reserver(hote_de(url))
+        if attente > 0:
+            time.sleep(attente)
+        return attente
+
+
+class LimiteurDebitAsync(LimiteurDebit):
+    """Même seau à jetons, mais l'attente ne bloque pas la boucle asyncio."""
+
+    async def attendre(self, url: str) -> float:
+        attente = self._reserver(hote_de(url))
+        if attente > 0:
+            await asyncio.sleep(attente)
+        return attente
@@ -0,0 +1,95 @@
+# SRC/manifeste.py
+# Manifeste d'extraction : pour chaque page (clé = sha256 du HTML, comme dans
+# le magasin de snapshots), la version du parseur qui l'a extraite et ses lignes.
+#
+#   DATA/extraction/
+#   ├── manifeste.json              hash -> {version, moteur, origine, lignes, horodatage}
+#   └── lignes/ab/abcdef….csv       lignes extraites de la page
+#
+# Une page déjà extraite par la version courante n'est plus jamais re-parsée ;
+# le fichier de sortie est reconstruit à partir des lignes gardées ici.
+# Chaque écriture est atomique (fichier temporaire puis os.replace) : un
+# crash en cours de route ne laisse ni doublon ni page à moitié notée.
+
+import os
+import csv
+import json
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+EXTRACTION_DIR = BASE_DIR / "DATA" / "extraction"
+
+
+def ecrire_atomique(chemin: Path, ecrire):
+    """Appelle ecrire(f) sur un fichier temporaire, puis le met à la place de `chemin`."""
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    tmp = chemin.with_name(f"{chemin.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        ecrire(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, chemin)
+
+
+class ManifesteExtraction:
+
+    def __init__(self, colonnes: list, dossier=EXTRACTION_DIR):
+        self.colonnes = colonnes
+        self.dossier = Path(dossier)
+        self.chemin = self.dossier / "manifeste.json"
+        if self.chemin.exists():
+            with open(self.chemin, encoding="utf-8") as f:
+                self.pages = json.load(f)      # ordre d'insertion = ordre de sortie
+        else:
+            self.pages = {}
+
+    def chemin_lignes(self, h: str) -> Path:
+        return self.dossier / "lignes" / h[:2] / f"{h}.csv"
+
+    # ---- état ----
+
+    def a_extraire(self, h: str, version: str) -> bool:
+        """True si la page est inconnue ou a été extraite par une autre version du parseur."""
+        entree = self.pages.get(h)
+        return entree is None or entree["version"] != version
+
+    def perimees(self, version: str) -> list:
+        """Hash des pages extraites par une ancienne version du parseur."""
+        return [h for h, e in self.pages.items() if e["version"] != version]
+
+    # ---- écriture ----
+
+    def noter(self, h: str, lignes: list, version: str, moteur: str, origine: str):
+        """Enregistre les lignes d'une page (avant l'entrée du manifeste : reprise sûre)."""
+        def ecrire(f):
+            writer = csv.DictWriter(f, fieldnames=self.colonnes)
+            writer.writeheader()
+            writer.writerows(lignes)
+
+        ecrire_atomique(self.chemin_lignes(h), ecrire)
+        self.pages[h] = {
+            "version": version,
+            "moteur": moteur,
+            "origine": origine,
+            "lignes": len(lignes),
+            "horodatage": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def sauver(self):
+        ecrire_atomique(self.chemin, lambda f: json.dump(self.pages, f, ensure_ascii=False, indent=0))
+
+    # ---- lecture ----
+
+    def lignes(self, h: str) -> list:
+        """Lignes d'une page ; "" redevient None comme à l'extraction."""
+        chemin = self.chemin_lignes(h)
+        if not chemin.exists():
+            return []
+        with open(chemin, newline="", encoding="utf-8") as f:
+            return [{k: (v if v != "" else None) for k, v in ligne.items()} for ligne in csv.DictReader(f)]
+
+    def toutes_les_lignes(self):
+        """Lignes de toutes les pages, dans l'ordre du manifeste."""
+        for h in self.pages:
+            yield from self.lignes(h)
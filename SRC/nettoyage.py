@@ -0,0 +1,314 @@
+# SRC/nettoyage.py
+# Nettoyage des annonces, en opérations vectorisées pandas.
+# Reprend à l'identique les fonctions ligne à ligne (apply) de
+# Notebooks/nettoyageVF.ipynb, fusion.py et application/common.py :
+#
+#   extract_ville_arrondissement -> extraire_ville_arrondissement
+#   clean_commune                -> nettoyer_commune
+#   normalize_dept_code          -> normaliser_code_departement
+#   clean_price_series / clean_surface_series (fusion.py)
+#
+# Les adresses et les villes se répètent énormément d'une annonce à l'autre :
+# les traitements de texte ne tournent que sur les valeurs distinctes
+# (pd.factorize), puis le résultat est redistribué sur toutes les lignes.
+#
+# Usage (régénère DATA/df_analyseVF4.parquet et son export csv à partir de
+# DATA/annonceclean.csv) :
+#   python SRC/nettoyage.py
+
+import re
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SOURCE_CSV = BASE_DIR / "DATA" / "annonceclean.csv"
+ANALYSE_CSV = BASE_DIR / "DATA" / "df_analyseVF4.csv"
+
+RE_CODE_POSTAL = r"\((\d{5})\)"
+
+PARASITES = [
+    "RDC", "Gare", "Zone", "Quartier", "Secteur",
+    "Ouest", "Est", "Nord", "Sud",
+    "Urbaine", "Industrielle", "Forêt",
+    "Proche", "Centre", "Ville",
+    "Centre-Ville", "Centre ville"
+]
+RE_PARASITES = r"\b(?:" + "|".join(re.escape(p) for p in PARASITES) + r")\b"
+
+RE_ARRONDISSEMENT = r"\b(\d+)\s*(?:er|ème|eme)\b"
+
+# Villes à arrondissements : codes postaux forcés et numéro max
+ARRONDISSEMENTS = {
+    "Paris": (75001, 75020, 20),
+    "Lyon": (69001, 69009, 9),
+    "Marseille": (13001, 13016, 16),
+}
+
+# Département -> région (application/common.py, jeu Parquet)
+DEPT_TO_REGION = {
+    "01":"Auvergne-Rhône-Alpes","03":"Auvergne-Rhône-Alpes","07":"Auvergne-Rhône-Alpes","15":"Auvergne-Rhône-Alpes",
+    "26":"Auvergne-Rhône-Alpes","38":"Auvergne-Rhône-Alpes","42":"Auvergne-Rhône-Alpes","43":"Auvergne-Rhône-Alpes",
+    "63":"Auvergne-Rhône-Alpes","69":"Auvergne-Rhône-Alpes","73":"Auvergne-Rhône-Alpes","74":"Auvergne-Rhône-Alpes",
+    "21":"Bourgogne-Franche-Comté","25":"Bourgogne-Franche-Comté","39":"Bourgogne-Franche-Comté","58":"Bourgogne-Franche-Comté",
+    "70":"Bourgogne-Franche-Comté","71":"Bourgogne-Franche-Comté","89":"Bourgogne-Franche-Comté","90":"Bourgogne-Franche-Comté",
+    "22":"Bretagne","29":"Bretagne","35":"Bretagne","56":"Bretagne",
+    "18":"Centre-Val de Loire","28":"Centre-Val de Loire","36":"Centre-Val de Loire","37":"Centre-Val de Loire",
+    "41":"Centre-Val de Loire","45":"Centre-Val de Loire",
+    "2A":"Corse","2B":"Corse",
+    "08":"Grand Est","10":"Grand Est","51":"Grand Est","52":"Grand Est","54":"Grand Est","55":"Grand Est","57":"Grand Est",
+    "67":"Grand Est","68":"Grand Est","88":"Grand Est",
+    "02":"Hauts-de-France","59":"Hauts-de-France","60":"Hauts-de-France","62":"Hauts-de-France","80":"Hauts-de-France",
+    "75":"Île-de-France","77":"Île-de-France","78":"Île-de-France","91":"Île-de-France","92":"Île-de-France","93":"Île-de-France",
+    "94":"Île-de-France","95":"Île-de-France",
+    "14":"Normandie","27":"Normandie","50":"Normandie","61":"Normandie","76":"Normandie",
+    "16":"Nouvelle-Aquitaine","17":"Nouvelle-Aquitaine","19":"Nouvelle-Aquitaine","23":"Nouvelle-Aquitaine","24":"Nouvelle-Aquitaine",
+    "33":"Nouvelle-Aquitaine","40":"Nouvelle-Aquitaine","47":"Nouvelle-Aquitaine","64":"Nouvelle-Aquitaine","79":"Nouvelle-Aquitaine",
+    "86":"Nouvelle-Aquitaine","87":"Nouvelle-Aquitaine",
+    "09":"Occitanie","11":"Occitanie","12":"Occitanie","30":"Occitanie","31":"Occitanie","32":"Occitanie","34":"Occitanie",
+    "46":"Occitanie","48":"Occitanie","65":"Occitanie","66":"Occitanie","81":"Occitanie","82":"Occitanie",
+    "44":"Pays de la Loire","49":"Pays de la Loire","53":"Pays de la Loire","72":"Pays de la Loire","85":"Pays de la Loire",
+    "04":"Provence-Alpes-Côte d'Azur","05":"Provence-Alpes-Côte d'Azur","06":"Provence-Alpes-Côte d'Azur","13":"Provence-Alpes-Côte d'Azur",
+    "83":"Provence-Alpes-Côte d'Azur","84":"Provence-Alpes-Côte d'Azur",
+    "971":"Guadeloupe","972":"Martinique","973":"Guyane","974":"La Réunion","976":"Mayotte",
+}
+
+PREFIXES_COMMUNE = ["saint", "sainte", "st", "ste", "le", "la", "les", "l'", "l’"]
+
+COLONNES_ANALYSE = [
+    "type_bien",
+    "sous_type",
+    "Ville",
+    "Arrondissement",
+    "Code_postal",
+    "departement_nom",
+    "departement_code",
+    "prix",
+    "surface",
+    "prix_m2",
+    "pieces"
+]
+
+
+def sur_valeurs_distinctes(s: pd.Series, traitement) -> pd.Series | pd.DataFrame:
+    """
+    Applique `traitement` (vectorisé) au texte des seules valeurs distinctes non nulles
+    de `s` puis le redistribue sur toutes les lignes (NaN là où s est nul).
+    """
+    codes, uniques = pd.factorize(s)
+    # texte en dtype object : expressions régulières du module re, comme les
+    # versions apply (le dtype str de pandas peut passer par RE2 via pyarrow)
+    resultat = traitement(pd.Series(uniques).astype(str).astype(object))
+    # une ligne NaN en fin de table pour les codes -1 (valeurs nulles)
+    if isinstance(resultat, pd.DataFrame):
+        resultat = pd.concat([resultat, resultat.iloc[:0].reindex([len(resultat)])])
+    else:
+        resultat = pd.concat([resultat, pd.Series([np.nan])], ignore_index=True)
+    return resultat.iloc[codes].set_axis(s.index)
+
+
+# ============================================================
+# 💶 Prix / surface (fusion.py)
+# ============================================================
+
+def clean_price_series(s: pd.Series) -> pd.Series:
+    """
+    Nettoie une série de prix au format FR (espaces, espaces fines) et convertit en numérique.
+    Renvoie une série float avec NaN si conversion impossible.
+    """
+    s = s.astype(str)
+    # retire espaces fines insécables + espaces classiques
+    s = s.str.replace("\u202f", "", regex=False).str.replace(" ", "", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def clean_surface_series(s: pd.Series) -> pd.Series:
+    """
+    Nettoie une série de surfaces (virgule -> point) et convertit en numérique.
+    Renvoie une série float avec NaN si conversion impossible.
+    """
+    s = s.astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+# ============================================================
+# 📍 Adresse -> code postal, ville, arrondissement
+# ============================================================
+
+def code_postal(adresse: pd.Series) -> pd.Series:
+    """"Toulouse (31000)" -> "31000" (NaN si absent)."""
+    return adresse.str.extract(RE_CODE_POSTAL, expand=False)
+
+
+def _ville_arrondissement(adresse: pd.Series) -> pd.DataFrame:
+    cp = pd.to_numeric(code_postal(adresse), errors="coerce")
+
+    # Nettoyage texte (sans CP, sans mots parasites, espaces simples)
+    base = adresse.str.replace(r"\s*\(\d{5}\)\s*", "", regex=True).str.strip()
+    base = base.str.replace(RE_PARASITES, "", regex=True, flags=re.IGNORECASE)
+    base = base.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    # Ville = après la dernière virgule si possible, sinon tout le texte
+    ville = base.str.rsplit(",", n=1).str[-1].str.strip()
+
+    # Forçage strict via CP (UNIQUEMENT les arrondissements)
+    for nom, (cp_min, cp_max, _) in ARRONDISSEMENTS.items():
+        ville = ville.mask(cp.between(cp_min, cp_max), nom)
+
+    # Arrondissement uniquement pour ces 3 villes, dans les bornes
+    numero = pd.to_numeric(
+        adresse.str.extract(RE_ARRONDISSEMENT, flags=re.IGNORECASE, expand=False), errors="coerce")
+    maximum = ville.map({nom: borne for nom, (_, _, borne) in ARRONDISSEMENTS.items()})
+    arrondissement = numero.where((numero >= 1) & (numero <= maximum)).astype(float)
+
+    return pd.DataFrame({"Ville": ville, "Arrondissement": arrondissement})
+
+
+def extraire_ville_arrondissement(adresse: pd.Series) -> pd.DataFrame:
+    """
+    Colonnes Ville et Arrondissement à partir de l'adresse (ex extract_ville_arrondissement) :
+    "Paris 15ème (75015)" -> Paris, 15 ; "Les Chalets, Toulouse (31000)" -> Toulouse, NaN.
+    """
+    return sur_valeurs_distinctes(adresse, _ville_arrondissement)
+
+
+def _commune(v: pd.Series) -> pd.Series:
+    # enlever tirets parasites au début
+    v = v.str.strip().str.replace(r"^[\-\–\—]+\s*", "", regex=True)
+
+    dernier = v.str.extract(r"(\S+)\s*$", expand=False)
+    avant_dernier = v.str.extract(r"(\S+)\s+\S+\s*$", expand=False)
+
+    # villes composées classiques (Saint Denis, Le Havre…), sinon dernier mot = commune
+    compose = avant_dernier.str.lower().isin(PREFIXES_COMMUNE)
+    commune = dernier.mask(compose, avant_dernier + " " + dernier)
+    # texte sans aucun mot : laissé tel quel
+    return commune.fillna(v)
+
+
+def nettoyer_commune(ville: pd.Series) -> pd.Series:
+    """Garde la commune d'un libellé de ville (ex clean_commune) : "Quartier Saint Michel" -> "Saint Michel"."""
+    return sur_valeurs_distinctes(ville, _commune)
+
+
+# ============================================================
+# 🗺️ Codes département
+# ============================================================
+
+def _code_departement(s: pd.Series) -> pd.Series:
+    s = s.str.strip().str.upper()
+    return s.mask(s.str.isdigit() & (s.str.len() == 1), "0" + s)
+
+
+def normaliser_code_departement(codes: pd.Series) -> pd.Series:
+    """1 / "1" / " 2a" -> "01" / "01" / "2A" ; None si absent (ex normalize_dept_code)."""
+    resultat = sur_valeurs_distinctes(codes, _code_departement).astype(object)
+    return resultat.where(codes.notna(), None)
+
+
+# ============================================================
+# 🔑 Clé stable d'une annonce
+# ============================================================
+
+# Champs qui identifient une annonce (departement_nom se déduit du code)
+CHAMPS_CLE = ["prix", "surface", "pieces", "adresse", "type_bien", "sous_type", "departement_code"]
+
+
+def _texte_normalise(s: pd.Series) -> pd.Series:
+    """Minuscules, espaces simples, sans espace autour ; "" si absent."""
+    return sur_valeurs_distinctes(
+        s, lambda t: t.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()).fillna("")
+
+
+def _nombre_normalise(s: pd.Series) -> pd.Series:
+    """105 / 105.0 / "105" -> "105" ; "" si absent ou illisible."""
+    codes, uniques = pd.factorize(pd.to_numeric(s, errors="coerce").round(2))
+    textes = np.array([f"{x:.2f}".rstrip("0").rstrip(".") for x in uniques] + [""], dtype=object)
+    return pd.Series(textes[codes], index=s.index)
+
+
+def cle_annonce(df: pd.DataFrame) -> pd.Series:
+    """
+    Clé entière 64 bits d'une annonce déjà nettoyée (prix / surface numériques),
+    calculée sur ses champs normalisés : la même annonce recollectée un autre
+    jour, ou venant d'un autre fichier, retombe sur la même clé.
+    """
+    morceaux = []
+    for champ in CHAMPS_CLE:
+        if champ not in df.columns:
+            morceaux.append(pd.Series("", index=df.index, dtype=object))
+        elif champ in ("prix", "surface", "pieces"):
+            morceaux.append(_nombre_normalise(df[champ]))
+        elif champ == "departement_code":
+            # 1 / "01" / 1.0 (colonne lue comme nombre) -> "01"
+            code = normaliser_code_departement(df[champ]).fillna("").str.replace(r"\.0$", "", regex=True)
+            morceaux.append(code.mask(code.str.len() == 1, "0" + code))
+        else:
+            morceaux.append(_texte_normalise(df[champ]))
+    textes = morceaux[0].str.cat(morceaux[1:], sep="\x1f")
+    cles = [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+            for t in textes]
+    return pd.Series(cles, index=df.index, dtype="int64")
+
+
+# ============================================================
+# 📊 Table d'analyse (Notebooks/nettoyageVF.ipynb)
+# ============================================================
+
+def preparer_analyse(df: pd.DataFrame) -> pd.DataFrame:
+    """annonceclean.csv -> df_analyseVF4.csv, mêmes étapes que le notebook."""
+    df = df.copy()
+    df["prix_num"] = pd.to_numeric(df["prix"], errors="coerce")
+    df["surface_num"] = pd.to_numeric(df["surface"], errors="coerce")
+    df = df.dropna(subset=["prix_num", "surface_num"]).copy()
+    df["prix_m2"] = df["prix_num"] / df["surface_num"]
+
+    # Bornes de validité
+    df = df[
+        (df["prix"] > 1000) & (df["prix"] < 10_000_000) &
+        (df["surface"] >= 10) & (df["surface"] <= 500) &
+        (df["prix_m2"] <= 28000)
+    ]
+    if "pieces" in df.columns:
+        df = df[(df["pieces"].isna()) | (df["pieces"] <= 20)]
+
+    # Exclure les terrains, regrouper Villa → Maison
+    df = df[df["type_bien"] != "Terrain"].copy()
+    df["type_bien"] = df["type_bien"].replace({"Villa": "Maison"})
+
+    # Ville, arrondissement, code postal
+    df[["Ville", "Arrondissement"]] = extraire_ville_arrondissement(df["adresse"])
+    df["Ville"] = nettoyer_commune(df["Ville"])
+    df["Code_postal"] = code_postal(df["adresse"]).astype("string")
+
+    # Code postal manquant : département + "000"
+    dep_for_cp = df["departement_code"].astype("string").replace({"2A": "20", "2B": "20"})
+    df["Code_postal"] = df["Code_postal"].fillna(dep_for_cp.str.zfill(2) + "000")
+    df["Code_postal"] = df["Code_postal"].astype(str).str.zfill(5)
+
+    df = df.drop(columns=["prix", "surface"]).rename(columns={"prix_num": "prix", "surface_num": "surface"})
+    return df[COLONNES_ANALYSE].copy()
+
+
+def main():
+    from jeu_donnees import ecrire_jeu
+
+    parser = argparse.ArgumentParser(description="Construit la table d'analyse à partir des annonces nettoyées.")
+    parser.add_argument("--source", default=str(SOURCE_CSV))
+    parser.add_argument("--sortie", default=str(ANALYSE_CSV), help="export csv (le .parquet est écrit à côté)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.source)
+    print("Shape initiale :", df.shape)
+    df_analyse = preparer_analyse(df)
+    chemin = ecrire_jeu(df_analyse, "analyse", Path(args.sortie).with_suffix(".parquet"), export_csv=args.sortie)
+    print(f"✅ {chemin} et {args.sortie} créés : {df_analyse.shape}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
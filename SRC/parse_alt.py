@@ -0,0 +1,128 @@
+# SRC/parse_alt.py
+# Lecture des annonces dans l'ALT des images des pages de résultats.
+#
+# parse_from_alt : une annonce à la fois (version historique du scraper).
+# parse_alts     : toute une page d'un coup, en colonnes. Les ALT qui ne
+#                  peuvent pas être des annonces (logos, photos…) sont écartés
+#                  par de simples tests de sous-chaînes avant toute regex, les
+#                  motifs sont compilés une fois, et la recherche d'adresse (la
+#                  plus coûteuse) n'est faite que si prix et surface sont trouvés.
+# Les deux donnent exactement les mêmes annonces (voir SRC/scrap_dep/bench_parse_alt.py).
+
+import re
+
+COLONNES_ALT = ["prix", "surface", "pieces", "adresse", "type_bien", "sous_type"]
+
+
+def parse_from_alt(alt: str) -> dict | None:
+    """
+    Retourne un dict si l'annonce correspond à nos types + prix + surface + adresse,
+    sinon None.
+    """
+
+    # Type + sous-type
+    if "Appartement à vendre" in alt:
+        type_bien, sous_type = "Appartement", "Appartement"
+    elif "Duplex à vendre" in alt:
+        type_bien, sous_type = "Appartement", "Duplex"
+    elif "Maison à vendre" in alt:
+        type_bien, sous_type = "Maison", "Maison"
+    elif "Pavillon à vendre" in alt:
+        type_bien, sous_type = "Maison", "Pavillon"
+    else:
+        return None
+
+    # Prix
+    m_price = re.search(r"(\d[\d\s ]+)\s*€", alt)  # inclut l'espace fine insécable ( )
+    # Surface (pas terrain)
+    m_surface = re.search(r"(\d[\d\s,]+)\s*m²(?!\s*de terrain)", alt)
+    # Pièces
+    m_pieces = re.search(r"(\d+)\s+pièce", alt, flags=re.IGNORECASE)
+    # Adresse ville + CP (gère Lyon 3ème 69003 / LYON 3EME, 69003)
+    m_addr = re.findall(r"([A-ZÀ-Ý][A-Za-z0-9À-ÿ\-' ]+)\s*,?\s*\(?(\d{5})\)?", alt)
+
+    if not (m_price and m_surface and m_addr):
+        return None
+
+    ville, cp = m_addr[-1]
+
+    return {
+        "prix": m_price.group(1).strip(),
+        "surface": m_surface.group(1).strip(),
+        "pieces": m_pieces.group(1) if m_pieces else None,
+        "adresse": f"{ville.strip()} ({cp})",
+        "type_bien": type_bien,
+        "sous_type": sous_type,
+    }
+
+
+# ============================================================
+# ⚡ Version par lot
+# ============================================================
+
+# (texte cherché, type_bien, sous_type) : même ordre de priorité que parse_from_alt
+TYPES = (
+    ("Appartement à vendre", "Appartement", "Appartement"),
+    ("Duplex à vendre", "Appartement", "Duplex"),
+    ("Maison à vendre", "Maison", "Maison"),
+    ("Pavillon à vendre", "Maison", "Pavillon"),
+)
+
+# Mêmes motifs que parse_from_alt, compilés une seule fois
+RE_PRIX = re.compile(r"(\d[\d\s ]+)\s*€")
+RE_SURFACE = re.compile(r"(\d[\d\s,]+)\s*m²(?!\s*de terrain)")
+RE_PIECES = re.compile(r"(\d+)\s+pièce", re.IGNORECASE)
+RE_ADRESSE = re.compile(r"([A-ZÀ-Ý][A-Za-z0-9À-ÿ\-' ]+)\s*,?\s*\(?(\d{5})\)?")
+
+
+def parse_alts(alts) -> dict:
+    """
+    Analyse une liste d'ALT et renvoie les annonces en colonnes :
+        {"indice": [...], "prix": [...], "surface": [...], ...}
+    `indice` est la position de l'ALT dans la liste d'entrée.
+    """
+    colonnes = {c: [] for c in ["indice"] + COLONNES_ALT}
+    ajouts = [colonnes[c].append for c in ["indice"] + COLONNES_ALT]
+    chercher_prix, chercher_surface = RE_PRIX.search, RE_SURFACE.search
+    chercher_pieces, adresses = RE_PIECES.search, RE_ADRESSE.finditer
+
+    for i, alt in enumerate(alts):
+        # Tri rapide : une annonce a forcément un type "… à vendre", un prix et des m²
+        if "à vendre" not in alt or "€" not in alt or "m²" not in alt:
+            continue
+        for texte, type_bien, sous_type in TYPES:
+            if texte in alt:
+                break
+        else:
+            continue
+
+        m_price = chercher_prix(alt)
+        if m_price is None:
+            continue
+        m_surface = chercher_surface(alt)
+        if m_surface is None:
+            continue
+        m_addr = None
+        for m_addr in adresses(alt):   # on ne garde que la dernière (comme findall()[-1])
+            pass
+        if m_addr is None:
+            continue
+        m_pieces = chercher_pieces(alt)
+
+        valeurs = (
+            i,
+            m_price.group(1).strip(),
+            m_surface.group(1).strip(),
+            m_pieces.group(1) if m_pieces else None,
+            f"{m_addr.group(1).strip()} ({m_addr.group(2)})",
+            type_bien,
+            sous_type,
+        )
+        for ajout, v in zip(ajouts, valeurs):
+            ajout(v)
+    return colonnes
+
+
+def en_lignes(colonnes: dict) -> list:
+    """Colonnes de parse_alts -> liste de dicts (format de parse_from_alt)."""
+    return [dict(zip(COLONNES_ALT, ligne)) for ligne in zip(*(colonnes[c] for c in COLONNES_ALT))]
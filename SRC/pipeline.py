@@ -0,0 +1,333 @@
+# SRC/pipeline.py
+# Lance la chaîne complète comme un graphe d'étapes (collecte -> extraction ->
+# formatage -> fusion -> nettoyage -> géocodage) au lieu des scripts à la main.
+#
+# Chaque étape déclare son script, ses entrées et ses sorties (ETAPES) ; les
+# dépendances entre étapes s'en déduisent (la sortie de l'une est l'entrée de
+# l'autre). Une étape est sautée quand rien n'a changé depuis son dernier
+# succès : même empreinte (hash du contenu de ses entrées, de son script et
+# des modules de SRC qu'il importe, de ses arguments) et sorties intactes.
+# Les étapes indépendantes tournent en parallèle ; à la fin, un tableau donne
+# le temps de chaque étape.
+#
+# Les étapes de collecte (réseau, navigateur, géocodage compris) ne sont lancées qu'avec
+# --collecte ou si on les nomme : sinon leurs sorties servent de sources.
+#
+#   DATA/pipeline.json         empreintes et durées du dernier succès de chaque étape
+#   DATA/pipeline_logs/*.log   sortie de chaque étape
+#
+# Usage :
+#   python SRC/pipeline.py                      tout ce qui a changé (hors collecte)
+#   python SRC/pipeline.py --collecte -j 4      idem, collecte comprise, 4 étapes à la fois
+#   python SRC/pipeline.py fusion nettoyage     seulement ces étapes
+#   python SRC/pipeline.py --forcer fusion      relance même si rien n'a changé
+#   python SRC/pipeline.py --liste              étapes, dépendances et état
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from manifeste import ecrire_atomique
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = BASE_DIR / "SRC"
+ETAT_PATH = BASE_DIR / "DATA" / "pipeline.json"
+LOGS_DIR = BASE_DIR / "DATA" / "pipeline_logs"
+
+
+class Etape:
+
+    def __init__(self, nom, script, entrees=(), sorties=(), args=(), collecte=False):
+        self.nom = nom
+        self.script = script
+        self.entrees = list(entrees)
+        self.sorties = list(sorties)
+        self.args = list(args)
+        self.collecte = collecte
+
+
+# Chemins relatifs à la racine du projet ; toutes les étapes sont lancées depuis la racine.
+ETAPES = [
+    Etape("departements", "SRC/scrap_dep/departement.py",
+          sorties=["DATA/departements.csv"], collecte=True),
+    Etape("annonces_dep", "SRC/scrap_dep/scraper_logicimmo.py",
+          entrees=["DATA/departements.csv"], sorties=["DATA/annonce.csv"], collecte=True),
+    Etape("urls", "SRC/scrap_ville/1-recup_url.py",
+          entrees=["DATA/1-villes_france.csv"], sorties=["DATA/2-liste_url.csv"], collecte=True),
+    Etape("pages_html", "SRC/scrap_ville/2-copie_page_html.py",
+          entrees=["DATA/2-liste_url.csv"], sorties=["DATA/stock_html"], collecte=True),
+    Etape("extraction", "SRC/scrap_ville/3-extract_du_html.py",
+          entrees=["DATA/stock_html"], sorties=["DATA/3-annonces.csv"]),
+    Etape("formatage", "SRC/scrap_ville/4-formatage_annonces.py",
+          entrees=["DATA/3-annonces.csv"], sorties=["DATA/annonces_france-2.csv"]),
+    Etape("fusion", "SRC/fusion.py",
+          entrees=["DATA/annonces_france-2.csv", "DATA/annonce.csv"],
+          sorties=["DATA/annonceclean.csv", "DATA/annonceclean.parquet"],
+          args=["--csv-1", "DATA/annonces_france-2.csv", "--csv-2", "DATA/annonce.csv",
+                "--sortie", "DATA/annonceclean.csv"]),
+    # remplace le notebook Notebooks/nettoyageVF.ipynb
+    Etape("nettoyage", "SRC/nettoyage.py",
+          entrees=["DATA/annonceclean.csv"],
+          sorties=["DATA/df_analyseVF4.csv", "DATA/df_analyseVF4.parquet"]),
+    # géocodage par Nominatim (réseau, débit limité) : lancé comme une collecte
+    Etape("geocodage", "SRC/5-prep_cood_geo.py",
+          entrees=["DATA/df_analyseVF4.parquet"],
+          sorties=["DATA/annonces_carte.csv", "DATA/annonces_carte.parquet"], collecte=True),
+]
+
+
+# ============================================================
+# 🔑 Empreintes
+# ============================================================
+
+RE_IMPORT = re.compile(r"^\s*(?:from|import)\s+(\w+)", re.MULTILINE)
+
+
+class Empreintes:
+    """
+    sha1 du contenu des fichiers, mémorisé par (taille, date de modification) :
+    un gros CSV inchangé n'est pas relu à chaque lancement.
+    Un dossier (ex. stock_html) est résumé par la liste de ses fichiers avec
+    leur taille et leur date : le relire en entier coûterait plus que l'étape.
+    """
+
+    def __init__(self, connues: dict):
+        self.connues = connues   # chemin -> [taille, mtime_ns, sha1]
+
+    def fichier(self, chemin: Path) -> str | None:
+        if chemin.is_dir():
+            h = hashlib.sha1()
+            for f in sorted(p for p in chemin.rglob("*") if p.is_file()):
+                st = f.stat()
+                h.update(f"{f.relative_to(chemin)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+            return h.hexdigest()
+        if not chemin.exists():
+            return None
+        st = chemin.stat()
+        cle = str(chemin.relative_to(BASE_DIR))
+        connu = self.connues.get(cle)
+        if connu and connu[:2] == [st.st_size, st.st_mtime_ns]:
+            return connu[2]
+        h = hashlib.sha1()
+        with open(chemin, "rb") as f:
+            for bloc in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloc)
+        self.connues[cle] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def code(self, script: Path) -> dict:
+        """Le script et, de proche en proche, les modules de SRC qu'il importe."""
+        vus, a_voir = {}, [script]
+        while a_voir:
+            f = a_voir.pop()
+            if f in vus:
+                continue
+            vus[f] = self.fichier(f)
+            for module in RE_IMPORT.findall(f.read_text(encoding="utf-8")):
+                dep = SRC_DIR / f"{module}.py"
+                if dep.exists():
+                    a_voir.append(dep)
+        return {str(f.relative_to(BASE_DIR)): h for f, h in sorted(vus.items())}
+
+    def etape(self, etape: Etape) -> str:
+        contenu = {
+            "code": self.code(BASE_DIR / etape.script),
+            "entrees": {e: self.fichier(BASE_DIR / e) for e in etape.entrees},
+            "args": etape.args,
+        }
+        return hashlib.sha1(json.dumps(contenu, sort_keys=True).encode()).hexdigest()
+
+    def sorties(self, etape: Etape) -> dict:
+        return {s: self.fichier(BASE_DIR / s) for s in etape.sorties}
+
+
+# ============================================================
+# 🧭 Graphe
+# ============================================================
+
+def dependances(etapes: list) -> dict:
+    """nom -> étapes (parmi `etapes`) qui produisent une de ses entrées."""
+    producteurs = {s: e.nom for e in etapes for s in e.sorties}
+    return {e.nom: {producteurs[x] for x in e.entrees if x in producteurs and producteurs[x] != e.nom}
+            for e in etapes}
+
+
+def choisir(noms: list, collecte: bool) -> list:
+    inconnus = set(noms) - {e.nom for e in ETAPES}
+    if inconnus:
+        raise SystemExit(f"étape inconnue : {', '.join(sorted(inconnus))} "
+                         f"(parmi {', '.join(e.nom for e in ETAPES)})")
+    if noms:
+        return [e for e in ETAPES if e.nom in noms]
+    return [e for e in ETAPES if collecte or not e.collecte]
+
+
+# ============================================================
+# ▶️ Exécution
+# ============================================================
+
+def lancer(etape: Etape) -> tuple:
+    """Lance le script de l'étape depuis la racine ; (code retour, durée, log)."""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    log = LOGS_DIR / f"{etape.nom}.log"
+    debut = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        code = subprocess.run([sys.executable, etape.script, *etape.args], cwd=BASE_DIR,
+                              stdout=f, stderr=subprocess.STDOUT,
+                              env={**os.environ, "PYTHONIOENCODING": "utf-8"}).returncode
+    return code, time.perf_counter() - debut, log
+
+
+def a_jour(etape: Etape, empreinte: str, empreintes: Empreintes, etat: dict) -> bool:
+    precedent = etat["etapes"].get(etape.nom)
+    if not precedent or precedent["empreinte"] != empreinte:
+        return False
+    # sorties supprimées ou modifiées à la main depuis : on relance
+    sorties = empreintes.sorties(etape)
+    return None not in sorties.values() and sorties == precedent["sorties"]
+
+
+ECHECS = ("échec", "non lancée", "entrées absentes")
+
+
+def executer(etapes: list, nb_workers: int, forcer: bool, etat: dict) -> dict:
+    empreintes = Empreintes(etat["fichiers"])
+    deps = dependances(etapes)
+    par_nom = {e.nom: e for e in etapes}
+    bilan = {}   # nom -> (statut, durée)
+    en_cours = {}   # futur -> nom
+    lancees = {}    # nom -> empreinte au lancement
+
+    def sauver():
+        ecrire_atomique(ETAT_PATH, lambda f: json.dump(etat, f, indent=2, ensure_ascii=False))
+
+    def planifier(nom, etape) -> bool:
+        """Décide du sort d'une étape si ses dépendances sont réglées ; False sinon."""
+        if any(bilan.get(d, ("",))[0] in ECHECS for d in deps[nom]):
+            bilan[nom] = ("non lancée", 0.0)
+            print(f"⛔ {nom} : dépendance en échec")
+            return True
+        if not all(d in bilan for d in deps[nom]):
+            return False
+        absentes = [x for x in etape.entrees if not (BASE_DIR / x).exists()]
+        if absentes and all((BASE_DIR / x).exists() for x in etape.sorties):
+            # ex. stock_html vidé par l'extraction : rien de neuf, on garde les sorties
+            bilan[nom] = ("sans entrées", 0.0)
+            print(f"⏭️ {nom} : {', '.join(absentes)} absent(s), sorties existantes gardées")
+            return True
+        if absentes:
+            bilan[nom] = ("entrées absentes", 0.0)
+            print(f"⛔ {nom} : {', '.join(absentes)} absent(s)")
+            return True
+        # entrées prêtes : l'empreinte est calculée maintenant, après
+        # que les étapes amont ont (peut-être) réécrit leurs sorties
+        empreinte = empreintes.etape(etape)
+        if not forcer and a_jour(etape, empreinte, empreintes, etat):
+            bilan[nom] = ("à jour", 0.0)
+            print(f"⏭️ {nom} : à jour")
+            return True
+        print(f"▶️ {nom} : {etape.script} {' '.join(etape.args)}")
+        lancees[nom] = empreinte
+        en_cours[pool.submit(lancer, etape)] = nom
+        return True
+
+    with ThreadPoolExecutor(max_workers=nb_workers) as pool:
+        while len(bilan) < len(etapes):
+            prets = True
+            while prets:   # une décision peut en débloquer d'autres
+                prets = False
+                for nom, etape in par_nom.items():
+                    if nom in bilan or nom in lancees:
+                        continue
+                    if planifier(nom, etape):
+                        prets = True
+
+            if not en_cours:
+                if len(bilan) < len(etapes):
+                    raise RuntimeError(f"dépendances circulaires entre : {', '.join(set(par_nom) - set(bilan))}")
+                break
+            finis, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for futur in finis:
+                nom = en_cours.pop(futur)
+                code, duree, log = futur.result()
+                if code != 0:
+                    bilan[nom] = ("échec", duree)
+                    print(f"❌ {nom} : code {code} en {duree:.1f} s (voir {log.relative_to(BASE_DIR)})")
+                    continue
+                bilan[nom] = ("lancée", duree)
+                etat["etapes"][nom] = {
+                    "empreinte": lancees[nom],
+                    "sorties": empreintes.sorties(par_nom[nom]),
+                    "duree_s": round(duree, 2),
+                    "horodatage": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                sauver()
+                print(f"✅ {nom} : {duree:.1f} s")
+    sauver()
+    return bilan
+
+
+def afficher_bilan(bilan: dict, total: float):
+    print(f"\n{'étape':14} {'statut':17} {'durée':>9}")
+    for nom, (statut, duree) in bilan.items():
+        print(f"{nom:14} {statut:17} {duree:>8.1f}s")
+    cumul = sum(d for _, d in bilan.values())
+    print(f"{'total':14} {'':17} {total:>8.1f}s  (somme des étapes : {cumul:.1f} s)")
+
+
+def afficher_liste(etapes: list, etat: dict):
+    deps = dependances(ETAPES)
+    choisies = {e.nom for e in etapes}
+    produites = {s for e in etapes for s in e.sorties}
+    empreintes = Empreintes(etat["fichiers"])
+    for e in ETAPES:
+        precedent = etat["etapes"].get(e.nom)
+        absentes = [x for x in e.entrees if not (BASE_DIR / x).exists()]
+        if e.nom not in choisies:
+            statut = "hors sélection"
+        elif any(x in produites for x in absentes):
+            statut = "après l'amont"
+        elif absentes:
+            statut = "entrées absentes"
+        elif a_jour(e, empreintes.etape(e), empreintes, etat):
+            statut = "à jour"
+        else:
+            statut = "à relancer"
+        duree = f"{precedent['duree_s']:.1f} s" if precedent else "-"
+        apres = ", ".join(sorted(deps[e.nom])) or "-"
+        print(f"{e.nom:14} {statut:17} {duree:>9}  après : {apres}{'  (collecte)' if e.collecte else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chaîne complète, étapes mises en cache et parallélisées.")
+    parser.add_argument("etapes", nargs="*", help="étapes à lancer (défaut : toutes, hors collecte)")
+    parser.add_argument("--collecte", action="store_true", help="inclure les étapes de collecte (réseau)")
+    parser.add_argument("--forcer", action="store_true", help="relancer même les étapes à jour")
+    parser.add_argument("-j", "--workers", type=int, default=2, help="étapes lancées en même temps (défaut : 2)")
+    parser.add_argument("--liste", action="store_true", help="afficher les étapes et leur état, sans rien lancer")
+    args = parser.parse_args()
+
+    etat = {"etapes": {}, "fichiers": {}}
+    if ETAT_PATH.exists():
+        etat.update(json.loads(ETAT_PATH.read_text(encoding="utf-8")))
+    etapes = choisir(args.etapes, args.collecte)
+
+    if args.liste:
+        afficher_liste(etapes, etat)
+        return 0
+
+    debut = time.perf_counter()
+    bilan = executer(etapes, max(1, args.workers), args.forcer, etat)
+    afficher_bilan(bilan, time.perf_counter() - debut)
+    return 1 if any(statut in ECHECS for statut, _ in bilan.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
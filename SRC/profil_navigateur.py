@@ -0,0 +1,108 @@
+# SRC/profil_navigateur.py
+# Profil de navigateur persistant (cookies + localStorage) partagé entre runs
+# et entre workers. Le format est celui du "storage state" de Playwright ;
+# des conversions permettent de l'utiliser aussi avec Selenium.
+# Le bandeau cookies n'est donc accepté qu'une fois par profil, pas à chaque page.
+
+import os
+import json
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+STORAGE_STATE_PATH = BASE_DIR / "DATA" / "storage_state.json"
+
+
+def charger_etat(chemin=STORAGE_STATE_PATH):
+    """Renvoie le storage state enregistré, ou None s'il n'existe pas encore."""
+    chemin = Path(chemin)
+    if not chemin.exists():
+        return None
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sauver_etat(etat: dict, chemin=STORAGE_STATE_PATH):
+    """Écriture atomique (plusieurs workers peuvent écrire le même profil)."""
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    tmp = chemin.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, chemin)
+
+
+# Traces du consentement (Usercentrics, et IAB TCF au cas où la plateforme change)
+# dans les cookies ou le localStorage : noms de clés.
+CLES_CONSENTEMENT = {"uc_user_interaction", "uc_settings", "ucData", "euconsent-v2"}
+
+
+def consentement_present(etat) -> bool:
+    """
+    True si le profil contient réellement le consentement cookies. Un profil
+    enregistré sans lui (cookies anti-bot seulement, popup jamais cliquée)
+    ne dispense pas de chercher la popup.
+    """
+    if not etat:
+        return False
+    noms = {c.get("name") for c in etat.get("cookies", [])}
+    for o in etat.get("origins", []):
+        noms.update(item.get("name") for item in o.get("localStorage", []))
+    return bool(noms & CLES_CONSENTEMENT)
+
+
+def etat_playwright(chemin=STORAGE_STATE_PATH):
+    """Chemin à passer à browser.new_context(storage_state=…), ou None."""
+    return str(chemin) if Path(chemin).exists() else None
+
+
+# ---- Selenium ----
+
+def capturer_etat_selenium(driver) -> dict:
+    """Cookies + localStorage de l'origine courante, au format Playwright."""
+    cookies = []
+    for c in driver.get_cookies():
+        cookies.append({
+            "name": c["name"],
+            "value": c["value"],
+            "domain": c.get("domain", ""),
+            "path": c.get("path", "/"),
+            "expires": c.get("expiry", -1),
+            "httpOnly": c.get("httpOnly", False),
+            "secure": c.get("secure", False),
+            "sameSite": c.get("sameSite", "Lax"),
+        })
+
+    origine = driver.execute_script("return window.location.origin;")
+    stockage = driver.execute_script(
+        "return Object.keys(localStorage).map(k => ({name: k, value: localStorage.getItem(k)}));"
+    )
+    return {"cookies": cookies, "origins": [{"origin": origine, "localStorage": stockage}]}
+
+
+def appliquer_etat_selenium(driver, etat: dict) -> int:
+    """
+    Injecte le profil dans un driver déjà positionné sur le site (Selenium
+    n'accepte que les cookies du domaine courant). Renvoie le nombre de cookies posés.
+    """
+    poses = 0
+    for c in etat.get("cookies", []):
+        cookie = {k: c[k] for k in ("name", "value", "path", "secure", "httpOnly") if k in c}
+        cookie["domain"] = c.get("domain", "")
+        if c.get("expires", -1) > 0:
+            cookie["expiry"] = int(c["expires"])
+        if c.get("sameSite") in ("Strict", "Lax", "None"):
+            cookie["sameSite"] = c["sameSite"]
+        try:
+            driver.add_cookie(cookie)
+            poses += 1
+        except Exception:
+            pass  # cookie d'un autre domaine (tiers) : ignoré
+
+    origine = driver.execute_script("return window.location.origin;")
+    for o in etat.get("origins", []):
+        if o.get("origin") != origine:
+            continue
+        for item in o.get("localStorage", []):
+            driver.execute_script("localStorage.setItem(arguments[0], arguments[1]);",
+                                  item["name"], item["value"])
+    return poses
@@ -0,0 +1,136 @@
+# SRC/rapprochement.py
+# Rapprochement des quasi-doublons entre sources : la même annonce, collectée
+# une fois par département (annonce.csv) et une fois par ville (annonce2.csv),
+# arrive avec un prix un peu différent, une surface arrondie, une adresse
+# écrite autrement. drop_duplicates ne la voit pas ; elle compte deux fois
+# dans les médianes.
+#
+# Comparer toutes les paires coûterait n² ; on ne compare que les annonces
+# d'un même bloc :
+#   code postal × type de bien × seau de surface (±1 seau voisin)
+# Les seaux sont logarithmiques (LARGEUR_SEAU = 5 % de surface) : deux
+# surfaces à moins de 5 % l'une de l'autre tombent dans le même seau ou dans
+# deux seaux voisins. Les blocs restent petits : le travail croît avec n.
+#
+# Dans un bloc, une paire est un quasi-doublon si :
+#   - les prix diffèrent de moins de TOL_PRIX (en relatif),
+#   - les surfaces de moins de max(TOL_SURFACE_MIN m², TOL_SURFACE),
+#   - les nombres de pièces sont égaux (ou l'un des deux manque),
+#   - et, les deux écarts pris ensemble, le score atteint SEUIL_SCORE : une
+#     paire au bord des deux tolérances à la fois (deux lots voisins d'un
+#     programme neuf, souvent) n'est pas retenue.
+#
+# Usage (rapport sur un fichier, sans rien modifier) :
+#   python SRC/rapprochement.py
+#   python SRC/rapprochement.py --source DATA/annonceclean.csv --exemples 10
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nettoyage import code_postal
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SOURCE_CSV = BASE_DIR / "DATA" / "annonceclean.csv"
+
+LARGEUR_SEAU = 0.05      # largeur relative d'un seau de surface (≥ tolérances ci-dessous)
+TOL_PRIX = 0.03          # 3 % d'écart de prix
+TOL_SURFACE = 0.03       # 3 % d'écart de surface…
+TOL_SURFACE_MIN = 0.5    # …ou 0,5 m² (arrondi d'une petite surface)
+SEUIL_SCORE = 0.5
+
+CLES_BLOC = ["cp", "type", "seau"]
+
+
+# ============================================================
+# 🧱 Blocs
+# ============================================================
+
+def blocs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonnes utiles au rapprochement, en types compacts, sur l'index de `df`.
+    Les annonces sans code postal, prix ou surface ne sont rapprochées de rien.
+    """
+    b = pd.DataFrame({
+        "cp": pd.to_numeric(code_postal(df["adresse"].astype(str)), errors="coerce"),
+        "type": df["type_bien"].astype(str).str.strip().str.casefold(),
+        "prix": pd.to_numeric(df["prix"], errors="coerce"),
+        "surface": pd.to_numeric(df["surface"], errors="coerce"),
+        "pieces": pd.to_numeric(df["pieces"], errors="coerce").astype("float32"),
+    }, index=df.index).dropna(subset=["cp", "prix", "surface"])
+    b = b[b["surface"] > 0]
+    b["cp"] = b["cp"].astype("int32")
+    b["seau"] = np.floor(np.log(b["surface"]) / np.log1p(LARGEUR_SEAU)).astype("int16")
+    return b
+
+
+# ============================================================
+# 🔗 Paires
+# ============================================================
+
+def paires(gauche: pd.DataFrame, droite: pd.DataFrame, meme=False) -> pd.DataFrame:
+    """
+    Quasi-doublons entre deux tables de blocs() : (id_g, id_d, score), un
+    score de 1 pour deux annonces identiques, proche de 0 à la limite des
+    tolérances. meme=True : gauche et droite sont la même table (paires id_g < id_d).
+    """
+    # chaque annonce de droite est cherchée dans son seau et les deux voisins
+    voisins = pd.concat([droite.assign(seau=droite["seau"] + k) for k in (-1, 0, 1)])
+    p = gauche.rename_axis("id_g").reset_index().merge(
+        voisins.rename_axis("id_d").reset_index(), on=CLES_BLOC, suffixes=("_g", "_d"))
+    if meme:
+        p = p[p["id_g"] < p["id_d"]]
+
+    ecart_prix = (p["prix_g"] - p["prix_d"]).abs() / np.maximum(p["prix_g"], p["prix_d"])
+    ecart_surface = (p["surface_g"] - p["surface_d"]).abs()
+    tol_surface = np.maximum(TOL_SURFACE_MIN, TOL_SURFACE * np.maximum(p["surface_g"], p["surface_d"]))
+    pieces_ok = p["pieces_g"].isna() | p["pieces_d"].isna() | (p["pieces_g"] == p["pieces_d"])
+
+    score = 1 - (ecart_prix / TOL_PRIX + ecart_surface / tol_surface) / 2
+    ok = (ecart_prix <= TOL_PRIX) & (ecart_surface <= tol_surface) & pieces_ok & (score >= SEUIL_SCORE)
+    return pd.DataFrame({"id_g": p["id_g"], "id_d": p["id_d"], "score": score})[ok.to_numpy()] \
+        .drop_duplicates(subset=["id_g", "id_d"]).reset_index(drop=True)
+
+
+def quasi_doublons(reference: pd.DataFrame, df: pd.DataFrame) -> pd.Series:
+    """
+    Masque des lignes de `df` qui sont un quasi-doublon d'une annonce de
+    `reference` (une table blocs(), par ex. la source déjà fusionnée).
+    """
+    trouves = paires(reference, blocs(df))["id_d"]
+    return pd.Series(df.index.isin(trouves), index=df.index)
+
+
+# ============================================================
+# 📋 Rapport
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Quasi-doublons d'un fichier d'annonces (rapport).")
+    parser.add_argument("--source", default=str(SOURCE_CSV))
+    parser.add_argument("--exemples", type=int, default=5, help="paires à afficher")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.source, dtype={"departement_code": str})
+    debut = time.perf_counter()
+    b = blocs(df)
+    p = paires(b, b, meme=True)
+    duree = time.perf_counter() - debut
+
+    tailles = b.groupby(CLES_BLOC).size()
+    print(f"{len(df)} annonces, {len(b)} rapprochables, {len(tailles)} blocs "
+          f"(taille moyenne {tailles.mean():.1f}, max {tailles.max()})")
+    print(f"{len(p)} paires de quasi-doublons, {p['id_d'].nunique()} annonces en double, en {duree:.2f} s")
+    colonnes = ["prix", "surface", "pieces", "adresse"]
+    for _, paire in p.sort_values("score").head(args.exemples).iterrows():
+        g, d = df.loc[paire["id_g"], colonnes], df.loc[paire["id_d"], colonnes]
+        print(f"  {paire['score']:.2f}  {' | '.join(map(str, g))}\n        {' | '.join(map(str, d))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# SRC/scrap_dep/bench_parse_alt.py
+# Micro-benchmark : parse_from_alt (une annonce à la fois) contre parse_alts
+# (par lot), sur les ALT reconstruits depuis DATA/annonce.csv, mélangés à des
+# ALT qui ne sont pas des annonces (logos, photos…) comme sur une vraie page.
+# Vérifie d'abord que les deux donnent exactement les mêmes annonces.
+#
+# Usage :
+#   python SRC/scrap_dep/bench_parse_alt.py
+#   python SRC/scrap_dep/bench_parse_alt.py --bruit 3 --repetitions 5
+
+import sys
+import csv
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from parse_alt import parse_from_alt, parse_alts, en_lignes, COLONNES_ALT  # noqa: E402
+from serveur_rejeu import alt_annonce, ANNONCES_CSV  # noqa: E402
+from snapshots import MagasinSnapshots  # noqa: E402
+from empreintes import RE_ALT_ANNONCE  # noqa: E402
+
+SNAPSHOTS_DIR = Path(__file__).resolve().parents[2] / "DATA" / "snapshots"
+
+# ALT rencontrés sur les pages de résultats qui ne sont pas des annonces
+ALT_BRUIT = [
+    "", "Logo", "logo agence", "Logic-Immo", "Photo 2", "Photo 3 sur 12",
+    "Agence Century 21 Centre Ville", "Voir le numéro", "Exclusivité",
+    "Plan de l'appartement", "Vue extérieure", "Notre sélection à vendre",
+]
+
+
+def corpus_alts(nb_bruit: int, graine=0):
+    """(liste d'ALT, lignes attendues) : chaque annonce suivie de nb_bruit ALT parasites."""
+    rng = random.Random(graine)
+    alts, attendues = [], []
+    with open(ANNONCES_CSV, newline="", encoding="utf-8") as f:
+        for ligne in csv.DictReader(f):
+            alts.append(alt_annonce(ligne))
+            attendues.append({c: ligne[c] or None for c in COLONNES_ALT})
+            alts.extend(rng.choice(ALT_BRUIT) for _ in range(nb_bruit))
+    return alts, attendues
+
+
+def alts_snapshots():
+    """ALT contenant un prix dans les pages réellement capturées (s'il y en a)."""
+    if not (SNAPSHOTS_DIR / "index.csv").exists():
+        return []
+    alts = []
+    for snap in MagasinSnapshots(SNAPSHOTS_DIR).iterer():
+        alts.extend(RE_ALT_ANNONCE.findall(snap.html()))
+    return alts
+
+
+def ancienne_version(alts):
+    return [ad for ad in map(parse_from_alt, alts) if ad]
+
+
+def nouvelle_version(alts):
+    return en_lignes(parse_alts(alts))
+
+
+def chronometrer(fonction, alts, repetitions: int) -> float:
+    """Meilleur temps sur `repetitions` essais (secondes)."""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction(alts)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse_from_alt vs parse_alts.")
+    parser.add_argument("--bruit", type=int, default=4, help="ALT parasites par annonce")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    alts, attendues = corpus_alts(args.bruit)
+    alts += alts_snapshots()
+    print(f"{len(alts)} ALT ({len(attendues)} annonces de annonce.csv, {args.bruit} parasites par annonce)")
+
+    # 1) Même sortie
+    ancien, nouveau = ancienne_version(alts), nouvelle_version(alts)
+    if ancien != nouveau:
+        diff = next(i for i, (a, b) in enumerate(zip(ancien, nouveau)) if a != b)
+        print(f"❌ Sorties différentes (annonce {diff}) : {ancien[diff]} != {nouveau[diff]}")
+        return 1
+    if nouveau[:len(attendues)] != attendues:
+        print("❌ Les annonces relues ne correspondent pas à annonce.csv")
+        return 1
+    print(f"✔️ Sorties identiques : {len(nouveau)} annonces")
+
+    # 2) Vitesse
+    t_ancien = chronometrer(ancienne_version, alts, args.repetitions)
+    t_nouveau = chronometrer(nouvelle_version, alts, args.repetitions)
+    t_colonnes = chronometrer(parse_alts, alts, args.repetitions)
+    print(f"parse_from_alt        : {t_ancien * 1e3:8.1f} ms ({len(alts) / t_ancien / 1e3:6.0f} k ALT/s)")
+    print(f"parse_alts + en_lignes: {t_nouveau * 1e3:8.1f} ms ({len(alts) / t_nouveau / 1e3:6.0f} k ALT/s)")
+    print(f"parse_alts (colonnes) : {t_colonnes * 1e3:8.1f} ms ({len(alts) / t_colonnes / 1e3:6.0f} k ALT/s)")
+    print(f"Gain : x{t_ancien / t_colonnes:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# SRC/scrap_dep/bench_scraper.py
+# Benchmark hors-ligne du crawl par département : scraper_logicimmo est dirigé
+# vers le serveur de rejeu (SRC/serveur_rejeu.py) et on mesure pages/s et
+# annonces/s pour chaque mode de récupération (FETCH_MODE "http" / "browser").
+#
+# Usage :
+#   python SRC/scrap_dep/bench_scraper.py --modes http browser --deps 5 --pages 4
+#   python SRC/scrap_dep/bench_scraper.py --latence 0.3 --taux-erreur 0.05 --json DATA/bench.jsonl
+#   python SRC/scrap_dep/bench_scraper.py --url http://127.0.0.1:8765   (serveur déjà lancé)
+
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from serveur_rejeu import demarrer, DEPARTEMENTS_CSV  # noqa: E402
+
+MODES = ("http", "browser")
+
+
+def lire_departements(nb: int) -> list:
+    with open(DEPARTEMENTS_CSV, newline="", encoding="utf-8") as f:
+        return [ligne["url"] for ligne in csv.DictReader(f)][:nb]
+
+
+def bencher(scraper, mode: str, urls: list, nb_workers: int) -> dict:
+    """Collecte tous les départements de `urls` dans un mode ; renvoie les compteurs."""
+    client = scraper.ClientHTTP(max_connexions=max(nb_workers, 2)) if mode == "http" else None
+
+    # Un navigateur par worker ; en mode browser ils sont lancés avant le chrono
+    navigateurs = queue.Queue()
+    for _ in range(nb_workers):
+        nav = scraper.LazyBrowser()
+        if mode == "browser":
+            nav.driver
+        navigateurs.put(nav)
+
+    verrou = threading.Lock()
+    compteurs = {"pages": 0, "annonces": 0, "erreurs": 0}
+
+    def on_page(page, ads_page, pret_s, etat):
+        with verrou:
+            compteurs["pages"] += 1
+            compteurs["annonces"] += len(ads_page)
+        return False
+
+    def un_departement(url):
+        nav = navigateurs.get()
+        try:
+            if mode == "http":
+                scraper.collect_ads_http(client, nav, url, on_page=on_page)
+            else:
+                scraper.collect_ads_for_department(nav.driver, url, on_page=on_page)
+        except Exception as exc:
+            print(f"  ❌ {url} : {exc}")
+            with verrou:
+                compteurs["erreurs"] += 1
+        finally:
+            navigateurs.put(nav)
+
+    debut = time.monotonic()
+    with ThreadPoolExecutor(max_workers=nb_workers) as pool:
+        list(pool.map(un_departement, urls))
+    duree = time.monotonic() - debut
+
+    while not navigateurs.empty():
+        navigateurs.get().quit()
+    resultat = {
+        "mode": mode,
+        "workers": nb_workers,
+        "departements": len(urls),
+        **compteurs,
+        "duree_s": round(duree, 2),
+        "pages_s": round(compteurs["pages"] / duree, 2) if duree else 0.0,
+        "annonces_s": round(compteurs["annonces"] / duree, 1) if duree else 0.0,
+    }
+    if client is not None:
+        resultat["octets_http"] = client.octets_recus
+        client.close()
+    return resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne de scraper_logicimmo.")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--deps", type=int, default=5, help="nombre de départements")
+    parser.add_argument("--pages", type=int, default=4, help="pages max par département")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--url", help="serveur de rejeu déjà lancé (sinon démarré ici)")
+    parser.add_argument("--latence", type=float, default=0.0)
+    parser.add_argument("--taux-erreur", type=float, default=0.0)
+    parser.add_argument("--taux-blocage", type=float, default=0.0)
+    parser.add_argument("--json", help="ajoute les résultats à ce fichier JSONL (suivi des régressions)")
+    args = parser.parse_args()
+
+    serveur = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        serveur = demarrer(latence=args.latence, taux_erreur=args.taux_erreur,
+                           taux_blocage=args.taux_blocage)
+        base_url = serveur.base_url
+
+    # BASE_URL est lu à l'import du scraper : on le fixe avant
+    os.environ["LOGICIMMO_BASE_URL"] = base_url
+    import scraper_logicimmo as scraper
+    scraper.NB_PAGES_PAR_DEPARTEMENT = args.pages
+    # Pas de bandeau cookies sur le rejeu : on ne l'attend pas, et on ne
+    # mélange pas le profil navigateur partagé avec des cookies de 127.0.0.1
+    scraper.accept_cookies_if_present = lambda driver, timeout=None: None
+
+    urls = lire_departements(args.deps)
+    print(f"🎬 Rejeu {base_url} : {len(urls)} départements, {args.pages} pages max, "
+          f"{args.workers} worker(s)")
+
+    resultats = []
+    for mode in args.modes:
+        print(f"\n=== Mode {mode} ===")
+        resultats.append(bencher(scraper, mode, urls, args.workers))
+
+    print(f"\n{'mode':8} {'pages':>6} {'annonces':>9} {'durée (s)':>10} {'pages/s':>8} {'annonces/s':>11} {'erreurs':>8}")
+    for r in resultats:
+        print(f"{r['mode']:8} {r['pages']:>6} {r['annonces']:>9} {r['duree_s']:>10.2f} "
+              f"{r['pages_s']:>8.2f} {r['annonces_s']:>11.1f} {r['erreurs']:>8}")
+
+    if args.json:
+        horodatage = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(args.json, "a", encoding="utf-8") as f:
+            for r in resultats:
+                f.write(json.dumps({"horodatage": horodatage, "latence": args.latence, **r}) + "\n")
+
+    if serveur is not None:
+        print(f"\nRéponses du serveur : {serveur.compteurs}")
+        serveur.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,15 @@
+import os
 import re
+import sys
+import csv
 import time
+import shutil
+import queue
 import random
+import weakref
+import threading
 import pandas as pd
-from bs4 import BeautifulSoup
+from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
@@ -11,6 +18,23 @@ from webdriver_manager.firefox import GeckoDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+# Modules partagés (SRC/)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from limiteur import LimiteurDebit  # noqa: E402
+from client_http import ClientHTTP, has_listing_cards  # noqa: E402
+from file_travail import FileTravail, FILE_PATH, DEPARTEMENT  # noqa: E402
+from journal import JournalCrawl, OK, VIDE, ERREUR, INCHANGEE  # noqa: E402
+from sortie import SortieLots, FSYNC_LOT, FSYNC_FERMETURE  # noqa: E402
+from empreintes import EmpreintesPages, cle_annonce, NOUVELLE, INCHANGEE as PAGE_IDENTIQUE  # noqa: E402
+from telemetrie import Telemetrie, etat_page  # noqa: E402
+from parse_alt import parse_alts, en_lignes  # noqa: E402
+from analyse_html import alts_images  # noqa: E402
+from profil_navigateur import (  # noqa: E402
+    STORAGE_STATE_PATH, charger_etat, sauver_etat,
+    capturer_etat_selenium, appliquer_etat_selenium, consentement_present,
+)
 
 
 # ============================================================
@@ -18,94 +42,132 @@ from selenium.webdriver.support import expected_conditions as EC
 # ============================================================
 
 INPUT_CSV = "DATA/departements.csv"
-OUTPUT_CSV = "annonce.csv"
+OUTPUT_CSV = "DATA/annonce.csv"     # lu par SRC/fusion.py (CSV_2)
+
+# Reprise : chaque page terminée est notée dans JOURNAL_CSV et ses annonces
+# sont écrites tout de suite dans PARTS_DIR/<code>.csv. Relancer le script
+# reprend à la première page non terminée ; RESET_JOURNAL = True repart de zéro.
+JOURNAL_CSV = "DATA/journal_crawl.csv"
+PARTS_DIR = "DATA/annonce_parts"
+RESET_JOURNAL = False
+
+# Recrawl incrémental : une page identique au run précédent (ou sans annonce
+# nouvelle) arrête la pagination du département ; seules les annonces jamais
+# vues sont écrites, à la suite de PARTS_DIR (OUTPUT_CSV garde l'historique).
+# Quand le journal a fini tous les départements, un nouveau run y est ouvert
+# (RESET_JOURNAL en fait autant, sans effacer PARTS_DIR).
+# Empreintes gardées dans EMPREINTES_JSON.
+INCREMENTAL = False
+EMPREINTES_JSON = "DATA/empreintes_pages.json"
+
+# Écriture par lots (mémoire bornée). OUTPUT_CSV peut aussi finir en .parquet.
+TAILLE_LOT_SORTIE = 5000
 
-START_DEPARTEMENT_CODE = None
 NB_DEPARTEMENTS_A_SCRAPER = None     # Mets None pour tout faire (après test)
 NB_PAGES_PAR_DEPARTEMENT = 4      # Max pages à tenter (stop si page vide)
 
-# Pauses (anti-blocage “soft”)
-SLEEP_BETWEEN_PAGES = (4.1, 6.6)      # secondes
+# Pause entre deux départements (mode séquentiel uniquement)
 SLEEP_BETWEEN_DEPS = (10, 20)     # secondes
 
+# Politesse : limite globale par hôte (DEBIT_PAR_HOTE requêtes / seconde, tous
+# workers confondus). Elle remplace les pauses fixes entre les pages.
+# Mode parallèle : NB_WORKERS navigateurs se partagent la file des départements.
+NB_WORKERS = 1                    # 1 = mode séquentiel historique
+DEBIT_PAR_HOTE = 0.2              # ≈ 1 page toutes les 5 s pour tout le run
+RAFALE_PAR_HOTE = 1
+
+# Page "prête" = cartes d'annonces affichées, page vide ou page bloquée.
+# Au-delà de PAGE_READY_TIMEOUT secondes on lit le DOM tel quel.
+PAGE_READY_TIMEOUT = 15
+COOKIES_TIMEOUT = 3
+
+# File de travail SQLite (SRC/file_travail.py) au lieu de INPUT_CSV : plusieurs
+# processus, voire plusieurs machines partageant le fichier, la vident ensemble.
+# Remplir d'abord : python SRC/file_travail.py remplir-departements
+TELEMETRIE_JSONL = "DATA/telemetrie.jsonl"   # None = pas de télémétrie
+# Résumé : python SRC/telemetrie.py --script scraper_logicimmo
+
+USE_WORK_QUEUE = False
+WORK_QUEUE_PATH = FILE_PATH
+DUREE_BAIL = 900                  # s avant qu'un département non terminé soit repris
+
+# Mode de récupération des pages :
+#   "browser" : Firefox pour chaque page (historique)
+#   "http"    : client HTTP keep-alive, Firefox seulement si la réponse
+#               ne contient aucune carte d'annonce (blocage, rendu JS…)
+FETCH_MODE = "browser"
+
+# Moteur d'analyse HTML ("auto", "selectolax", "strainer", "html.parser"… voir SRC/analyse_html.py)
+# None = variable d'environnement PARSEUR_HTML, sinon "auto"
+MOTEUR_HTML = None
+
+# Racine du site (surchargeable pour viser un serveur local hors-ligne)
+BASE_URL = os.environ.get("LOGICIMMO_BASE_URL", "https://www.logic-immo.com").rstrip("/")
+
+# Remplacée dans main() par une télémétrie qui écrit dans TELEMETRIE_JSONL
+TELEMETRIE = Telemetrie(None, "scraper_logicimmo")
+
 
 # ============================================================
 # 🍪 Cookies (Usercentrics)
 # ============================================================
 
-def accept_cookies_if_present(driver, timeout=8):
+COOKIES_BUTTON = (By.XPATH, "//button[contains(., 'Tout accepter')]")
+
+# Drivers qui ont déjà le consentement (profil chargé ou clic fait)
+drivers_avec_consentement = weakref.WeakSet()
+verrou_profil = threading.Lock()
+
+
+def accept_cookies_if_present(driver, timeout=COOKIES_TIMEOUT):
     """
     Clique sur "Tout accepter" si la popup cookies est affichée.
     Ne fait rien si elle n'est pas présente.
+    Le consentement est enregistré dans le profil partagé (STORAGE_STATE_PATH) :
+    les runs et workers suivants le rechargent au lieu d'attendre la popup.
     """
+    if driver in drivers_avec_consentement:
+        return
+
+    with verrou_profil:
+        etat = charger_etat(STORAGE_STATE_PATH)
+    if etat:
+        appliquer_etat_selenium(driver, etat)
+        if consentement_present(etat):
+            drivers_avec_consentement.add(driver)
+            print("      🍪 Profil navigateur rechargé (consentement déjà donné)")
+            return
+        # profil sans consentement : on cherche quand même la popup
+
     try:
         wait = WebDriverWait(driver, timeout)
 
         # Bouton "Tout accepter"
-        btn = wait.until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Tout accepter')]"))
-        )
+        btn = wait.until(EC.element_to_be_clickable(COOKIES_BUTTON))
         btn.click()
-        time.sleep(1.5)
+        wait.until(EC.invisibility_of_element_located(COOKIES_BUTTON))
         print("      ✅ Cookies acceptés")
+
+        with verrou_profil:
+            sauver_etat(capturer_etat_selenium(driver), STORAGE_STATE_PATH)
+        drivers_avec_consentement.add(driver)
     except Exception:
         # Pas de popup, ou déjà accepté
         pass
 
 
 # ============================================================
-# 🧠 Parsing ALT
+# 🔗 URL pagination
 # ============================================================
 
-def parse_from_alt(alt: str) -> dict | None:
-    """
-    Retourne un dict si l'annonce correspond à nos types + prix + surface + adresse,
-    sinon None.
-    """
-
-    # Type + sous-type
-    if "Appartement à vendre" in alt:
-        type_bien, sous_type = "Appartement", "Appartement"
-    elif "Duplex à vendre" in alt:
-        type_bien, sous_type = "Appartement", "Duplex"
-    elif "Maison à vendre" in alt:
-        type_bien, sous_type = "Maison", "Maison"
-    elif "Pavillon à vendre" in alt:
-        type_bien, sous_type = "Maison", "Pavillon"
-    else:
-        return None
-
-    # Prix
-    m_price = re.search(r"(\d[\d\s ]+)\s*€", alt)  # inclut l'espace fine insécable ( )
-    # Surface (pas terrain)
-    m_surface = re.search(r"(\d[\d\s,]+)\s*m²(?!\s*de terrain)", alt)
-    # Pièces
-    m_pieces = re.search(r"(\d+)\s+pièce", alt, flags=re.IGNORECASE)
-    # Adresse ville + CP (gère Lyon 3ème 69003 / LYON 3EME, 69003)
-    m_addr = re.findall(r"([A-ZÀ-Ý][A-Za-z0-9À-ÿ\-' ]+)\s*,?\s*\(?(\d{5})\)?", alt)
-
-    if not (m_price and m_surface and m_addr):
-        return None
-
-    ville, cp = m_addr[-1]
-
-    return {
-        "prix": m_price.group(1).strip(),
-        "surface": m_surface.group(1).strip(),
-        "pieces": m_pieces.group(1) if m_pieces else None,
-        "adresse": f"{ville.strip()} ({cp})",
-        "type_bien": type_bien,
-        "sous_type": sous_type,
-    }
+def rebase_url(url: str) -> str:
+    """Remplace le schéma + hôte de `url` par BASE_URL."""
+    return re.sub(r"^https?://[^/]+", BASE_URL, url)
 
 
-# ============================================================
-# 🔗 URL pagination
-# ============================================================
-
 def build_page_url(base_url: str, page: int) -> str:
     if page == 1:
-        return base_url
+        return rebase_url(base_url)
 
     m = re.search(r"(ad\d+\w+)$", base_url.lower())
     if not m:
@@ -114,7 +176,7 @@ def build_page_url(base_url: str, page: int) -> str:
     ad_code = m.group(1).upper()
 
     return (
-        "https://www.logic-immo.com/classified-search"
+        f"{BASE_URL}/classified-search"
         f"?distributionTypes=Buy&locations={ad_code}&page={page}&order=DateDesc"
     )
 
@@ -134,39 +196,142 @@ def parse_dep(nom: str):
 # 🌍 Scraping d'un département
 # ============================================================
 
-def collect_ads_for_department(driver, base_url: str) -> list:
+def extract_ads(html: str) -> list:
+    """Annonces valides trouvées dans les ALT des images d'une page."""
+    return en_lignes(parse_alts(alts_images(html, MOTEUR_HTML)))
+
+
+# Marqueurs de fin d'attente (le premier trouvé gagne)
+READY_MARKERS = [
+    ("annonces", By.CSS_SELECTOR, "div[data-testid*='classified-card'] img[alt]"),
+    ("bloquee", By.CSS_SELECTOR, "iframe[src*='captcha-delivery']"),  # DataDome
+    ("vide", By.XPATH, "//*[self::h1 or self::h2 or self::p]"
+                       "[contains(., 'Aucune annonce') or contains(., 'Aucun résultat')]"),
+]
+
+
+def wait_page_ready(driver, timeout=PAGE_READY_TIMEOUT):
+    """
+    Attend qu'un des READY_MARKERS apparaisse au lieu de dormir un temps fixe.
+    Renvoie (état, secondes d'attente) ; état = "timeout" si rien n'est venu.
+    """
+    debut = time.monotonic()
+
+    def etat_page(d):
+        for etat, by, selecteur in READY_MARKERS:
+            if d.find_elements(by, selecteur):
+                return etat
+        return False
+
+    try:
+        etat = WebDriverWait(driver, timeout, poll_frequency=0.2).until(etat_page)
+    except TimeoutException:
+        etat = "timeout"
+    return etat, time.monotonic() - debut
+
+
+def load_page_with_browser(driver, url: str, check_cookies: bool, chrono=None):
+    """
+    Charge `url` dans Firefox et renvoie (HTML rendu, état, secondes avant
+    que la page soit prête). La politesse est gérée par le limiteur, pas ici.
+    `chrono` (télémétrie) sépare la navigation de l'attente du rendu.
+    """
+    debut = time.monotonic()
+    driver.get(url)
+    if chrono is not None:
+        chrono.top("nav")
+
+    # On gère la popup cookies une seule fois au début du run (ou au besoin)
+    if check_cookies:
+        accept_cookies_if_present(driver)
+
+    etat, _ = wait_page_ready(driver)
+    pret_s = time.monotonic() - debut
+    if chrono is not None:
+        chrono.top("attente")
+    print(f"      Page {etat} en {pret_s:.1f} s")
+    if etat == "bloquee":
+        print("      ⚠️ Page bloquée (captcha)")
+
+    return driver.page_source, etat, pret_s
+
+
+def collect_ads_for_department(driver, base_url: str, limiteur=None, start_page=1, on_page=None) -> list:
+    """
+    Récupère les annonces des pages d'un département.
+    `limiteur` (LimiteurDebit partagé) espace les requêtes vers le site.
+    `on_page(page, ads_page, pret_s, etat)` est appelé après chaque page (écriture + journal),
+    `etat` venant de wait_page_ready ; s'il renvoie True, la pagination
+    s'arrête (page déjà connue en mode incrémental).
+    """
     ads = []
     cookies_checked = False
 
-    for page in range(1, NB_PAGES_PAR_DEPARTEMENT + 1):
+    for page in range(start_page, NB_PAGES_PAR_DEPARTEMENT + 1):
         url = build_page_url(base_url, page)
         print(f"  → Page {page} : {url}")
 
-        driver.get(url)
-        time.sleep(2.5)
+        limiteur_s = limiteur.attendre(url) if limiteur is not None else 0.0
+        chrono = TELEMETRIE.chrono()
+        html, etat, pret_s = load_page_with_browser(driver, url, not cookies_checked, chrono)
+        cookies_checked = True
 
-        # On gère la popup cookies une seule fois au début du run (ou au besoin)
-        if not cookies_checked:
-            accept_cookies_if_present(driver)
-            cookies_checked = True
-            time.sleep(1.5)
+        ads_page = extract_ads(html)
+        chrono.top("parse")
+        ads.extend(ads_page)
+        count_page = len(ads_page)
+        TELEMETRIE.page(chrono, lieu=base_url, page=page, mode="browser", octets=len(html.encode("utf-8")),
+                        annonces=count_page, etat=etat_page(etat, count_page), limiteur_s=limiteur_s)
+
+        print(f"      Annonces valides sur cette page : {count_page}")
+        if on_page is not None and on_page(page, ads_page, pret_s, etat):
+            break
+
+        # Si une page ne retourne rien, on suppose fin de pagination / page bloquée
+        if count_page == 0:
+            break
 
-        time.sleep(random.uniform(*SLEEP_BETWEEN_PAGES))
+    return ads
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
 
-        imgs = soup.find_all("img", alt=True)
-        count_page = 0
+def collect_ads_http(client: ClientHTTP, browser, base_url: str, limiteur=None, start_page=1, on_page=None) -> list:
+    """
+    Même parcours que collect_ads_for_department, mais chaque page est d'abord
+    demandée au client HTTP. Firefox (`browser`, démarré à la demande) n'est
+    utilisé que si la réponse ne contient aucune carte d'annonce.
+    """
+    ads = []
+    cookies_checked = False
 
-        for img in imgs:
-            data = parse_from_alt(img.get("alt", ""))
-            if data:
-                ads.append(data)
-                count_page += 1
+    for page in range(start_page, NB_PAGES_PAR_DEPARTEMENT + 1):
+        url = build_page_url(base_url, page)
+        print(f"  → Page {page} (http) : {url}")
+
+        limiteur_s = limiteur.attendre(url) if limiteur is not None else 0.0
+        chrono = TELEMETRIE.chrono()
+        debut = time.monotonic()
+        html = client.get_html(url)
+        pret_s = time.monotonic() - debut
+        chrono.top("nav")
+        mode, etat = "http", "annonces"
+
+        if not has_listing_cards(html):
+            print("      ↪ Pas de cartes d'annonces en HTTP, repli sur le navigateur")
+            html, etat, pret_s = load_page_with_browser(browser.driver, url, not cookies_checked, chrono)
+            cookies_checked = True
+            mode = "http+browser"
+
+        ads_page = extract_ads(html)
+        chrono.top("parse")
+        ads.extend(ads_page)
+        count_page = len(ads_page)
+        TELEMETRIE.page(chrono, lieu=base_url, page=page, mode=mode, octets=len(html.encode("utf-8")),
+                        annonces=count_page, etat=etat_page(etat, count_page), limiteur_s=limiteur_s)
 
         print(f"      Annonces valides sur cette page : {count_page}")
+        if on_page is not None and on_page(page, ads_page, pret_s, etat):
+            break
 
-        # Si une page ne retourne rien, on suppose fin de pagination / page bloquée
         if count_page == 0:
             break
 
@@ -174,60 +339,330 @@ def collect_ads_for_department(driver, base_url: str) -> list:
 
 
 # ============================================================
-# 🚀 MAIN
+# 🌐 Navigateur
 # ============================================================
 
-def main():
-    df = pd.read_csv(INPUT_CSV)
-    df["dep_code"] = df["nom"].apply(lambda x: parse_dep(str(x))[1])
-
-    # Reprise à partir d'un code
-    if START_DEPARTEMENT_CODE:
-        start_code = START_DEPARTEMENT_CODE.upper()
-        if start_code not in df["dep_code"].values:
-            raise ValueError(f"START_DEPARTEMENT_CODE='{START_DEPARTEMENT_CODE}' introuvable dans le CSV.")
-        start_idx = df.index[df["dep_code"] == start_code][0]
-        df = df.loc[start_idx:].reset_index(drop=True)
-        print(f"Reprise à partir du département {start_code} (ligne CSV originale {start_idx}).\n")
-
-    if NB_DEPARTEMENTS_A_SCRAPER is not None:
-        df = df.head(NB_DEPARTEMENTS_A_SCRAPER)
-
-    print("Départements à scraper :", len(df))
-
+def new_driver():
     # Firefox (non-headless)
     options = webdriver.FirefoxOptions()
     # options.add_argument("--headless")  # laisse commenté
 
-    driver = webdriver.Firefox(
+    return webdriver.Firefox(
         service=Service(GeckoDriverManager().install()),
         options=options
     )
 
-    all_ads = []
+
+class LazyBrowser:
+    """Firefox démarré seulement au premier besoin (mode http : souvent jamais)."""
+
+    def __init__(self):
+        self._driver = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = new_driver()
+        return self._driver
+
+    def quit(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+
+def collect_ads(browser: LazyBrowser, client, base_url: str, limiteur=None, start_page=1, on_page=None) -> list:
+    """Aiguillage selon FETCH_MODE."""
+    if client is not None:
+        return collect_ads_http(client, browser, base_url, limiteur=limiteur,
+                                start_page=start_page, on_page=on_page)
+    return collect_ads_for_department(browser.driver, base_url, limiteur=limiteur,
+                                      start_page=start_page, on_page=on_page)
+
+
+def tag_ads(ads: list, dep_nom: str, dep_code: str) -> list:
+    for ad in ads:
+        ad["departement_nom"] = dep_nom
+        ad["departement_code"] = dep_code
+    return ads
+
+
+# ============================================================
+# 📒 Reprise page par page (journal + sortie en continu)
+# ============================================================
+
+COLONNES_SORTIE = [
+    "prix", "surface", "pieces", "adresse",
+    "type_bien", "sous_type",
+    "departement_nom", "departement_code",
+]
+
+
+class PageNonChargee(Exception):
+    """Page bloquée (captcha) ou jamais prête : à retenter, pas une fin de pagination."""
+
+
+def part_path(dep_code: str) -> Path:
+    return Path(PARTS_DIR) / f"{dep_code}.csv"
+
+
+def scrape_department(browser, client, journal: JournalCrawl, nom: str, url: str,
+                      limiteur=None, empreintes: EmpreintesPages = None, apres_page=None) -> int:
+    """
+    Scrape un département à partir de sa première page non terminée.
+    Chaque page est écrite dans PARTS_DIR/<code>.csv puis notée dans le journal.
+    `apres_page()` est appelé après chaque page journalisée (ex. prolonger le
+    bail de la tâche dans la file SQLite).
+    Avec `empreintes` (mode incrémental), seules les annonces nouvelles sont
+    écrites et la pagination s'arrête à la première page déjà connue.
+    Renvoie le nombre d'annonces écrites pendant cet appel ; une erreur est
+    journalisée puis relancée à l'appelant.
+    """
+    dep_nom, dep_code = parse_dep(nom)
+
+    start_page = journal.prochaine_page(dep_code, NB_PAGES_PAR_DEPARTEMENT)
+    if start_page is None:
+        print(f"  ✔ Département {dep_code} déjà terminé (journal)")
+        return 0
+    if start_page > 1:
+        print(f"  ↻ Reprise du département {dep_code} à la page {start_page}")
+
+    # On efface ce qui a pu être écrit après le dernier point sûr (crash en cours de page)
+    chemin = part_path(dep_code)
+    with open(chemin, "a+b") as f:
+        f.truncate(journal.octets_valides(dep_code))
+
+    sortie = SortieLots(chemin, COLONNES_SORTIE, mode="a", taille_lot=TAILLE_LOT_SORTIE, fsync=FSYNC_LOT)
+
+    nb_ecrites = 0
+
+    def on_page(page, ads_page, pret_s, etat):
+        nonlocal nb_ecrites
+        if not ads_page and etat in ("bloquee", "timeout"):
+            # VIDE terminerait le département : ERREUR laisse la page à refaire
+            journal.noter(dep_code, page, ERREUR, 0, journal.octets_valides(dep_code), pret_s)
+            raise PageNonChargee(f"page {page} {etat}")
+        statut = OK if ads_page else VIDE
+        stop = False
+
+        if empreintes is not None and ads_page:
+            cles = [cle_annonce(ad) for ad in ads_page]
+            verdict, nouvelles = empreintes.comparer(dep_code, page, cles)
+            if verdict != NOUVELLE:
+                print(f"      ⏹ Page {'inchangée' if verdict == PAGE_IDENTIQUE else 'déjà vue'} : fin du département")
+                statut, stop = INCHANGEE, True
+            nouvelles = set(nouvelles)
+            ads_page = [ad for ad, c in zip(ads_page, cles) if c in nouvelles]
+
+        # Fin de page = point de reprise : le lot est écrit avant d'être journalisé
+        sortie.ecrire_plusieurs(tag_ads(ads_page, dep_nom, dep_code))
+        octets = sortie.flush()
+        journal.noter(dep_code, page, statut, len(ads_page), octets, pret_s)
+        nb_ecrites += len(ads_page)
+        if apres_page is not None:
+            apres_page()
+        return stop
+
+    try:
+        collect_ads(browser, client, url, limiteur=limiteur, start_page=start_page, on_page=on_page)
+    except Exception as exc:
+        print(f"  ❌ Erreur sur {dep_code} : {exc}")
+        if not isinstance(exc, PageNonChargee):   # déjà journalisée (et comptée en télémétrie)
+            page = journal.prochaine_page(dep_code, NB_PAGES_PAR_DEPARTEMENT) or start_page
+            journal.noter(dep_code, page, ERREUR, 0, journal.octets_valides(dep_code))
+            TELEMETRIE.page(lieu=url, page=page, etat="erreur", annonces=0, erreur=str(exc)[:200])
+        raise
+    finally:
+        sortie.close()
+        if empreintes is not None:
+            empreintes.sauver()
+
+    return nb_ecrites
+
+
+def merge_parts(df: pd.DataFrame) -> int:
+    """
+    Concatène les fichiers par département dans l'ordre du CSV d'entrée
+    (ligne à ligne, sans tout charger en mémoire). Renvoie le nombre d'annonces.
+    """
+    with SortieLots(OUTPUT_CSV, COLONNES_SORTIE, taille_lot=TAILLE_LOT_SORTIE, fsync=FSYNC_FERMETURE) as out:
+        for nom in df["nom"]:
+            chemin = part_path(parse_dep(nom)[1])
+            if not chemin.exists():
+                continue
+            with open(chemin, newline="", encoding="utf-8") as f:
+                out.ecrire_plusieurs(csv.DictReader(f))
+    return out.nb_lignes
+
+
+# ============================================================
+# 👷 Mode parallèle (pool de navigateurs)
+# ============================================================
+
+def worker(num: int, file_deps: queue.Queue, journal: JournalCrawl, limiteur: LimiteurDebit,
+           client=None, empreintes=None):
+    """
+    Un worker = un navigateur. Il pioche des départements dans la file partagée
+    jusqu'à ce qu'elle soit vide ; chaque département a son propre fichier de sortie.
+    """
+    browser = LazyBrowser()
+    try:
+        while True:
+            try:
+                nom, url = file_deps.get_nowait()
+            except queue.Empty:
+                break
+
+            dep_nom, dep_code = parse_dep(nom)
+            print(f"\n=== [W{num}] Département {dep_code} – {dep_nom} ===")
+
+            try:
+                nb = scrape_department(browser, client, journal, nom, url, limiteur=limiteur, empreintes=empreintes)
+            except Exception:
+                continue
+            print(f"  → [W{num}] Total annonces valides pour {dep_code} : {nb}")
+    finally:
+        browser.quit()
+        print(f"\n[W{num}] Terminé.")
+
+
+def worker_queue(num: int, journal: JournalCrawl, limiteur: LimiteurDebit, client=None, empreintes=None):
+    """
+    Variante de `worker` qui loue ses départements dans la file SQLite.
+    Chaque thread a sa propre connexion ; un département en erreur est
+    retenté plus tard par n'importe quel processus (puis mis en lettre morte).
+    Le worker attend les tâches en délai ou louées ailleurs avant de s'arrêter.
+    """
+    file = FileTravail(WORK_QUEUE_PATH, duree_bail=DUREE_BAIL)
+    browser = LazyBrowser()
+    try:
+        for id_tache, _, payload in file.taches(DEPARTEMENT):
+            dep_nom, dep_code = parse_dep(payload["nom"])
+            print(f"\n=== [W{num}] Département {dep_code} – {dep_nom} (tâche {id_tache}) ===")
+            try:
+                # un département dure plus que le bail : on le prolonge à chaque page
+                nb = scrape_department(browser, client, journal, payload["nom"], payload["url"],
+                                       limiteur=limiteur, empreintes=empreintes,
+                                       apres_page=lambda: file.prolonger(id_tache))
+            except Exception as exc:
+                file.echouer(id_tache, exc)
+                continue
+            file.terminer(id_tache)
+            print(f"  → [W{num}] Total annonces valides pour {dep_code} : {nb}")
+    finally:
+        browser.quit()
+        file.close()
+        print(f"\n[W{num}] File vide, terminé.")
+
+
+def scrape_queue(nb_workers: int, journal: JournalCrawl, client=None, empreintes=None):
+    limiteur = LimiteurDebit(DEBIT_PAR_HOTE, RAFALE_PAR_HOTE)
+    threads = [
+        threading.Thread(target=worker_queue, args=(n, journal, limiteur, client, empreintes), daemon=True)
+        for n in range(1, nb_workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def scrape_parallel(df: pd.DataFrame, nb_workers: int, journal: JournalCrawl, client=None, empreintes=None):
+    """
+    Lance `nb_workers` navigateurs sur une file commune de départements.
+    Chaque département écrit dans son propre fichier : merge_parts les
+    assemble ensuite dans l'ordre du CSV d'entrée, donc le résultat est
+    identique quel que soit le worker qui a traité chaque département.
+    """
+    file_deps = queue.Queue()
+    for _, row in df.iterrows():
+        file_deps.put((row["nom"], row["url"]))
+
+    limiteur = LimiteurDebit(DEBIT_PAR_HOTE, RAFALE_PAR_HOTE)
+
+    threads = [
+        threading.Thread(target=worker, args=(n, file_deps, journal, limiteur, client, empreintes), daemon=True)
+        for n in range(1, nb_workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def scrape_sequential(df: pd.DataFrame, journal: JournalCrawl, client=None, empreintes=None):
+    browser = LazyBrowser()
+    limiteur = LimiteurDebit(DEBIT_PAR_HOTE, RAFALE_PAR_HOTE)
 
     for idx, row in df.iterrows():
         dep_nom, dep_code = parse_dep(row["nom"])
         print(f"\n=== [{idx+1}/{len(df)}] Département {dep_code} – {dep_nom} ===")
         print("URL de base :", row["url"])
 
-        ads = collect_ads_for_department(driver, row["url"])
-        print(f"  → Total annonces valides pour ce département : {len(ads)}")
+        if journal.prochaine_page(dep_code, NB_PAGES_PAR_DEPARTEMENT) is None:
+            print("  ✔ Déjà terminé (journal)")
+            continue
 
-        for ad in ads:
-            ad["departement_nom"] = dep_nom
-            ad["departement_code"] = dep_code
-            all_ads.append(ad)
+        try:
+            nb = scrape_department(browser, client, journal, row["nom"], row["url"],
+                                   limiteur=limiteur, empreintes=empreintes)
+        except Exception:
+            continue
+        print(f"  → Total annonces valides pour ce département : {nb}")
 
-        time.sleep(random.uniform(*SLEEP_BETWEEN_DEPS))
+        TELEMETRIE.dormir(random.uniform(*SLEEP_BETWEEN_DEPS))
 
-    driver.quit()
+    browser.quit()
     print("\nNavigateur fermé.")
 
-    df_final = pd.DataFrame(all_ads)
-    print("\nTotal annonces récoltées :", len(df_final))
 
-    df_final.to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
+# ============================================================
+# 🚀 MAIN
+# ============================================================
+
+def main():
+    global TELEMETRIE
+    TELEMETRIE = Telemetrie(TELEMETRIE_JSONL, "scraper_logicimmo")
+
+    df = pd.read_csv(INPUT_CSV)
+    if NB_DEPARTEMENTS_A_SCRAPER is not None:
+        df = df.head(NB_DEPARTEMENTS_A_SCRAPER)
+
+    # En incrémental, PARTS_DIR ne contient que l'historique : il n'est jamais effacé
+    if RESET_JOURNAL and not INCREMENTAL:
+        if os.path.exists(JOURNAL_CSV):
+            os.remove(JOURNAL_CSV)
+        shutil.rmtree(PARTS_DIR, ignore_errors=True)
+        print("Journal remis à zéro : nouveau run complet.")
+    os.makedirs(PARTS_DIR, exist_ok=True)
+    journal = JournalCrawl(JOURNAL_CSV)
+
+    if INCREMENTAL and (RESET_JOURNAL or journal.run_termine(
+            [parse_dep(nom)[1] for nom in df["nom"]], NB_PAGES_PAR_DEPARTEMENT)):
+        journal.nouveau_run()
+        print("Recrawl incrémental : nouveau run, annonces nouvelles ajoutées à l'historique.")
+
+    print("Départements à scraper :", len(df))
+
+    client = ClientHTTP(max_connexions=max(NB_WORKERS, 2)) if FETCH_MODE == "http" else None
+    empreintes = EmpreintesPages(EMPREINTES_JSON) if INCREMENTAL else None
+
+    if USE_WORK_QUEUE:
+        print(f"File de travail : {WORK_QUEUE_PATH} ({NB_WORKERS} navigateurs dans ce processus)")
+        scrape_queue(NB_WORKERS, journal, client, empreintes)
+    elif NB_WORKERS > 1:
+        print(f"Mode parallèle : {NB_WORKERS} navigateurs, {DEBIT_PAR_HOTE} req/s max par hôte")
+        scrape_parallel(df, NB_WORKERS, journal, client, empreintes)
+    else:
+        scrape_sequential(df, journal, client, empreintes)
+
+    if client is not None:
+        print(f"\nHTTP : {client.octets_recus / 1e6:.1f} Mo transférés")
+        client.close()
+
+    total = merge_parts(df)
+    TELEMETRIE.fin(annonces_fusionnees=total)
+    print("\nTotal annonces récoltées :", total)
     print("CSV final créé →", OUTPUT_CSV)
 
 
@@ -1,4 +1,6 @@
 import csv
+import json
+import re
 import time
 import random
 import os
@@ -6,6 +8,7 @@ from playwright.sync_api import sync_playwright
 from playwright.sync_api import expect
 import pandas as pd
 from pathlib import Path
+import sys
 
 
 # Chemin du fichier ou aller récupérer les codes postaux:
@@ -15,6 +18,40 @@ DATA_PATH = BASE_DIR / "DATA" / "1-villes_france.csv"
 # Chemin ou enregister les url:
 DATA_PATH2 = BASE_DIR / "DATA" / "2-liste_url.csv"
 
+# Cache persistant code postal -> code de lieu Logic-Immo (AD08FR…, POCOFR…)
+CACHE_PATH = BASE_DIR / "DATA" / "cache_codes_lieux.json"
+
+# Racine du site (surchargeable pour viser le serveur de rejeu SRC/serveur_rejeu.py)
+BASE_URL = os.environ.get("LOGICIMMO_BASE_URL", "https://www.logic-immo.com").rstrip("/")
+
+# Format des URL de recherche (identique à celles récupérées via l'interface)
+URL_RECHERCHE = (
+    BASE_URL + "/classified-search"
+    "?distributionTypes=Buy,Buy_Auction,Compulsory_Auction"
+    "&estateTypes=House,Apartment&locations={code}&order=Default"
+    "&m=homepage_new_search_classified_search_result"
+)
+RE_CODE_LIEU = re.compile(r"\b(AD\d{2}FR\d+|POCOFR\d+)\b")
+
+# Morceaux d'URL des appels réseau de l'auto-suggest
+MOTS_CLES_SUGGEST = ("suggest", "autocomplete", "autocompletion")
+
+# Ressources non téléchargées ("aucun", "leger", "strict" : voir SRC/blocage.py)
+PROFIL_BLOCAGE = "leger"
+
+# Modules partagés (SRC/)
+sys.path.append(str(BASE_DIR / "SRC"))
+from blocage import ProfilBlocage  # noqa: E402
+from profil_navigateur import STORAGE_STATE_PATH, etat_playwright, charger_etat, consentement_present  # noqa: E402
+from telemetrie import Telemetrie, TELEMETRIE_PATH  # noqa: E402
+
+# Une ligne JSON par code postal traité (résumé : python SRC/telemetrie.py --script 1-recup_url)
+TELEMETRIE = Telemetrie(None, "1-recup_url")
+
+# True dès que le profil contient le consentement cookies : plus besoin de
+# chercher la popup dans toutes les frames à chaque action.
+consentement_donne = False
+
 df = pd.read_csv(DATA_PATH)
 
 
@@ -25,10 +62,13 @@ df = pd.read_csv(DATA_PATH)
 def human_sleep(base=1.0, variance=0.5):
         """Pause aléatoire pour simuler un comportement humain."""
         t = base + random.uniform(0, variance)
-        time.sleep(t)
+        TELEMETRIE.dormir(t)
 
 def accepter_cookies(page, timeout=5):
         """Tente de cliquer sur un bouton 'Tout accepter' dans tous les frames."""
+        global consentement_donne
+        if consentement_donne:
+            return True
         end_time = time.time() + timeout
         while time.time() < end_time:
             try:
@@ -38,6 +78,9 @@ def accepter_cookies(page, timeout=5):
                         btn.first.click()
                         print("➡️ Cookies acceptés")
                         human_sleep(0.5, 0.2)
+                        # Consentement mémorisé pour les prochaines pages et les prochains runs
+                        page.context.storage_state(path=str(STORAGE_STATE_PATH))
+                        consentement_donne = True
                         return True
             except Exception:
                 pass
@@ -90,12 +133,114 @@ def lire_codes_postaux(fichier_csv, start=0, limite=None):
     return codes_postaux
 
 
+# ---- Cache code postal -> code de lieu ----
+
+def charger_cache():
+    if CACHE_PATH.exists():
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def sauver_cache(cache):
+    """Écriture atomique : on écrit un fichier temporaire puis on le renomme."""
+    tmp = CACHE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, CACHE_PATH)
+
+
+def construire_url_recherche(code_lieu):
+    return URL_RECHERCHE.format(code=code_lieu)
+
+
+def ecouter_suggestions(page, capture):
+    """
+    Intercepte les réponses JSON de l'auto-suggest et range dans `capture`
+    le premier code de lieu trouvé. Renvoie le handler (pour le retirer ensuite).
+    """
+    def on_response(response):
+        url = response.url.lower()
+        if not any(mot in url for mot in MOTS_CLES_SUGGEST):
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        try:
+            codes = RE_CODE_LIEU.findall(response.text())
+        except Exception:
+            return
+        if codes:
+            capture.append(codes[0])
+
+    page.on("response", on_response)
+    return on_response
+
+
+def resoudre_url(page, code_postal, cache, stats=None):
+    """
+    Renvoie (url, depuis_cache). Un code postal déjà résolu ne coûte rien :
+    l'URL est construite directement, sans ouvrir l'interface du site.
+    Sinon on passe par l'auto-suggest (une seule fois) et on retient le code
+    de lieu de l'URL atteinte.
+    """
+    if code_postal in cache:
+        TELEMETRIE.page(lieu=code_postal, etat="cache", annonces=0)
+        return construire_url_recherche(cache[code_postal]), True
+
+    capture = []
+    handler = ecouter_suggestions(page, capture)
+    try:
+        url = get_logic_immo_url(page, code_postal, stats)
+    finally:
+        page.remove_listener("response", handler)
+
+    # Le code lu dans l'URL finale fait foi : c'est la page réellement atteinte.
+    # L'auto-suggest (qui peut avoir proposé une autre commune en premier)
+    # ne sert que si l'URL n'en contient pas, et n'est alors pas mis en cache.
+    m = RE_CODE_LIEU.search(url) if url else None
+    if m:
+        code_lieu = m.group(1)
+        if capture and code_lieu not in capture:
+            print(f"⚠️ Auto-suggest ({capture[0]}) ≠ URL ({code_lieu}) : code de l'URL retenu")
+        cache[code_postal] = code_lieu
+        sauver_cache(cache)
+        url = construire_url_recherche(code_lieu)
+    elif capture:
+        url = construire_url_recherche(capture[0])
+    return url, False
+
+
+def get_logic_immo_url(page, code_postal, stats=None):
+    """
+    Recherche l'URL d'un code postal et note le temps passé : "nav" = chargement
+    de l'accueil, "attente" = saisie et auto-suggest (pauses humaines exclues).
+    """
+    chrono = TELEMETRIE.chrono()
+    try:
+        url = chercher_url(page, code_postal, chrono)
+    except Exception as exc:
+        TELEMETRIE.page(chrono, lieu=code_postal, etat="erreur", annonces=0, erreur=str(exc)[:200])
+        raise
+    chrono.top("attente")
+
+    if url:
+        etat = "ok"
+    elif page.query_selector("iframe[src*='captcha-delivery']"):
+        etat = "bloquee"
+    else:
+        etat = "vide"
+    octets = stats.octets_charges if stats is not None else 0
+    TELEMETRIE.page(chrono, lieu=code_postal, url=url, etat=etat, annonces=0, octets=octets)
+    return url
+
+
     # ---- Récupération de l'URL Logic-Immo pour un code postal ----
-def get_logic_immo_url(page, code_postal):
+def chercher_url(page, code_postal, chrono):
         print(f"\n🔍 Traitement du code postal : {code_postal}")
 
         # Aller à l'accueil
-        page.goto("https://www.logic-immo.com/", wait_until="networkidle")
+        page.goto(f"{BASE_URL}/", wait_until="networkidle")
+        chrono.top("nav")
         accepter_cookies(page)
         nouvelle_recherche(page) 
         human_sleep(0.6,0.3)
@@ -162,7 +307,7 @@ def get_logic_immo_url(page, code_postal):
             print("démarre la page")
             first_suggest.click(timeout=3000)
             print("prépare le timesleep")
-            time.sleep(1)
+            TELEMETRIE.dormir(1)
             print("fin du timesleep")
         except Exception as e:
             print("⚠️ Problème lors du clic sur la suggestion :", e)
@@ -192,9 +337,20 @@ def main():
     # Assure le dossier courant (optionnel)
     # os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
+    cache = charger_cache()
+    print(f"🧠 {len(cache)} codes postaux déjà en cache")
+
+    global consentement_donne, TELEMETRIE
+    TELEMETRIE = Telemetrie(TELEMETRIE_PATH, "1-recup_url")
+    etat = etat_playwright()
+    # Un profil enregistré ne suffit pas : il faut que le consentement y soit
+    consentement_donne = consentement_present(charger_etat())
+
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, slow_mo=30)
-        page = browser.new_page()
+        context = browser.new_context(storage_state=etat)
+        page = context.new_page()
+        stats = ProfilBlocage(PROFIL_BLOCAGE).installer(page)
 
         # Ouvrir le fichier en mode ajout
         with open(OUTPUT_FILE, "a", newline="", encoding="utf-8") as f:
@@ -209,8 +365,10 @@ def main():
 
             # Boucle sur les codes (limités par la variable codes)
             for code_postal in codes:
+                depuis_cache = False
+                stats.reset()
                 try:
-                    url = get_logic_immo_url(page, code_postal)
+                    url, depuis_cache = resoudre_url(page, code_postal, cache, stats)
                 except Exception as exc:
                     # Capturer toute exception inattendue pour enregistrer l'erreur et continuer
                     url = None
@@ -225,10 +383,15 @@ def main():
                 f.flush()
                 os.fsync(f.fileno())
 
-                # Pause humaine entre les recherches
-                human_sleep(2.5, 3.0)
+                # Pause humaine entre les recherches (inutile si rien n'a été demandé au site)
+                if not depuis_cache:
+                    print(stats.rapport())
+                    human_sleep(2.5, 3.0)
 
+        context.storage_state(path=str(STORAGE_STATE_PATH))
         browser.close()
 
+    TELEMETRIE.fin()
+
 if __name__ == "__main__":
     main()
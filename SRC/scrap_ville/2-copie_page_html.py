@@ -1,6 +1,13 @@
+import os
+import re
+import sys
 import time
 import random
+import asyncio
+import argparse
+import threading
 from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 import pandas as pd
 from pathlib import Path
 
@@ -18,15 +25,118 @@ start_DATA_PATH = BASE_DIR / "DATA" / "2-liste_url.csv"
 # chemin d'enregistrement des html
 storage_folder_path = BASE_DIR / "DATA" /"stock_html"
 
+# archive compressée de toutes les captures (n'est jamais vidée par l'extraction)
+snapshots_path = BASE_DIR / "DATA" / "snapshots"
+
+# empreintes des pages du run précédent (mode --incremental)
+empreintes_path = BASE_DIR / "DATA" / "empreintes_villes.json"
+
+# Modules partagés (SRC/)
+sys.path.append(str(BASE_DIR / "SRC"))
+from limiteur import LimiteurDebitAsync  # noqa: E402
+from blocage import ProfilBlocage, PROFILS  # noqa: E402
+from snapshots import MagasinSnapshots  # noqa: E402
+from profil_navigateur import STORAGE_STATE_PATH, etat_playwright  # noqa: E402
+from empreintes import EmpreintesPages, cles_depuis_html, NOUVELLE  # noqa: E402
+from file_travail import FileTravail, FILE_PATH, VILLE, ATTENTE_SONDAGE  # noqa: E402
+from telemetrie import Telemetrie, TELEMETRIE_PATH, etat_page  # noqa: E402
+
+# Créé dans main() (l'import du module ne crée aucun dossier)
+magasin = None
+
+# Remplacée dans main() (résumé : python SRC/telemetrie.py --script 2-copie_page_html)
+TELEMETRIE = Telemetrie(None, "2-copie_page_html")
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/123 Safari/537.36")
+
+# Sélecteur des cartes d'annonces (le même que dans 3-extract_du_html.py)
+SELECTEUR_ANNONCES = "div[data-testid*='classified-card']"
+
+# Racine du site (surchargeable pour viser le serveur de rejeu SRC/serveur_rejeu.py)
+BASE_URL = os.environ.get("LOGICIMMO_BASE_URL", "https://www.logic-immo.com").rstrip("/")
+
+
+def rebaser(adresse):
+    """Remplace le schéma + hôte de l'adresse par BASE_URL."""
+    return re.sub(r"^https?://[^/]+", BASE_URL, adresse)
+
+
 def lire_adresses():
     fichier = pd.read_csv(start_DATA_PATH )
-    adresses = fichier.iloc[:, 1].tolist()
+    adresses = [rebaser(a) for a in fichier.iloc[:, 1].tolist()]
     return adresses
 
 
+class SourceCSV:
+    """Adresses lues dans 2-liste_url.csv (un seul processus)."""
+
+    def __init__(self):
+        self._adresses = list(enumerate(lire_adresses(), start=1))
+
+    def prochaine(self):
+        """(numéro de page, adresse, jeton) ou None quand tout est traité."""
+        if not self._adresses:
+            return None
+        i, adresse = self._adresses.pop(0)
+        return i, adresse, None
+
+    def terminer(self, jeton):
+        pass
+
+    def echouer(self, jeton, exc):
+        pass
+
+    def close(self):
+        pass
+
+
+class SourceFile:
+    """
+    Adresses louées dans la file SQLite partagée (SRC/file_travail.py) : plusieurs
+    processus peuvent la vider ensemble. Le numéro de page est l'id de la tâche.
+    Remplir d'abord : python SRC/file_travail.py remplir-villes
+    Le moteur async l'appelle depuis des threads (asyncio.to_thread) : une
+    seule connexion, un appel à la fois.
+    """
+
+    def __init__(self, chemin=FILE_PATH):
+        self.file = FileTravail(chemin, check_same_thread=False)
+        self._verrou = threading.Lock()
+
+    def prochaine(self):
+        """
+        Comme FileTravail.taches() : attend les tâches en délai ou louées par
+        un autre worker, None seulement quand il ne reste que des faites / mortes.
+        """
+        while True:
+            with self._verrou:
+                tache = self.file.louer(VILLE)
+                echeance = None if tache else self.file.prochaine_echeance(VILLE)
+            if tache is not None:
+                id_tache, _, payload = tache
+                return id_tache, rebaser(payload["url"]), id_tache
+            if echeance is None:
+                return None
+            time.sleep(min(ATTENTE_SONDAGE, max(echeance - time.time(), 0.1)))
+
+    def terminer(self, jeton):
+        with self._verrou:
+            self.file.terminer(jeton)
+
+    def echouer(self, jeton, exc):
+        with self._verrou:
+            self.file.echouer(jeton, exc)
+
+    def close(self):
+        with self._verrou:
+            self.file.close()
+
+
 def pause_humaine(min_s=1.2, max_s=3.5):
     """Pause aléatoire pour simuler un comportement humain."""
-    time.sleep(random.uniform(min_s, max_s))
+    TELEMETRIE.dormir(random.uniform(min_s, max_s))
 
 
 def mouvements_souris_humains(page):
@@ -35,66 +145,235 @@ def mouvements_souris_humains(page):
         x = random.randint(50, 900)
         y = random.randint(50, 600)
         page.mouse.move(x, y, steps=random.randint(5, 20))
-        time.sleep(random.uniform(0.1, 0.3))
+        TELEMETRIE.dormir(random.uniform(0.1, 0.3))
 
 
 def scroll_humain(page):
     """Scroll doux et aléatoire comme un humain."""
     for _ in range(random.randint(2, 6)):
         page.mouse.wheel(0, random.randint(200, 500))
-        time.sleep(random.uniform(0.3, 0.8))
+        TELEMETRIE.dormir(random.uniform(0.3, 0.8))
+
+
+def page_a_garder(adresse, html, empreintes):
+    """
+    Mode incrémental : False si la page n'a aucune annonce nouvelle depuis le
+    dernier run (inutile de la réécrire et de la re-parser).
+    """
+    if empreintes is None:
+        return True
+    m = re.search(r"locations=([^&]+)", adresse)
+    lieu = m.group(1) if m else adresse
+    verdict, nouvelles = empreintes.comparer(lieu, 1, cles_depuis_html(html))
+    if verdict != NOUVELLE:
+        print(f"⏭️ {lieu} : aucune annonce nouvelle ({verdict}), page ignorée")
+        return False
+    print(f"🆕 {lieu} : {len(nouvelles)} annonces nouvelles")
+    return True
 
 
-def scrap_logic_immo():
+def traiter_capture(i, adresse, html, empreintes, chrono, stats, limiteur_s=0.0):
+    """Enregistre la page (si elle est à garder) et la note dans la télémétrie."""
+    nb_annonces = len(cles_depuis_html(html))
+    if page_a_garder(adresse, html, empreintes):
+        enregistrer_html(i, html, adresse)
+    chrono.top("parse")
 
-    adresses = lire_adresses()
+    etat = "bloquee" if "captcha-delivery" in html else etat_page("annonces", nb_annonces)
+    TELEMETRIE.page(chrono, lieu=adresse, page=i, octets=stats.octets_charges,
+                    annonces=nb_annonces, etat=etat, limiteur_s=limiteur_s)
+
+
+def scrap_logic_immo(profil_blocage="leger", empreintes=None, source=None):
+
+    source = source or SourceCSV()
 
     with sync_playwright() as p:
 
         browser = p.chromium.launch(headless=False, slow_mo=50)
-        page = browser.new_page()
+        # Profil partagé (cookies de consentement / anti-bot des runs précédents)
+        context = browser.new_context(storage_state=etat_playwright())
+        page = context.new_page()
 
         page.set_extra_http_headers({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                          "AppleWebKit/537.36 (KHTML, like Gecko) "
-                          "Chrome/123 Safari/537.36",
+            "User-Agent": USER_AGENT,
             "Accept-Language": "fr-FR,fr;q=0.9"
         })
 
-        for i, adresse in enumerate(adresses, start=1):
+        # Images, polices, vidéos… ne sont pas téléchargées (le DOM reste intact)
+        stats = ProfilBlocage(profil_blocage).installer(page)
+
+        while (tache := source.prochaine()) is not None:
+            i, adresse, jeton = tache
 
             print(f"\n➡️ Scraping {i} : {adresse}")
 
             pause_humaine(1.5, 4)      # pause avant de changer de page
 
-            # Charger la page
-            page.goto(adresse, wait_until="networkidle")
+            chrono = TELEMETRIE.chrono()
+            try:
+                # Charger la page
+                stats.reset()
+                page.goto(adresse, wait_until="networkidle")
+                chrono.top("nav")
 
-            pause_humaine(2, 4)
+                pause_humaine(2, 4)
 
-            # Mouvements humains
-            mouvements_souris_humains(page)
-            scroll_humain(page)
+                # Mouvements humains
+                mouvements_souris_humains(page)
+                scroll_humain(page)
 
-            # Attendre que le DOM soit bien rendu
-            page.wait_for_selector("body")
+                # Attendre que le DOM soit bien rendu
+                page.wait_for_selector("body")
 
-            # Attendre un peu (l'humain lit)
-            pause_humaine(3, 7)
+                # Attendre un peu (l'humain lit)
+                pause_humaine(3, 7)
 
-            # Récupération du HTML
-            html = page.content()
+                # Récupération du HTML
+                html = page.content()
+                chrono.top("attente")
+            except Exception as exc:
+                print(f"❌ {i} : échec de la capture ({exc})")
+                TELEMETRIE.page(chrono, lieu=adresse, page=i, etat="erreur", annonces=0, erreur=str(exc)[:200])
+                source.echouer(jeton, exc)
+                continue
 
             # Sauvegarde dans un fichier
-            file_path = storage_folder_path / f"page_logic_immo_{i}.txt"
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(html)
-
-            print(f"✔️ Page enregistrée : {file_path}")
+            traiter_capture(i, adresse, html, empreintes, chrono, stats)
+            source.terminer(jeton)
+            print(stats.rapport())
 
+        context.storage_state(path=str(STORAGE_STATE_PATH))
         browser.close()
         print("\n🎉 Scraping terminé sans provoquer de captcha !")
 
 
+def enregistrer_html(i, html, adresse):
+    """Écrit la page pour 3-extract_du_html.py et l'archive dans le magasin de snapshots."""
+    file_path = storage_folder_path / f"page_logic_immo_{i}.txt"
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    h = magasin.ajouter(adresse, html)
+    print(f"✔️ Page enregistrée : {file_path} (snapshot {h[:12]})")
+
+
+# ---- Moteur asynchrone : K pages en parallèle dans un seul navigateur ----
+
+async def capturer_page(page, i, adresse, limiteur, stats, chrono, timeout_ms=15000):
+    """
+    Charge une adresse quand le limiteur l'autorise.
+    Renvoie (HTML, secondes d'attente imposées par le limiteur).
+    """
+    limiteur_s = await limiteur.attendre(adresse)
+    chrono.top("limiteur")
+    stats.reset()
+    await page.goto(adresse, wait_until="domcontentloaded")
+    chrono.top("nav")
+
+    # On attend les annonces plutôt qu'une pause fixe ; si elles n'arrivent
+    # pas (page vide / bloquée), on garde quand même le DOM courant.
+    try:
+        await page.wait_for_selector(SELECTEUR_ANNONCES, timeout=timeout_ms)
+    except Exception:
+        print(f"⚠️ {i} : aucune annonce visible après {timeout_ms} ms")
+
+    html = await page.content()
+    chrono.top("attente")
+    return html, limiteur_s
+
+
+async def scrap_logic_immo_async(concurrence=4, debit=1.0, profil_blocage="leger", empreintes=None, source=None):
+    """
+    Capture les pages de 2-liste_url.csv avec `concurrence` onglets simultanés.
+    Le rythme global est fixé par un seau à jetons (`debit` pages / seconde),
+    et non plus par des pauses humaines dans chaque onglet.
+    """
+    source = source or SourceCSV()
+    nb_pages = 0
+
+    limiteur = LimiteurDebitAsync(debit, rafale=concurrence)
+    profil = ProfilBlocage(profil_blocage)
+    debut = time.monotonic()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+        # Un seul contexte = un seul profil partagé par tous les onglets
+        context = await browser.new_context(
+            user_agent=USER_AGENT,
+            extra_http_headers={"Accept-Language": "fr-FR,fr;q=0.9"},
+            storage_state=etat_playwright(),
+        )
+
+        # File SQLite, parsing et écriture des pages sont bloquants : ils
+        # tournent dans des threads pour ne pas figer les autres onglets
+        async def onglet(num):
+            nonlocal nb_pages
+            page = await context.new_page()
+            stats = await profil.installer_async(page)
+            while (tache := await asyncio.to_thread(source.prochaine)) is not None:
+                i, adresse, jeton = tache
+
+                print(f"\n➡️ [onglet {num}] Scraping {i} : {adresse}")
+                chrono = TELEMETRIE.chrono()
+                try:
+                    html, limiteur_s = await capturer_page(page, i, adresse, limiteur, stats, chrono)
+                except Exception as exc:
+                    print(f"❌ {i} : échec de la capture ({exc})")
+                    TELEMETRIE.page(lieu=adresse, page=i, etat="erreur", annonces=0, erreur=str(exc)[:200])
+                    await asyncio.to_thread(source.echouer, jeton, exc)
+                    continue
+                # Le temps passé dans le limiteur est du sommeil, pas une étape de la page
+                chrono.etapes.pop("limiteur_s", None)
+                await asyncio.to_thread(traiter_capture, i, adresse, html, empreintes, chrono, stats, limiteur_s)
+                await asyncio.to_thread(source.terminer, jeton)
+                nb_pages += 1
+                print(f"   [{i}] {stats.rapport()}")
+            await page.close()
+
+        await asyncio.gather(*(onglet(n) for n in range(1, concurrence + 1)))
+        await context.storage_state(path=str(STORAGE_STATE_PATH))
+        await browser.close()
+
+    duree = time.monotonic() - debut
+    print(f"\n🎉 {nb_pages} adresses traitées en {duree:.0f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copie le HTML des pages d'annonces Logic-Immo.")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                        help="sync = comportement humain historique, async = onglets parallèles")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="nombre d'onglets simultanés (moteur async)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="pages par seconde max vers le site (moteur async)")
+    parser.add_argument("--block", choices=list(PROFILS), default="leger",
+                        help="profil de blocage des ressources (images, polices, tiers…)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="n'écrit que les pages ayant des annonces nouvelles depuis le dernier run")
+    parser.add_argument("--queue", nargs="?", const=str(FILE_PATH), default=None,
+                        help="louer les adresses dans la file SQLite partagée au lieu du csv")
+    args = parser.parse_args()
+
+    global TELEMETRIE, magasin
+    TELEMETRIE = Telemetrie(TELEMETRIE_PATH, "2-copie_page_html")
+    magasin = MagasinSnapshots(snapshots_path)
+    empreintes = EmpreintesPages(empreintes_path) if args.incremental else None
+    source = SourceFile(args.queue) if args.queue else SourceCSV()
+
+    try:
+        if args.engine == "async":
+            asyncio.run(scrap_logic_immo_async(args.concurrency, args.rate, args.block, empreintes, source))
+        else:
+            scrap_logic_immo(args.block, empreintes, source)
+    finally:
+        source.close()
+        TELEMETRIE.fin(moteur=args.engine)
+
+    if empreintes is not None:
+        empreintes.sauver()
+
+
 # EXÉCUTION
-scrap_logic_immo()
+if __name__ == "__main__":
+    main()
@@ -6,121 +6,239 @@
 
 # C'est la copie du code: extraction.3.3.py
 
-from bs4 import BeautifulSoup
-import csv
+# Les pages sont analysées en parallèle (un processus par cœur) et les lignes
+# écrites dans l'ordre des pages, quel que soit le nombre de processus.
+#
+# Extraction incrémentale : un manifeste (SRC/manifeste.py) garde, pour chaque
+# page (hash du HTML), la version du parseur qui l'a extraite et ses lignes.
+# Seules les pages nouvelles, ou extraites par une ancienne VERSION_CARTES,
+# sont analysées ; 3-annonces.csv est ensuite reconstruit en entier dans un
+# fichier temporaire puis remplacé d'un coup. Relancer après un crash ne
+# crée donc ni doublon ni trou, et les pages du stock ne sont supprimées
+# qu'une fois le nouveau csv en place.
+#
+# Usage :
+#   python SRC/scrap_ville/3-extract_du_html.py                  nouvelles pages de DATA/stock_html (supprimées ensuite)
+#   python SRC/scrap_ville/3-extract_du_html.py --source snapshots --workers 8
+#                                                                nouvelles pages de l'archive DATA/snapshots
+
+import re
+import sys
 import os
-import pandas as pd
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
 BASE_DIR = Path(__file__).resolve().parents[2] 
 storage_folder_path = BASE_DIR / "DATA" /"stock_html"
+snapshots_path = BASE_DIR / "DATA" / "snapshots"
+sortie_path = BASE_DIR / "DATA" / "3-annonces.csv"
+extraction_path = BASE_DIR / "DATA" / "extraction"
+
+# Modules partagés (SRC/)
+sys.path.append(str(BASE_DIR / "SRC"))
+from sortie import SortieLots, FSYNC_FERMETURE  # noqa: E402
+from analyse_html import cartes_annonces, choisir_moteur, VERSION_CARTES  # noqa: E402
+from snapshots import MagasinSnapshots, hash_html  # noqa: E402
+from manifeste import ManifesteExtraction  # noqa: E402
+
+# Nombre de lignes gardées en mémoire avant écriture dans le csv
+TAILLE_LOT = 2000
+
+# Moteur d'analyse HTML ("auto", "selectolax", "strainer", "lxml"… voir SRC/analyse_html.py)
+# None = variable d'environnement PARSEUR_HTML, sinon "auto"
+MOTEUR_HTML = None
+
+# Secondes entre deux lignes de progression
+INTERVALLE_PROGRESSION = 2.0
+
+# Le manifeste est sauvé toutes les N pages : un crash ne fait perdre que ce travail-là
+SAUVEGARDE_MANIFESTE = 500
+
+COLONNES = [
+    "type_bien",
+    "prix",
+    "pieces",
+    "chambres",
+    "surface",
+    "etage",
+    "adresse",
+    "description",
+    "agence"
+]
+
+
+def numero_page(chemin):
+    """page_logic_immo_12.txt -> 12 (tri numérique, pas alphabétique)."""
+    m = re.search(r"(\d+)$", Path(chemin).stem)
+    return int(m.group(1)) if m else 0
+
+
+def lister_pages(source):
+    """Pages disponibles, dans l'ordre d'écriture : (origine, chemin ou hash, hash)."""
+    if source == "stock":
+        pages = []
+        for p in sorted(storage_folder_path.glob("page_logic_immo_*.txt"), key=numero_page):
+            with open(p, "r", encoding="utf-8") as f:
+                pages.append(("stock", str(p), hash_html(f.read())))
+        return pages
+    magasin = MagasinSnapshots(snapshots_path)
+    return [("snapshot", snap.hash, snap.hash) for snap in magasin.iterer()]
+
+
+def pages_a_extraire(pages, manifeste):
+    """
+    Pages nouvelles ou extraites par une autre VERSION_CARTES (une seule fois
+    par hash), plus les pages périmées du manifeste encore dans l'archive.
+    """
+    taches, vus = [], set()
+    for origine, ref, h in pages:
+        if h not in vus and manifeste.a_extraire(h, VERSION_CARTES):
+            taches.append((origine, ref, h))
+        vus.add(h)
+
+    perimees = [h for h in manifeste.perimees(VERSION_CARTES) if h not in vus]
+    if perimees:
+        magasin = MagasinSnapshots(snapshots_path)
+        introuvables = 0
+        for h in perimees:
+            if magasin.chemin_objet(h).exists():
+                taches.append(("snapshot", h, h))
+            else:
+                introuvables += 1
+        if introuvables:
+            print(f"⚠️ {introuvables} pages d'une ancienne version du parseur absentes de l'archive : "
+                  f"lignes précédentes conservées.")
+    return taches
+
+
+# Magasin ouvert une fois par processus de travail
+_magasin = None
+
+
+def extraire_page(tache, moteur=None):
+    """
+    Exécuté dans les processus de travail : lit une page et renvoie
+    (hash, lignes extraites, taille du HTML en octets).
+    """
+    global _magasin
+    origine, ref, h = tache
+    if origine == "stock":
+        with open(ref, "r", encoding="utf-8") as f:
+            html = f.read()
+    else:
+        if _magasin is None:
+            _magasin = MagasinSnapshots(snapshots_path)
+        html = _magasin.lire(ref)
+
+    # Trouver toutes les annonces et extraire leurs infos
+    # (prix, type, caractéristiques, adresse, description, agence)
+    return h, cartes_annonces(html, moteur), len(html.encode("utf-8"))
+
+
+def extraire(taches, manifeste, nb_workers, moteur):
+    """
+    Analyse les pages sur `nb_workers` processus et note leurs lignes dans
+    le manifeste, dans l'ordre de `taches`. Renvoie (pages, annonces, octets lus).
+    """
+    travail = partial(extraire_page, moteur=moteur)
+    debut = dernier = time.monotonic()
+    nb_pages = nb_annonces = octets = 0
+
+    def progression(final=False):
+        duree = max(time.monotonic() - debut, 1e-9)
+        print(f"{'✔️' if final else '⏳'} [{nb_pages}/{len(taches)}] "
+              f"{nb_pages / duree:.1f} pages/s, {nb_annonces / duree:.0f} annonces/s, "
+              f"{octets / 1e6 / duree:.1f} Mo/s")
+
+    if nb_workers > 1:
+        pool = ProcessPoolExecutor(max_workers=nb_workers)
+        # map() rend les résultats dans l'ordre des tâches : sortie déterministe
+        resultats = pool.map(travail, taches, chunksize=max(1, len(taches) // (nb_workers * 8)))
+    else:
+        pool = None
+        resultats = map(travail, taches)
 
-for j in range (1,120):
-
-    adresse_fichier= storage_folder_path / f"page_logic_immo_{j}.txt"
-    # --- 1. Charger le fichier HTML ---
+    origines = {h: origine for origine, _, h in taches}
     try:
-        with open(adresse_fichier, "r", encoding="utf-8") as f:
-            soup = BeautifulSoup(f.read(), "lxml")
-    except FileNotFoundError:
-        print (f"Manque le fichier page_logic_immo_{j}")
-        continue
-
-    # --- 2. Trouver toutes les annonces ---
-    annonces = soup.find_all("div", {"data-testid": lambda x: x and "classified-card" in x})
-
-    # --- 3. Préparer le fichier CSV ---
-    csv_exists = os.path.exists(BASE_DIR / "DATA" /"3-annonces.csv")
-
-
-    with open(BASE_DIR / "DATA" /"3-annonces.csv", "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        # ecrire l'en tête seulement si le fichier n'existe pas
-        if not csv_exists:
-            writer.writerow([
-                "type_bien",
-                "prix",
-                "pieces",
-                "chambres",
-                "surface",
-                "etage",
-                "adresse",
-                "description",
-                "agence"
-            ])
-
-        # --- 4. Extraire les infos pour chaque annonce ---
-        for ann in annonces:
-
-            # Prix
-            prix = ann.select_one('div[data-testid="cardmfe-price-testid"]')
-            prix = prix.get_text(strip=True) if prix else None
-
-            # Type de bien
-            type_bien = ann.select_one("div.css-1e55dlz")
-            type_bien = type_bien.get_text(strip=True) if type_bien else None
-
-            # Caractéristiques
-            keyfacts = ann.select_one('div[data-testid="cardmfe-keyfacts-testid"]')
-            pieces = chambres = surface = etage = None
-            
-            if keyfacts:
-                facts = [x.get_text(strip=True) for x in keyfacts.find_all("div", class_="css-9u48bm")]
-                facts = [f for f in facts if f != "·"]
-
-                for f in facts:
-                    if "pièce" in f:
-                        pieces = f.replace("pièces", "").replace("pièce", "").strip()
-                    elif "chambre" in f:
-                        chambres = f.replace("chambres", "").replace("chambre", "").strip()
-                    elif "m²" in f:
-                        surface = f.replace("m²", "").strip()
-                    elif "Étage" in f:
-                        etage = f.replace("Étage", "").strip()
-
-            # Adresse
-            adresse = ann.select_one('div[data-testid="cardmfe-description-box-address"]')
-            adresse = adresse.get_text(strip=True) if adresse else None
-
-            # DESCRIPTION
-            description = ann.select_one("div.css-oorffy")
-            description = description.get_text(strip=True) if description else None
-
-            # --- 🆕 RÉCUPÉRATION DU NOM DE L’AGENCE ---
-            agency = None
-            imgs = ann.find_all("img")
-
-            for img in imgs:
-                alt = img.get("alt", "").strip()
-                if not alt:
-                    continue
-
-                # On élimine les alt contenant une description du bien
-                if any(x in alt for x in ["€", "m²", "pièce", "chambre", "Paris", "sur"]):
-                    continue
-
-                # Si l'alt ne ressemble pas à une description : c'est le nom de l'agence
-                agency = alt
-                break
-
-            # --- 5. Écrire dans le CSV ---
-            writer.writerow([
-                type_bien,
-                prix,
-                pieces,
-                chambres,
-                surface,
-                etage,
-                adresse,
-                description,
-                agency
-            ])
-
-
-
-    if os.path.exists(adresse_fichier):
-        os.remove(storage_folder_path /f"page_logic_immo_{j}.txt")
-        print("Fichier HTML supprimé.")
+        for h, lignes, taille in resultats:
+            manifeste.noter(h, lignes, VERSION_CARTES, moteur, origines[h])
+            nb_pages += 1
+            nb_annonces += len(lignes)
+            octets += taille
+            if nb_pages % SAUVEGARDE_MANIFESTE == 0:
+                manifeste.sauver()
+            if time.monotonic() - dernier >= INTERVALLE_PROGRESSION:
+                dernier = time.monotonic()
+                progression()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        manifeste.sauver()
+
+    progression(final=True)
+    return nb_pages, nb_annonces, octets
+
+
+def reecrire_sortie(chemin, manifeste):
+    """Reconstruit le csv à partir du manifeste, puis le met en place d'un coup."""
+    chemin = Path(chemin)
+    tmp = chemin.with_name(f"{chemin.name}.{os.getpid()}.tmp")
+    sortie = SortieLots(tmp, COLONNES, mode="w", taille_lot=TAILLE_LOT, fsync=FSYNC_FERMETURE)
+    with sortie:
+        for ligne in manifeste.toutes_les_lignes():
+            sortie.ecrire(ligne)
+    os.replace(tmp, chemin)
+    return sortie
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrait les annonces des pages HTML capturées.")
+    parser.add_argument("--source", choices=["stock", "snapshots"], default="stock",
+                        help="stock = DATA/stock_html (pages supprimées une fois extraites), "
+                             "snapshots = toute l'archive DATA/snapshots")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="nombre de processus d'analyse (1 = pas de parallélisme)")
+    parser.add_argument("--moteur", default=MOTEUR_HTML,
+                        help="moteur HTML (auto, selectolax, strainer, lxml, html.parser)")
+    parser.add_argument("--sortie", default=str(sortie_path))
+    parser.add_argument("--manifeste", default=str(extraction_path),
+                        help="dossier du manifeste d'extraction")
+    parser.add_argument("--garder", action="store_true", help="ne pas supprimer les pages de DATA/stock_html")
+    args = parser.parse_args()
+
+    moteur = choisir_moteur(args.moteur)
+    manifeste = ManifesteExtraction(COLONNES, args.manifeste)
+    pages = lister_pages(args.source)
+    taches = pages_a_extraire(pages, manifeste)
+    print(f"Moteur HTML : {moteur} ({VERSION_CARTES}), {len(pages)} pages ({args.source}) dont "
+          f"{len(taches)} à extraire, {len(manifeste.pages)} déjà au manifeste, {args.workers} processus")
+
+    if taches or not os.path.exists(args.sortie):
+        nb_pages, _, octets = extraire(taches, manifeste, max(1, args.workers), moteur)
+
+        # --- Le csv est reconstruit en entier puis remplacé atomiquement ---
+        sortie = reecrire_sortie(args.sortie, manifeste)
+        print(f"{sortie.nb_lignes} annonces écrites en {sortie.nb_lots} lots "
+              f"({nb_pages} pages extraites, {octets / 1e6:.1f} Mo de HTML, "
+              f"{len(manifeste.pages)} pages au total).")
     else:
-        print("Fichier HTML introuvable (déjà supprimé ?).")
\ No newline at end of file
+        print("Aucune nouvelle page : csv inchangé.")
+
+    # --- Suppression des HTML une fois le csv en place ---
+    # (toutes les pages du stock sont maintenant au manifeste, même les doublons)
+    if args.source == "stock" and not args.garder:
+        for _, adresse_fichier, _ in pages:
+            if os.path.exists(adresse_fichier):
+                os.remove(adresse_fichier)
+            else:
+                print("Fichier HTML introuvable (déjà supprimé ?).")
+        print(f"{len(pages)} fichiers HTML supprimés.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,18 @@
 import numpy as np
 import pandas as pd
 import csv
+import sys
+import argparse
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2] 
 source_path = BASE_DIR / "DATA" 
 
+# Nettoyage partagé (SRC/nettoyage.py)
+sys.path.append(str(BASE_DIR / "SRC"))
+from nettoyage import code_postal  # noqa: E402
+from flux import TriParSeaux, ecrire_csv, TAILLE_MORCEAU  # noqa: E402
+
 # les départements de france:
 departements_fr = {
     "01": "Ain",
@@ -112,75 +119,110 @@ departements_fr = {
     "98": "COM"
 }
 
-# définition du csv qui va être utilisé pour le formatage.
+# définition des csv utilisés pour le formatage.
+SOURCE_CSV = source_path/"3-annonces.csv"
+SORTIE_CSV = source_path/"annonces_france-2.csv"
+
+# types fixés à la lecture : en mode flux, chaque morceau aurait sinon ses
+# propres types (pièces entières dans un morceau, décimales dans un autre…)
+TYPES_LECTURE = {"type_bien": str, "prix": str, "pieces": "float64", "chambres": "float64",
+                 "surface": str, "etage": str, "adresse": str, "description": str, "agence": str}
+
+# tri final: par numéro de département puis par prix décroissant
+TRI = ["departement_code","prix"]
+TRI_CROISSANT = [True,False]
+
 
-f_source= pd.read_csv(source_path/"3-annonces.csv")
+def formater(f_source):
+    #
+    # 1ere étape, nettoyage des éléments à problème du fichier.
+    #**********************************************************
 
+    # On va supprimer la mention "à vendre "dans la colonne type de bien
 
+    f_source["type_bien"] = f_source["type_bien"].str.split(" ").str[0]
 
-#
-# 1ere étape, nettoyage des éléments à problème du fichier.
-#**********************************************************
 
-# On va supprimer la mention "à vendre "dans la colonne type de bien
 
-f_source["type_bien"] = f_source["type_bien"].str.split(" ").str[0]
+    # Dans la colonne: "prix", on va supprimer toutes les mentions de prix au m2.
+    # Pour ce faire, on supprime tout ce qui est après le symbole €, ainsi que les espaces en trop.
 
+    f_source["prix"] = f_source["prix"].str.replace(r"€.*","",regex=True).str.strip()
 
 
-# Dans la colonne: "prix", on va supprimer toutes les mentions de prix au m2.
-# Pour ce faire, on supprime tout ce qui est après le symbole €, ainsi que les espaces en trop.
 
-f_source["prix"] = f_source["prix"].str.replace(r"€.*","",regex=True).str.strip()
+    # On va extraire le code postal pour récupérer le n° de département.
+    f_source["code postal"]=code_postal(f_source["adresse"])
+    #n° de département
+    f_source["departement_code"]= f_source["code postal"].str[:2]
 
+    # création de la colonne departement_nom, en utilisant un dictionnaire:
+    f_source["departement_nom"]=f_source["departement_code"].map(departements_fr)
 
+    # On va supprimer le code postal, dans adresse, qui empêche de trouver la localisation.
+    #f_source["adresse"] = f_source["adresse"].str.replace(r"\(.*$","",regex=True).str.strip()
 
-# On va extraire le code postal pour récupérer le n° de département.
-f_source["code postal"]=f_source["adresse"].str.extract(r"\((\d{5})\)")
-#n° de département
-f_source["departement_code"]= f_source["code postal"].str[:2]
 
-# création de la colonne departement_nom, en utilisant un dictionnaire:
-f_source["departement_nom"]=f_source["departement_code"].map(departements_fr)
+    #
+    # 2eme étape, réordonner les colonnes et supprimer les inutiles.
+    #***************************************************************
 
-# On va supprimer le code postal, dans adresse, qui empêche de trouver la localisation.
-#f_source["adresse"] = f_source["adresse"].str.replace(r"\(.*$","",regex=True).str.strip()
 
+    #1: suppression des colonnes inutiles
 
-#
-# 2eme étape, réordonner les colonnes et supprimer les inutiles.
-#***************************************************************
+    #suppression de la colonne chambre
+    f_source=f_source.drop(columns=["chambres"])
 
+    #suppression de la colonne etage
+    f_source=f_source.drop(columns=["etage"])
 
-#1: suppression des colonnes inutiles
+    #suppression de la colonne description
+    f_source=f_source.drop(columns=["description"])
 
-#suppression de la colonne chambre
-f_source=f_source.drop(columns=["chambres"])
+    #suppression de la colonne agence
+    f_source=f_source.drop(columns=["agence"])
 
-#suppression de la colonne etage
-f_source=f_source.drop(columns=["etage"])
+    #suppression de la colonne code postal
+    f_source=f_source.drop(columns=["code postal"])
 
-#suppression de la colonne description
-f_source=f_source.drop(columns=["description"])
+    #2: réorganisation des colonnes
 
-#suppression de la colonne agence
-f_source=f_source.drop(columns=["agence"])
+    f_source = f_source[["prix","surface","pieces","adresse","type_bien","departement_nom","departement_code"]]
+    return f_source
 
-#suppression de la colonne code postal
-f_source=f_source.drop(columns=["code postal"])
 
-#2: réorganisation des colonnes
+def format_complet():
+    f_source= pd.read_csv(SOURCE_CSV, dtype=TYPES_LECTURE)
+    f_source=formater(f_source)
 
-f_source = f_source[["prix","surface","pieces","adresse","type_bien","departement_nom","departement_code"]]
+    # tri par numéro de département puis par prix décroissant
+    f_source=f_source.sort_values(by=TRI,ascending=TRI_CROISSANT)
 
-# tri par numéro de département puis par prix décroissant
-f_source=f_source.sort_values(by=["departement_code","prix"],ascending=[True,False]) 
+    #
+    # 3eme étape: enregistrement dans un nouveau csv
+    #***********************************************
+    f_source.to_csv(SORTIE_CSV, index=False, encoding="utf-8")
 
 
+def format_flux(taille):
+    # Même traitement, morceau par morceau: chaque morceau formaté est rangé
+    # dans un seau par département (sur disque), puis les seaux sont triés et
+    # écrits dans l'ordre. Mémoire: un morceau, ou le plus gros département.
+    with TriParSeaux(TRI, TRI_CROISSANT) as seaux:
+        for morceau in pd.read_csv(SOURCE_CSV, dtype=TYPES_LECTURE, chunksize=taille):
+            seaux.ranger(formater(morceau))
+        for i, trie in enumerate(seaux.trier()):
+            ecrire_csv(trie, SORTIE_CSV, premier=(i == 0))
 
-#
-# 3eme étape: enregistrement dans un nouveau csv
-#***********************************************
-f_source.to_csv(source_path/"annonces_france-2.csv", index=False, encoding="utf-8")
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Formatage des annonces extraites du html.")
+    parser.add_argument("--flux", action="store_true", help="lecture par morceaux, à mémoire bornée")
+    parser.add_argument("--taille-morceau", type=int, default=TAILLE_MORCEAU,
+                        help=f"lignes par morceau en mode flux (défaut: {TAILLE_MORCEAU})")
+    args = parser.parse_args()
 
+    if args.flux:
+        format_flux(args.taille_morceau)
+    else:
+        format_complet()
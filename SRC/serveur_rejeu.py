@@ -0,0 +1,280 @@
+# SRC/serveur_rejeu.py
+# Serveur local qui rejoue des pages Logic-Immo, pour mesurer les scrapers
+# sans toucher au vrai site (pas de réseau, pas de captcha, résultats reproductibles).
+#
+# Pages servies :
+#   /                                   accueil (champ de recherche + auto-suggest minimal)
+#   /classified-search?locations=…      page de résultats (paramètre page=N)
+#   /recherche-immo/…/ad06fr1           page 1 d'un département
+#
+# Une page de résultats est d'abord cherchée dans le magasin de snapshots
+# (DATA/snapshots, même lieu + même page) ; sinon elle est fabriquée à partir
+# des annonces déjà collectées (DATA/annonce.csv), département par département.
+# Les ALT produits sont relus à l'identique par parse_from_alt (SRC/parse_alt.py).
+#
+# Latence et taux d'erreurs (503) / de blocage (captcha) sont réglables.
+#
+# Usage :
+#   python SRC/serveur_rejeu.py --port 8765 --latence 0.3 --taux-erreur 0.02
+#   LOGICIMMO_BASE_URL=http://127.0.0.1:8765 python SRC/scrap_dep/scraper_logicimmo.py
+
+import re
+import csv
+import sys
+import gzip
+import html
+import time
+import random
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from snapshots import MagasinSnapshots
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+ANNONCES_CSV = BASE_DIR / "DATA" / "annonce.csv"
+DEPARTEMENTS_CSV = BASE_DIR / "DATA" / "departements.csv"
+SNAPSHOTS_DIR = BASE_DIR / "DATA" / "snapshots"
+
+ANNONCES_PAR_PAGE = 30
+
+RE_CODE_AD = re.compile(r"(ad\d+\w+)$", re.IGNORECASE)
+RE_CODE_DEP = re.compile(r"\((\w+)\)")
+
+
+# ============================================================
+# 📚 Corpus : pages enregistrées ou fabriquées
+# ============================================================
+
+def alt_annonce(ligne: dict) -> str:
+    """ALT d'image au format du site, à partir d'une ligne de annonce.csv."""
+    morceaux = [f"{ligne['sous_type']} à vendre", f"{ligne['prix']} €"]
+    if ligne.get("pieces"):
+        morceaux.append(f"{ligne['pieces']} pièces")
+    morceaux += [f"{ligne['surface']} m²", ligne["adresse"]]
+    return " - ".join(morceaux)
+
+
+def page_resultats(alts: list) -> str:
+    cartes = "\n".join(
+        f'<div data-testid="serp-core-classified-card-testid"><a href="#">'
+        f'<img src="/img/{i}.jpg" alt="{html.escape(alt)}"></a></div>'
+        for i, alt in enumerate(alts)
+    )
+    return f"<!DOCTYPE html><html><head><title>Annonces</title></head><body>\n{cartes}\n</body></html>"
+
+
+PAGE_VIDE = ("<!DOCTYPE html><html><body><h1>Aucune annonce ne correspond à votre recherche</h1>"
+             "</body></html>")
+
+PAGE_BLOQUEE = ("<!DOCTYPE html><html><body>"
+                '<iframe src="https://geo.captcha-delivery.com/captcha/?initialCid=rejeu"></iframe>'
+                "</body></html>")
+
+# Accueil : le champ de recherche de 1-recup_url et une suggestion qui mène
+# à la page de résultats du code postal saisi.
+PAGE_ACCUEIL = """<!DOCTYPE html><html><body>
+<input name="searchValue" placeholder="Ville, code postal, département">
+<ul role="listbox"></ul>
+<script>
+const champ = document.querySelector("input[name='searchValue']");
+const liste = document.querySelector("ul[role='listbox']");
+champ.addEventListener("input", () => {
+  const cp = champ.value.trim();
+  liste.innerHTML = "";
+  if (!cp) return;
+  const li = document.createElement("li");
+  li.textContent = cp;
+  li.onclick = () => { location.href = "/classified-search?distributionTypes=Buy&locations=POCOFR" + cp; };
+  liste.appendChild(li);
+});
+</script>
+</body></html>"""
+
+
+class Corpus:
+
+    def __init__(self, annonces_csv=ANNONCES_CSV, departements_csv=DEPARTEMENTS_CSV,
+                 snapshots_dir=SNAPSHOTS_DIR, par_page=ANNONCES_PAR_PAGE):
+        self.par_page = par_page
+
+        # code AD (ad06fr1) -> code département (01)
+        self.code_dep = {}
+        if Path(departements_csv).exists():
+            with open(departements_csv, newline="", encoding="utf-8") as f:
+                for ligne in csv.DictReader(f):
+                    m_ad, m_dep = RE_CODE_AD.search(ligne["url"]), RE_CODE_DEP.search(ligne["nom"])
+                    if m_ad and m_dep:
+                        self.code_dep[m_ad.group(1).upper()] = m_dep.group(1).lower()
+
+        self.alts = []
+        self.alts_par_dep = {}
+        if Path(annonces_csv).exists():
+            with open(annonces_csv, newline="", encoding="utf-8") as f:
+                for ligne in csv.DictReader(f):
+                    alt = alt_annonce(ligne)
+                    self.alts.append(alt)
+                    self.alts_par_dep.setdefault(ligne["departement_code"].lower(), []).append(alt)
+
+        # (lieu, page) -> hash des pages réellement capturées
+        self.magasin = None
+        self.enregistrees = {}
+        if (Path(snapshots_dir) / "index.csv").exists():
+            self.magasin = MagasinSnapshots(snapshots_dir)
+            for snap in self.magasin.iterer():
+                lieu, page = cle_page(snap.url)
+                if lieu:
+                    self.enregistrees.setdefault((lieu, page), snap.hash)
+
+    def annonces_du_lieu(self, lieu: str) -> list:
+        dep = self.code_dep.get(lieu)
+        if dep in self.alts_par_dep:
+            return self.alts_par_dep[dep]
+        # Lieu inconnu (ville) : un échantillon stable du corpus
+        if not self.alts:
+            return []
+        graine = int(hashlib.sha1(lieu.encode()).hexdigest()[:8], 16)
+        rng = random.Random(graine)
+        return rng.sample(self.alts, min(len(self.alts), rng.randint(1, 4) * self.par_page))
+
+    def page(self, lieu: str, page: int) -> str:
+        h = self.enregistrees.get((lieu, page))
+        if h is not None:
+            return self.magasin.lire(h)
+        alts = self.annonces_du_lieu(lieu)[(page - 1) * self.par_page: page * self.par_page]
+        return page_resultats(alts) if alts else PAGE_VIDE
+
+
+def cle_page(url: str):
+    """(code de lieu en majuscules, numéro de page) d'une URL de résultats, ou (None, 1)."""
+    parties = urlsplit(url)
+    params = parse_qs(parties.query)
+    page = int(params.get("page", ["1"])[0] or 1)
+    if "locations" in params:
+        return params["locations"][0].split(",")[0].upper(), page
+    m = RE_CODE_AD.search(parties.path)
+    return (m.group(1).upper(), page) if m else (None, page)
+
+
+# ============================================================
+# 🌐 Serveur HTTP
+# ============================================================
+
+class GestionnaireRejeu(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, comme le vrai site
+
+    def log_message(self, format, *args):
+        if self.server.bavard:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        serveur = self.server
+        tirage = serveur.tirer()
+
+        time.sleep(serveur.latence * random.uniform(1 - serveur.gigue, 1 + serveur.gigue))
+
+        if tirage < serveur.taux_erreur:
+            return self.repondre(503, "<html><body>Service indisponible</body></html>")
+
+        chemin = urlsplit(self.path).path
+        if chemin in ("", "/"):
+            return self.repondre(200, PAGE_ACCUEIL)
+        if chemin.startswith("/img/"):
+            return self.repondre(204, "")
+
+        lieu, page = cle_page(self.path)
+        if lieu is None:
+            return self.repondre(404, "<html><body>Page introuvable</body></html>")
+        if tirage < serveur.taux_erreur + serveur.taux_blocage:
+            return self.repondre(403, PAGE_BLOQUEE)
+        return self.repondre(200, serveur.corpus.page(lieu, page))
+
+    def repondre(self, statut: int, corps: str):
+        donnees = corps.encode("utf-8")
+        compresse = "gzip" in self.headers.get("Accept-Encoding", "") and len(donnees) > 1024
+        if compresse:
+            donnees = gzip.compress(donnees, compresslevel=5)
+        self.send_response(statut)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if compresse:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+        with self.server.verrou:
+            self.server.compteurs[statut] = self.server.compteurs.get(statut, 0) + 1
+
+
+class ServeurRejeu(ThreadingHTTPServer):
+    """
+    - latence     : secondes ajoutées à chaque réponse (± gigue, en proportion)
+    - taux_erreur : part des requêtes qui reçoivent un 503
+    - taux_blocage: part des pages de résultats remplacées par un captcha
+    - graine      : rend la suite d'erreurs / blocages reproductible
+    """
+    daemon_threads = True
+
+    def __init__(self, adresse, corpus: Corpus, latence=0.0, gigue=0.2,
+                 taux_erreur=0.0, taux_blocage=0.0, graine=0, bavard=False):
+        super().__init__(adresse, GestionnaireRejeu)
+        self.corpus = corpus
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.taux_blocage = taux_blocage
+        self.bavard = bavard
+        self.verrou = threading.Lock()
+        self.compteurs = {}   # statut HTTP -> nombre de réponses
+        self._rng = random.Random(graine)
+
+    def tirer(self) -> float:
+        with self.verrou:
+            return self._rng.random()
+
+    @property
+    def base_url(self) -> str:
+        hote, port = self.server_address[:2]
+        return f"http://{hote}:{port}"
+
+
+def demarrer(port=0, hote="127.0.0.1", corpus=None, **options) -> ServeurRejeu:
+    """Démarre le serveur dans un thread (port=0 : port libre) ; serveur.shutdown() pour l'arrêter."""
+    serveur = ServeurRejeu((hote, port), corpus or Corpus(), **options)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local qui rejoue des pages Logic-Immo.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latence", type=float, default=0.0, help="secondes par réponse")
+    parser.add_argument("--gigue", type=float, default=0.2, help="variation relative de la latence")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="part de réponses 503")
+    parser.add_argument("--taux-blocage", type=float, default=0.0, help="part de pages captcha")
+    parser.add_argument("--par-page", type=int, default=ANNONCES_PAR_PAGE)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--bavard", action="store_true", help="affiche chaque requête")
+    args = parser.parse_args()
+
+    corpus = Corpus(par_page=args.par_page)
+    serveur = ServeurRejeu(("127.0.0.1", args.port), corpus, latence=args.latence, gigue=args.gigue,
+                           taux_erreur=args.taux_erreur, taux_blocage=args.taux_blocage,
+                           graine=args.graine, bavard=args.bavard)
+    print(f"🎬 Rejeu sur {serveur.base_url} : {len(corpus.alts)} annonces, "
+          f"{len(corpus.enregistrees)} pages enregistrées")
+    print(f"   export LOGICIMMO_BASE_URL={serveur.base_url}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        print(f"Réponses : {serveur.compteurs}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
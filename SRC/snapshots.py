@@ -0,0 +1,141 @@
+# SRC/snapshots.py
+# Magasin de pages HTML compressées et adressées par leur contenu.
+#
+#   DATA/snapshots/
+#   ├── index.csv                    url, horodatage, hash, taille, taille_compressee
+#   └── objets/ab/abcdef….html.zst   une page = un fichier, nommé par son sha256
+#
+# Deux captures identiques ne sont stockées qu'une fois (seul l'index grossit).
+# Les pages ne sont plus supprimées après extraction : on peut ré-extraire
+# toute l'archive quand le parseur change.
+
+import os
+import csv
+import gzip
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+try:
+    import zstandard
+    EXTENSION = ".html.zst"
+except ImportError:  # repli sans dépendance : gzip (moins compact)
+    zstandard = None
+    EXTENSION = ".html.gz"
+
+COLONNES_INDEX = ["url", "horodatage", "hash", "taille", "taille_compressee"]
+
+
+def hash_html(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class Snapshot:
+    """Une entrée de l'index ; le HTML n'est décompressé qu'à l'appel de html()."""
+
+    def __init__(self, magasin, entree: dict):
+        self.magasin = magasin
+        self.url = entree["url"]
+        self.horodatage = entree["horodatage"]
+        self.hash = entree["hash"]
+        self.taille = int(entree["taille"])
+
+    def html(self) -> str:
+        return self.magasin.lire(self.hash)
+
+
+class MagasinSnapshots:
+
+    def __init__(self, dossier, niveau=10):
+        self.dossier = Path(dossier)
+        self.niveau = niveau
+        self.chemin_index = self.dossier / "index.csv"
+        self._verrou = threading.Lock()
+        (self.dossier / "objets").mkdir(parents=True, exist_ok=True)
+
+    # ---- chemins / compression ----
+
+    def chemin_objet(self, h: str) -> Path:
+        for ext in (".html.zst", ".html.gz"):
+            p = self.dossier / "objets" / h[:2] / f"{h}{ext}"
+            if p.exists():
+                return p
+        return self.dossier / "objets" / h[:2] / f"{h}{EXTENSION}"
+
+    def _compresser(self, donnees: bytes) -> bytes:
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.niveau).compress(donnees)
+        return gzip.compress(donnees, compresslevel=9)
+
+    @staticmethod
+    def _decompresser(chemin: Path) -> bytes:
+        with open(chemin, "rb") as f:
+            donnees = f.read()
+        if chemin.suffix == ".zst":
+            return zstandard.ZstdDecompressor().decompress(donnees)
+        return gzip.decompress(donnees)
+
+    # ---- écriture ----
+
+    def ajouter(self, url: str, html: str) -> str:
+        """Stocke une page (si nouvelle) et l'ajoute à l'index. Renvoie son hash."""
+        brut = html.encode("utf-8")
+        h = hash_html(html)
+        chemin = self.chemin_objet(h)
+
+        with self._verrou:
+            if chemin.exists():
+                taille_comp = chemin.stat().st_size
+            else:
+                chemin.parent.mkdir(exist_ok=True)
+                comp = self._compresser(brut)
+                tmp = chemin.with_suffix(".tmp")
+                with open(tmp, "wb") as f:
+                    f.write(comp)
+                os.replace(tmp, chemin)
+                taille_comp = len(comp)
+
+            nouveau = not self.chemin_index.exists()
+            with open(self.chemin_index, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if nouveau:
+                    writer.writerow(COLONNES_INDEX)
+                writer.writerow([url, time.strftime("%Y-%m-%dT%H:%M:%S"), h, len(brut), taille_comp])
+        return h
+
+    # ---- lecture ----
+
+    def lire(self, h: str) -> str:
+        return self._decompresser(self.chemin_objet(h)).decode("utf-8")
+
+    def entrees(self):
+        """Lignes de l'index, dans l'ordre de capture."""
+        if not self.chemin_index.exists():
+            return
+        with open(self.chemin_index, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    def iterer(self, unique=True):
+        """
+        Parcourt les snapshots sans rien décompresser d'avance.
+        unique=True : une seule fois chaque contenu (première capture).
+        """
+        vus = set()
+        for entree in self.entrees():
+            if unique:
+                if entree["hash"] in vus:
+                    continue
+                vus.add(entree["hash"])
+            yield Snapshot(self, entree)
+
+    def stats(self) -> dict:
+        """Taille brute cumulée vs taille réellement occupée sur le disque."""
+        brut = nb = 0
+        objets = {}
+        for entree in self.entrees():
+            nb += 1
+            brut += int(entree["taille"])
+            objets[entree["hash"]] = int(entree["taille_compressee"])
+        comp = sum(objets.values())
+        return {"captures": nb, "pages_uniques": len(objets), "octets_bruts": brut, "octets_disque": comp}
@@ -0,0 +1,120 @@
+# SRC/sortie.py
+# Sortie en continu des annonces : les lignes sont gardées dans un petit tampon
+# puis écrites par lots (CSV ou groupes de lignes Parquet). La mémoire reste
+# bornée à `taille_lot` lignes quel que soit le nombre de pages scrapées.
+
+import os
+import csv
+
+# Politiques de synchronisation disque (fsync)
+FSYNC_LOT = "lot"              # après chaque lot écrit (le plus sûr)
+FSYNC_FERMETURE = "fermeture"  # une seule fois, à la fermeture
+FSYNC_JAMAIS = "jamais"        # on laisse faire le système
+
+
+class SortieLots:
+    """
+    Écrit des dicts (une annonce = un dict) dans `chemin`.
+
+    - colonnes   : ordre des colonnes ; les clés absentes valent None
+    - format     : "csv" ou "parquet" (déduit de l'extension par défaut)
+    - taille_lot : nombre de lignes gardées en mémoire avant écriture
+    - fsync      : FSYNC_LOT, FSYNC_FERMETURE ou FSYNC_JAMAIS
+    - types      : {colonne: type Python} pour typer les colonnes (str par défaut)
+    - mode       : "w" (écrase) ou "a" (ajoute, CSV uniquement)
+    """
+
+    def __init__(self, chemin, colonnes, format=None, taille_lot=1000,
+                 fsync=FSYNC_LOT, types=None, mode="w"):
+        self.chemin = str(chemin)
+        self.colonnes = list(colonnes)
+        self.format = format or ("parquet" if self.chemin.endswith(".parquet") else "csv")
+        self.taille_lot = max(1, taille_lot)
+        self.fsync = fsync
+        self.types = types or {}
+        self.nb_lignes = 0
+        self.nb_lots = 0
+        self._tampon = []
+
+        if self.format == "csv":
+            self._f = open(self.chemin, mode, newline="", encoding="utf-8")
+            self._writer = csv.writer(self._f)
+            if self._f.tell() == 0:
+                self._writer.writerow(self.colonnes)
+        elif self.format == "parquet":
+            if mode != "w":
+                raise ValueError("Le format Parquet ne supporte pas l'ajout (mode='a').")
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._pa = pa
+            self._schema = pa.schema([(c, _type_arrow(pa, self.types.get(c, str))) for c in self.colonnes])
+            self._writer = pq.ParquetWriter(self.chemin, self._schema)
+            self._f = None
+        else:
+            raise ValueError(f"Format de sortie inconnu : {self.format}")
+
+    # ---- écriture ----
+
+    def ecrire(self, ligne: dict):
+        self._tampon.append(ligne)
+        if len(self._tampon) >= self.taille_lot:
+            self.flush()
+
+    def ecrire_plusieurs(self, lignes):
+        for ligne in lignes:
+            self.ecrire(ligne)
+
+    def flush(self) -> int:
+        """
+        Écrit le tampon sur le disque. Renvoie la taille du fichier ensuite
+        (utile pour journaliser un point de reprise).
+        """
+        if self._tampon:
+            if self.format == "csv":
+                self._writer.writerows([[_cast(ligne.get(c), self.types.get(c)) for c in self.colonnes]
+                                        for ligne in self._tampon])
+            else:
+                colonnes = {c: [_cast(ligne.get(c), self.types.get(c)) for ligne in self._tampon]
+                            for c in self.colonnes}
+                self._writer.write_table(self._pa.table(colonnes, schema=self._schema))
+
+            self.nb_lignes += len(self._tampon)
+            self.nb_lots += 1
+            self._tampon = []
+
+        if self._f is not None:
+            self._f.flush()
+            if self.fsync == FSYNC_LOT:
+                os.fsync(self._f.fileno())
+            return self._f.tell()
+        return 0
+
+    def close(self):
+        self.flush()
+        if self._f is not None:
+            if self.fsync == FSYNC_FERMETURE:
+                os.fsync(self._f.fileno())
+            self._f.close()
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _cast(valeur, type_col):
+    """Convertit une valeur vers le type de sa colonne (None / vide -> None)."""
+    if valeur is None or valeur == "":
+        return None
+    try:
+        return (type_col or str)(valeur)
+    except (TypeError, ValueError):
+        return None
+
+
+def _type_arrow(pa, type_col):
+    return {int: pa.int64(), float: pa.float64()}.get(type_col, pa.string())
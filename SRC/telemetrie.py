@@ -0,0 +1,225 @@
+# SRC/telemetrie.py
+# Télémétrie des crawlers : un événement JSON par ligne (JSONL), un par page
+# visitée, avec le temps passé dans chaque étape (navigation, attente du
+# rendu, parsing), les octets reçus, le nombre d'annonces et l'état de la
+# page (annonces / vide / bloquee / timeout / erreur).
+#
+# Les pauses (humaines ou imposées par le limiteur) sont comptées à part :
+# le résumé distingue le temps passé à dormir du temps passé à travailler.
+#
+# Usage :
+#   python SRC/telemetrie.py                       résumé de DATA/telemetrie.jsonl
+#   python SRC/telemetrie.py --script 2-copie_page_html --dernier
+
+import sys
+import json
+import math
+import time
+import uuid
+import argparse
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+TELEMETRIE_PATH = BASE_DIR / "DATA" / "telemetrie.jsonl"
+
+ETAPES = ("nav_s", "attente_s", "parse_s")
+
+
+class Chrono:
+    """
+    Mesure les étapes d'une page :
+        chrono = tele.chrono()
+        page.goto(url);   chrono.top("nav")
+        …attente…;        chrono.top("attente")
+        extract_ads(html); chrono.top("parse")
+    Les pauses faites via tele.dormir() pendant une étape n'y sont pas comptées.
+    """
+
+    def __init__(self, telemetrie):
+        self._tele = telemetrie
+        self._t = time.monotonic()
+        self._sommeil = telemetrie._sommeil_thread()
+        self.etapes = {}
+
+    def top(self, etape: str) -> float:
+        maintenant = time.monotonic()
+        sommeil = self._tele._sommeil_thread()
+        duree = max(0.0, (maintenant - self._t) - (sommeil - self._sommeil))
+        cle = f"{etape}_s"
+        self.etapes[cle] = self.etapes.get(cle, 0.0) + duree
+        self._t, self._sommeil = maintenant, sommeil
+        return duree
+
+    def total(self) -> float:
+        return sum(self.etapes.values())
+
+
+class Telemetrie:
+    """
+    - chemin : fichier JSONL (None = télémétrie désactivée, dormir() dort quand même)
+    - script : nom du scraper, repris dans chaque événement
+    Utilisable depuis plusieurs threads (une ligne écrite = un événement complet).
+    """
+
+    def __init__(self, chemin=TELEMETRIE_PATH, script=""):
+        self.script = script
+        self.run = time.strftime("%Y%m%dT%H%M%S-") + uuid.uuid4().hex[:4]
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        self._f = None
+        if chemin is not None:
+            Path(chemin).parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(chemin, "a", encoding="utf-8")
+
+    # ---- pauses ----
+
+    def _sommeil_thread(self) -> float:
+        return getattr(self._local, "sommeil", 0.0)
+
+    def _consommer_sommeil(self) -> float:
+        s = self._sommeil_thread() - getattr(self._local, "deja_note", 0.0)
+        self._local.deja_note = self._sommeil_thread()
+        return s
+
+    def dormir(self, secondes: float):
+        """time.sleep() compté comme sommeil (rattaché à la prochaine page du thread)."""
+        time.sleep(secondes)
+        self._local.sommeil = self._sommeil_thread() + secondes
+
+    # ---- événements ----
+
+    def chrono(self) -> Chrono:
+        return Chrono(self)
+
+    def evenement(self, type_ev: str, **champs):
+        if self._f is None:
+            return
+        ligne = {"t": round(time.time(), 3), "script": self.script, "run": self.run, "type": type_ev}
+        ligne.update({k: round(v, 3) if isinstance(v, float) else v for k, v in champs.items()})
+        texte = json.dumps(ligne, ensure_ascii=False) + "\n"
+        with self._verrou:
+            self._f.write(texte)
+            self._f.flush()
+
+    def page(self, chrono=None, **champs):
+        """
+        Un événement "page". Champs usuels : lieu, page, url, mode, octets,
+        annonces, etat, limiteur_s (attente imposée par le limiteur de débit).
+        """
+        if chrono is not None:
+            champs = {**chrono.etapes, **champs}
+        champs["sommeil_s"] = champs.get("sommeil_s", 0.0) + self._consommer_sommeil()
+        self.evenement("page", **champs)
+
+    def fin(self, **champs):
+        """Dernier événement du run (avec le sommeil non encore rattaché à une page)."""
+        self.evenement("fin", sommeil_s=self._consommer_sommeil(), **champs)
+        if self._f is not None:
+            with self._verrou:
+                self._f.close()
+                self._f = None
+
+
+def etat_page(etat: str, nb_annonces: int) -> str:
+    """Page "vide" si elle s'est affichée normalement mais sans annonce valide."""
+    if nb_annonces == 0 and etat in ("annonces", "ok"):
+        return "vide"
+    return etat
+
+
+# ============================================================
+# 📊 Résumé
+# ============================================================
+
+def lire_evenements(chemin=TELEMETRIE_PATH):
+    with open(chemin, encoding="utf-8") as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if ligne:
+                yield json.loads(ligne)
+
+
+def centile(valeurs: list, p: float) -> float:
+    """Centile au rang le plus proche (pas besoin de numpy pour ça)."""
+    if not valeurs:
+        return 0.0
+    valeurs = sorted(valeurs)
+    rang = max(1, math.ceil(p / 100 * len(valeurs)))
+    return valeurs[rang - 1]
+
+
+def resumer(evenements) -> dict:
+    """Agrège les événements par (script, run)."""
+    runs = {}
+    for ev in evenements:
+        r = runs.setdefault((ev["script"], ev["run"]), {
+            "debut": ev["t"], "fin": ev["t"], "pages": 0, "annonces": 0, "octets": 0,
+            "etats": {}, "latences": [], "sommeil_s": 0.0, "limiteur_s": 0.0,
+            **{e: 0.0 for e in ETAPES},
+        })
+        r["debut"], r["fin"] = min(r["debut"], ev["t"]), max(r["fin"], ev["t"])
+        r["sommeil_s"] += ev.get("sommeil_s", 0.0)
+        if ev["type"] != "page":
+            continue
+        r["pages"] += 1
+        r["annonces"] += ev.get("annonces", 0)
+        r["octets"] += ev.get("octets", 0)
+        r["limiteur_s"] += ev.get("limiteur_s", 0.0)
+        etat = ev.get("etat", "?")
+        r["etats"][etat] = r["etats"].get(etat, 0) + 1
+        for e in ETAPES:
+            r[e] += ev.get(e, 0.0)
+        if "nav_s" in ev:   # une page en erreur n'a pas de latence mesurée
+            r["latences"].append(ev["nav_s"] + ev.get("attente_s", 0.0))
+
+    for r in runs.values():
+        r["duree_s"] = r["fin"] - r["debut"]
+        r["annonces_par_min"] = r["annonces"] / (r["duree_s"] / 60) if r["duree_s"] > 0 else 0.0
+        r["p50_s"] = centile(r["latences"], 50)
+        r["p95_s"] = centile(r["latences"], 95)
+        r["travail_s"] = sum(r[e] for e in ETAPES)
+        r["dormi_s"] = r["sommeil_s"] + r["limiteur_s"]
+    return runs
+
+
+def afficher(script: str, run: str, r: dict):
+    total = r["travail_s"] + r["dormi_s"]
+    part = 100 * r["dormi_s"] / total if total else 0.0
+    etats = ", ".join(f"{e} {n}" for e, n in sorted(r["etats"].items()))
+    print(f"\n=== {script} – run {run} ===")
+    print(f"Durée           : {r['duree_s'] / 60:.1f} min, {r['pages']} pages ({etats})")
+    print(f"Annonces        : {r['annonces']} ({r['annonces_par_min']:.1f} / min), "
+          f"{r['octets'] / 1e6:.1f} Mo de HTML")
+    print(f"Latence page    : p50 {r['p50_s']:.2f} s, p95 {r['p95_s']:.2f} s (navigation + attente)")
+    print(f"Étapes          : navigation {r['nav_s']:.0f} s, attente {r['attente_s']:.0f} s, "
+          f"parsing {r['parse_s']:.0f} s")
+    print(f"Sommeil/travail : {r['dormi_s']:.0f} s dormies (dont limiteur {r['limiteur_s']:.0f} s) "
+          f"/ {r['travail_s']:.0f} s de travail → {part:.0f} % du temps à dormir")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Résumé de la télémétrie des crawlers.")
+    parser.add_argument("fichier", nargs="?", default=str(TELEMETRIE_PATH))
+    parser.add_argument("--script", help="ne garder que ce scraper")
+    parser.add_argument("--dernier", action="store_true", help="seulement le dernier run")
+    args = parser.parse_args()
+
+    if not Path(args.fichier).exists():
+        print(f"❌ Pas de télémétrie : {args.fichier}")
+        return 1
+
+    evenements = lire_evenements(args.fichier)
+    if args.script:
+        evenements = (ev for ev in evenements if ev["script"] == args.script)
+    runs = resumer(evenements)
+    cles = sorted(runs, key=lambda k: runs[k]["debut"])
+    if args.dernier:
+        cles = cles[-1:]
+    for script, run in cles:
+        afficher(script, run, runs[(script, run)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
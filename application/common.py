@@ -1,3 +1,4 @@
+import sys
 import pandas as pd
 import streamlit as st
 import plotly.io as pio
@@ -7,34 +8,13 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parents[1]
 # parents[1] → racine du projet
 
-CSV_PATH = BASE_DIR / "DATA" / "df_analyseVF4.csv"
+# Nettoyage partagé (SRC/nettoyage.py)
+sys.path.append(str(BASE_DIR / "SRC"))
+from nettoyage import normaliser_code_departement, DEPT_TO_REGION  # noqa: E402
+from jeu_donnees import lire_jeu  # noqa: E402
 
-DEPT_TO_REGION = {
-    "01":"Auvergne-Rhône-Alpes","03":"Auvergne-Rhône-Alpes","07":"Auvergne-Rhône-Alpes","15":"Auvergne-Rhône-Alpes",
-    "26":"Auvergne-Rhône-Alpes","38":"Auvergne-Rhône-Alpes","42":"Auvergne-Rhône-Alpes","43":"Auvergne-Rhône-Alpes",
-    "63":"Auvergne-Rhône-Alpes","69":"Auvergne-Rhône-Alpes","73":"Auvergne-Rhône-Alpes","74":"Auvergne-Rhône-Alpes",
-    "21":"Bourgogne-Franche-Comté","25":"Bourgogne-Franche-Comté","39":"Bourgogne-Franche-Comté","58":"Bourgogne-Franche-Comté",
-    "70":"Bourgogne-Franche-Comté","71":"Bourgogne-Franche-Comté","89":"Bourgogne-Franche-Comté","90":"Bourgogne-Franche-Comté",
-    "22":"Bretagne","29":"Bretagne","35":"Bretagne","56":"Bretagne",
-    "18":"Centre-Val de Loire","28":"Centre-Val de Loire","36":"Centre-Val de Loire","37":"Centre-Val de Loire",
-    "41":"Centre-Val de Loire","45":"Centre-Val de Loire",
-    "2A":"Corse","2B":"Corse",
-    "08":"Grand Est","10":"Grand Est","51":"Grand Est","52":"Grand Est","54":"Grand Est","55":"Grand Est","57":"Grand Est",
-    "67":"Grand Est","68":"Grand Est","88":"Grand Est",
-    "02":"Hauts-de-France","59":"Hauts-de-France","60":"Hauts-de-France","62":"Hauts-de-France","80":"Hauts-de-France",
-    "75":"Île-de-France","77":"Île-de-France","78":"Île-de-France","91":"Île-de-France","92":"Île-de-France","93":"Île-de-France",
-    "94":"Île-de-France","95":"Île-de-France",
-    "14":"Normandie","27":"Normandie","50":"Normandie","61":"Normandie","76":"Normandie",
-    "16":"Nouvelle-Aquitaine","17":"Nouvelle-Aquitaine","19":"Nouvelle-Aquitaine","23":"Nouvelle-Aquitaine","24":"Nouvelle-Aquitaine",
-    "33":"Nouvelle-Aquitaine","40":"Nouvelle-Aquitaine","47":"Nouvelle-Aquitaine","64":"Nouvelle-Aquitaine","79":"Nouvelle-Aquitaine",
-    "86":"Nouvelle-Aquitaine","87":"Nouvelle-Aquitaine",
-    "09":"Occitanie","11":"Occitanie","12":"Occitanie","30":"Occitanie","31":"Occitanie","32":"Occitanie","34":"Occitanie",
-    "46":"Occitanie","48":"Occitanie","65":"Occitanie","66":"Occitanie","81":"Occitanie","82":"Occitanie",
-    "44":"Pays de la Loire","49":"Pays de la Loire","53":"Pays de la Loire","72":"Pays de la Loire","85":"Pays de la Loire",
-    "04":"Provence-Alpes-Côte d'Azur","05":"Provence-Alpes-Côte d'Azur","06":"Provence-Alpes-Côte d'Azur","13":"Provence-Alpes-Côte d'Azur",
-    "83":"Provence-Alpes-Côte d'Azur","84":"Provence-Alpes-Côte d'Azur",
-    "971":"Guadeloupe","972":"Martinique","973":"Guyane","974":"La Réunion","976":"Mayotte",
-}
+CSV_PATH = BASE_DIR / "DATA" / "df_analyseVF4.csv"
+PARQUET_PATH = BASE_DIR / "DATA" / "df_analyseVF4.parquet"
 
 def fmt_int(x) -> str:
     try:
@@ -42,25 +22,35 @@ def fmt_int(x) -> str:
     except Exception:
         return str(x)
 
-def normalize_dept_code(x):
-    if pd.isna(x):
-        return None
-    s = str(x).strip().upper()
-    if s.isdigit() and len(s) == 1:
-        s = s.zfill(2)
-    return s
+def read_parquet_df(colonnes=None) -> pd.DataFrame:
+    """
+    Jeu Parquet typé (SRC/jeu_donnees.py) : nombres déjà convertis, département
+    normalisé et région déjà calculée. Les pages filtrent puis regroupent sur
+    plusieurs colonnes : les catégories redeviennent du texte (sinon groupby
+    croiserait toutes les modalités) et les entiers nullables des float.
+    """
+    df = lire_jeu("analyse", colonnes, chemin=PARQUET_PATH)
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].astype(object)
+    for col in ["pieces", "Arrondissement"]:
+        if col in df.columns:
+            df[col] = df[col].astype("float64")
+    return df
 
 @st.cache_data(show_spinner=False)
-def load_df() -> pd.DataFrame:
-    df = pd.read_csv(CSV_PATH, dtype={"Code_postal": str})
+def load_df(colonnes=None) -> pd.DataFrame:
+    if PARQUET_PATH.exists():
+        df = read_parquet_df(colonnes)
+    else:
+        df = pd.read_csv(CSV_PATH, dtype={"Code_postal": str}, usecols=colonnes)
 
-    for col in ["prix", "surface", "prix_m2", "pieces", "Arrondissement", "latitude", "longitude"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        for col in ["prix", "surface", "prix_m2", "pieces", "Arrondissement", "latitude", "longitude"]:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    if "departement_code" in df.columns:
-        df["departement_code"] = df["departement_code"].apply(normalize_dept_code)
-        df["region"] = df["departement_code"].map(DEPT_TO_REGION)
+        if "departement_code" in df.columns:
+            df["departement_code"] = normaliser_code_departement(df["departement_code"])
+            df["region"] = df["departement_code"].map(DEPT_TO_REGION)
 
     for c in ["prix", "surface", "prix_m2"]:
         if c not in df.columns:
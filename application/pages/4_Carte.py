@@ -11,11 +11,19 @@ from pathlib import Path
 # Chemin du fichier courant (4_Carte.py)
 BASE_DIR = Path(__file__).resolve().parents[2]
 
-# Chemin vers DATA/annonces_carte.csv
+# Chemin vers DATA/annonces_carte.csv (et sa version Parquet typée)
 DATA_PATH = BASE_DIR / "DATA" / "annonces_carte.csv"
+PARQUET_PATH = DATA_PATH.with_suffix(".parquet")
 
 # Chargement
-source = pd.read_csv(DATA_PATH)
+if PARQUET_PATH.exists():
+    source = pd.read_parquet(PARQUET_PATH, columns=[
+        "latitude", "longitude", "type_bien", "prix", "surface", "pieces", "ville"])
+    for col in source.select_dtypes("category").columns:
+        source[col] = source[col].astype(object)
+    source["pieces"] = source["pieces"].astype("float64")
+else:
+    source = pd.read_csv(DATA_PATH)
 
 st.title("Annonces immobilières de France")
 